@@ -1,48 +1,47 @@
-import os
 import pandas as pd
 import json
 import re  # Ajout de l'import manquant
 
-# Vérifier si le fichier existe avant de continuer
+# Cahier des charges (les noms de la Notice sont aussi servis par le cache compilé, voir spec_cache.py)
 file_path = "Cahier des charges - Reporting Flux Standard - V25.1.0.xlsx"
-if not os.path.exists(file_path):
-    print(f"❌ Erreur : Le fichier '{file_path}' n'existe pas.")
-    exit()
 
 def extract_flux_sheet_names(sheets):
     """Retourne une liste de tous les noms de feuilles."""
     return list(sheets.keys())
 
 
-# Charger toutes les feuilles du fichier Excel dans un dictionnaire de DataFrames
-sheets = pd.read_excel(file_path, sheet_name=None)
-
-# Extraire les noms des feuilles pertinentes
-flux_sheets = extract_flux_sheet_names(sheets)
-
-def load_naming_constraints(notices_file, sheet_name="Notice"):
-    """Charge les contraintes de nommage depuis la feuille 'Notice' et retourne une liste des noms simplifiés."""
-    df = pd.read_excel(notices_file, sheet_name=sheet_name)
-   
+def extract_notice_names(df):
+    """Retourne la liste des noms simplifiés à partir de la feuille 'Notice' déjà chargée."""
     if df.shape[0] < 12 or df.shape[1] < 2:
         raise ValueError("La feuille 'Notice' ne contient pas suffisamment de données.")
-   
-    df = df.iloc[11:, [1]].dropna()  
+
+    df = df.iloc[11:, [1]].dropna()
     simplified_names = [
         extract_simplified_filename(file_name)
         for file_name in df.iloc[:, 0]
         if extract_simplified_filename(file_name)
     ]
-   
+
     return simplified_names
 
 
+def load_naming_constraints(notices_file, sheet_name="Notice"):
+    """Charge les contraintes de nommage depuis la feuille 'Notice' et retourne une liste des noms simplifiés."""
+    if notices_file == file_path and sheet_name == "Notice":
+        from spec_cache import load_spec
+
+        return load_spec(notices_file)["notice_names"]
+
+    df = pd.read_excel(notices_file, sheet_name=sheet_name)
+    return extract_notice_names(df)
+
+
 def extract_simplified_filename(filename):
     """Extrait un nom simplifié à partir du nom de fichier en utilisant plusieurs expressions régulières."""
     patterns = [
         r"Client_N°Flux_(?:MOD1_)?([A-Za-z]+(?:_[A-Za-z]+)*)_FREQUENCE",  # Pattern notice
         r"OCIANE_RC2_\d+_([A-Za-z_]+?)_[QM]?_?F?_?\d{8}",  # Pattern flux
-        r"OCIANE_RC2_\d+_([A-Za-z_]+?)_\d{8}"  
+        r"OCIANE_RC2_\d+_([A-Za-z_]+?)_\d{8}"
     ]
 
     if not isinstance(filename, str):
@@ -55,9 +54,10 @@ def extract_simplified_filename(filename):
 
     return ""  # Retourner une chaîne vide si aucun motif ne correspond
 
-# Tester la fonction
-naming_constraints = load_naming_constraints(file_path)
+if __name__ == "__main__":
+    # Tester la fonction
+    naming_constraints = load_naming_constraints(file_path)
 
-# Afficher les résultats
-print("\n🔍 Notice files name : ")
-print(json.dumps(naming_constraints, indent=4, ensure_ascii=False))
+    # Afficher les résultats
+    print("\n🔍 Notice files name : ")
+    print(json.dumps(naming_constraints, indent=4, ensure_ascii=False))
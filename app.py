@@ -1,12 +1,20 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, url_for
 import os
-import re
 import shutil
-import json
-import pandas as pd
-from datetime import datetime
-from mapping import extract_flux_sheet_names, flux_mapping, renamed_flux_sheets, extract_headers_and_types, extract_mandatory_columns, org_flux_sheets
-from Notice_ext import load_naming_constraints
+from spec_registry import get_spec
+from validation_plan import get_plan
+from manifest import ValidationManifest, validate_changed_files
+from results_store import ResultsStore, CLASSIFICATION, VALIDATION, file_location
+from filename_parser import parse_filename
+from classification import plan_classification, apply_plan, list_drop
+from pipeline import process_drop
+from flux_resolver import get_resolver
+from jobs import JobQueue, QueueFull
+from metrics import REGISTRY, run_registry
+from profiling import RunProfile, ProfileBusy, check_profile_mode, PROFILE_DIR, DEFAULT_PROFILE_MIN_MB
+from failure_report import FailureReport, failure_record, REPORT_FILE
+from csv_validator import (iter_classified_files, check_engine,
+                           DEFAULT_MEMORY_LIMIT_MB, DEFAULT_WORKERS, DEFAULT_ENGINE)
 import logging
 
 app = Flask(__name__)
@@ -23,280 +31,289 @@ NO_MATCH_DIR = os.path.join(TEST_DIR, "NO_MATCH")
 RESULTS_FILE = os.path.join(NO_MATCH_DIR, "file_test_results.json")
 REPORT_DIR = "data/Mandatory_columns_failure"
 json_report_path = os.path.join(REPORT_DIR, "test_results.json")
-report_file_path = os.path.join(REPORT_DIR, "failure_report.txt")
+report_file_path = os.path.join(REPORT_DIR, REPORT_FILE)
 file_path = "Cahier des charges - Reporting Flux Standard - V25.1.0.xlsx"
 
-# Create directories if they don't exist
-os.makedirs(Q_DIR, exist_ok=True)
-os.makedirs(M_DIR, exist_ok=True)
-os.makedirs(NO_MATCH_DIR, exist_ok=True)
-os.makedirs(REPORT_DIR, exist_ok=True)
-
-# Load naming constraints and extract flux sheet names
-Notice_constraints = load_naming_constraints(file_path)
-Notice_name = set(Notice_constraints.values()) if isinstance(Notice_constraints, dict) else set(Notice_constraints)
-
-sheets = pd.read_excel(file_path, sheet_name=None)
-flux_sheets = extract_flux_sheet_names(sheets)
-renamed_flux_sheets = {flux_mapping.get(flux, flux) for flux in flux_sheets}
-
-# Regular expression for filename pattern
-FILENAME_PATTERN = re.compile(
-    r'(?:(?:ENT-(?:[1-9]|[1-9][0-9]|100))_)?'  # Optional ENT-1 to ENT-100
-    r'(?:MOD1_)?'  # Optional MOD1_ prefix
-    r'OCIANE_RC2_\d+_'  # Required OCIANE_RC2_X_
-    r'([A-Z_]+(?:_[A-Z_]+)*)'  # Flux name
-    r'_(Q|M)(?:_F)?'  # Period (_Q or _M) + optional _F
-    r'_(\d{8}(?:\d{8})?)(?:_(\d{8}))*'  # Dates (YYYYMMDD, YYYYMMDDYYYYMMDD, or multiple)
-    r'\.csv$'  # Must end with .csv
-)
-
-def get_ent_number(filename):
-    match = re.match(r'^ENT-(\d+)', filename)
-    return match.group(1) if match else None
-
-def get_ent_directory(base_dir, filename):
-    ent_number = get_ent_number(filename)
-    return os.path.join(base_dir, f"ENT{ent_number}") if ent_number else os.path.join(base_dir, "NO_ENT")
-
-def extract_latest_date(dates_str):
-    dates = re.findall(r'\d{8}', dates_str)
-    dates = [datetime.strptime(date, "%Y%m%d") for date in dates]
-    return max(dates).strftime("%Y%m%d") if dates else None
+def ensure_directories():
+    """Create the working directories if they don't exist (done per run, not at import)."""
+    os.makedirs(Q_DIR, exist_ok=True)
+    os.makedirs(M_DIR, exist_ok=True)
+    os.makedirs(NO_MATCH_DIR, exist_ok=True)
+    os.makedirs(REPORT_DIR, exist_ok=True)
+
+# Background jobs for the long-running endpoints (bounded: 429 when full)
+job_queue = JobQueue()
+
+def query_flag(name):
+    return request.args.get(name, "").lower() in ("1", "true", "yes")
+
+def wants_json_export():
+    """JSON reports are an optional export (?export_json=1); results always go to the SQLite store."""
+    return query_flag("export_json")
+
+def run_or_enqueue(kind, fn, *args, params=None, **kwargs):
+    """Runs fn in the background and answers 202 with the job id (?sync=1 runs it inside the request)."""
+    if query_flag("sync"):
+        try:
+            return jsonify(fn(*args, **kwargs))
+        except ProfileBusy as e:
+            return jsonify({"error": str(e)}), 409
+    try:
+        job = job_queue.submit(kind, fn, *args, params=params, **kwargs)
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 429
+    return jsonify({"job_id": job.id, "status": job.status, "status_url": url_for("get_job", job_id=job.id)}), 202
 
 def find_failed_part(filename):
-    """Identifies the part of the filename that does not match the regex."""
-    segments = [
-        (r'^(?:(?:ENT-(?:[1-9]|[1-9][0-9]|100))_)?', "ENT number (optional)"),
-        (r'(?:MOD1_)?', "MOD1 prefix (optional)"),
-        (r'OCIANE_RC2_\d+_', "OCIANE_RC2 with number"),
-        (r'([A-Z_]+(?:_[A-Z_]+)*)', "Flux name"),
-        (r'_(Q|M)(?:_F)?', "Period (_Q or _M)"),
-        (r'_(\d{8}(?:\d{8})?)', "First date (YYYYMMDD or YYYYMMDDYYYYMMDD)"),
-        (r'(?:_(\d{8}))*', "Additional dates (_YYYYMMDD, optional)"),
-        (r'\.csv$', "File extension .csv")
-    ]
-
-    for part, desc in segments:
-        if not re.search(part, filename):
-            return desc
-    
-    return "Unknown error"
+    """Identifies the part of the filename that does not match (see filename_parser.parse_filename)."""
+    _, failure = parse_filename(filename)
+    return failure.segment if failure else "Unknown error"
 
 @app.route('/classify_files', methods=['POST'])
 def classify_files():
-    expected_date = None
-    results = []
-
-    for filename in os.listdir(TEST_DIR):
-        file_path = os.path.join(TEST_DIR, filename)
-        if not os.path.isfile(file_path):
-            continue
-        
-        result = {"filename": filename, "status": "", "reason": "", "failed_part": ""}
-        match = FILENAME_PATTERN.match(filename)
-        
-        if not match:
-            result["failed_part"] = find_failed_part(filename)
-            shutil.move(file_path, os.path.join(NO_MATCH_DIR, filename))
-            result["status"] = "Failed"
-            result["reason"] = "Filename does not match the pattern."
-            results.append(result)
-            continue
-    
-        flux_name, period, first_date, *additional_dates = match.groups()
-        flux_name = flux_name.strip()
-        all_dates = [first_date] + [d for d in additional_dates if d]
-        latest_date = extract_latest_date("_".join(all_dates))
-    
-        if flux_name not in renamed_flux_sheets or flux_name not in Notice_name:
-            shutil.move(file_path, os.path.join(NO_MATCH_DIR, filename))
-            result["status"] = "Failed"
-            result["reason"] = f"Unknown flux '{flux_name}'."
-            results.append(result)
-            continue
-        
-        if expected_date is None:
-            expected_date = latest_date
-        elif latest_date != expected_date:
-            shutil.move(file_path, os.path.join(NO_MATCH_DIR, filename))
-            result["status"] = "Failed"
-            result["reason"] = f"Different date '{latest_date}', expected '{expected_date}'."
-            results.append(result)
-            continue
-        
-        dest_dir = get_ent_directory(Q_DIR if period == "Q" else M_DIR, filename)
-        os.makedirs(dest_dir, exist_ok=True)
-        shutil.move(file_path, os.path.join(dest_dir, filename))
-        
-        result["status"] = "Passed"
-        result["reason"] = "File successfully classified."
-        results.append(result)
-
-    with open(RESULTS_FILE, "w") as json_file:
-        json.dump(results, json_file, indent=4)
-
-    return jsonify({"message": f"Results saved in {RESULTS_FILE}", "results": results})
+    ensure_directories()
+
+    # Naming constraints and flux sheet names come from the hot-reloaded spec registry
+    try:
+        spec = get_spec()
+    except FileNotFoundError as e:
+        logging.error("❌ Cahier des charges introuvable : %s", e)
+        return jsonify({"error": "Spec workbook not found"}), 503
+
+    # ?dry_run=1 returns the plan (pure, in memory) without touching the disk
+    if query_flag("dry_run"):
+        plan = plan_classification(list_drop(TEST_DIR), spec["renamed_flux_sheets"], spec["notice_names"],
+                                   Q_DIR, M_DIR, NO_MATCH_DIR)
+        return jsonify({"message": "Dry run: no file moved", **plan})
+
+    # Profiling: ?profile=run (whole run); no file is read, so there is no per-file mode
+    profile = request.args.get("profile") or None
+    if profile not in (None, "run"):
+        return jsonify({"error": f"Unsupported profiling mode for classification: {profile} (expected: run)"}), 400
+
+    export_json = wants_json_export()
+    return run_or_enqueue(CLASSIFICATION, run_classification, spec,
+                          params={"export_json": export_json, "profile": profile},
+                          export_json=export_json, profile=profile)
+
+def run_classification(spec, export_json=False, profile=None, progress=None):
+    """Plans and applies the classification of the current drop; returns the endpoint payload."""
+    Notice_name = set(spec["notice_names"])
+    renamed_flux_sheets = set(spec["renamed_flux_sheets"])
+    profiled = RunProfile(profile, os.path.join(REPORT_DIR, PROFILE_DIR), "classification")
+
+    with profiled:
+        # Plan first (pure, in memory), then move
+        plan = plan_classification(list_drop(TEST_DIR), renamed_flux_sheets, Notice_name, Q_DIR, M_DIR, NO_MATCH_DIR)
+        total = len(plan["files"])
+        if progress:
+            progress(0, total)
+
+        # Each result is written to the store as soon as the file has been moved
+        registry = run_registry()
+        store = ResultsStore()
+        run_id = store.start_run(CLASSIFICATION, spec["fingerprint"]["sha256"])
+        moved = 0
+
+        def record(entry):
+            nonlocal moved
+            store.add_classification(run_id, entry, entry["destination"], ent=entry["ent"], flux=entry["flux"],
+                                     period=entry["period"])
+            moved += 1
+            if progress:
+                progress(moved, total)
+
+        results = apply_plan(plan, TEST_DIR, on_moved=record, registry=registry)
+
+    summary = store.finish_run(run_id, registry.snapshot(), profiled.summary())
+    if export_json:
+        store.export_json(run_id, RESULTS_FILE)
+    store.close()
+
+    return {"message": f"Results saved in {store.path} (run {run_id})", "run_id": run_id, "summary": summary,
+            "reporting_date": plan["reporting_date"], "results": results}
+
+@app.route('/classification_plan', methods=['POST'])
+def classification_plan():
+    """Plans the classification of a listing of filenames (JSON body {"filenames": [...]}) without touching the disk."""
+    payload = request.get_json(silent=True) or {}
+    filenames = payload.get("filenames")
+    if not isinstance(filenames, list) or not all(isinstance(name, str) for name in filenames):
+        return jsonify({"error": "Expected a JSON body {\"filenames\": [...]}"}), 400
+
+    try:
+        spec = get_spec()
+    except FileNotFoundError as e:
+        logging.error("❌ Cahier des charges introuvable : %s", e)
+        return jsonify({"error": "Spec workbook not found"}), 503
+
+    plan = plan_classification(filenames, spec["renamed_flux_sheets"], spec["notice_names"], Q_DIR, M_DIR, NO_MATCH_DIR)
+    return jsonify(plan)
+
+def validation_options():
+    """Validation settings read from the query string; raises ValueError for an unknown engine or profiling mode."""
+    # Streaming validation: forced with ?streaming=1/0, otherwise chosen per file from the memory ceiling
+    streaming = request.args.get("streaming")
+    streaming = None if streaming is None else streaming.lower() in ("1", "true", "yes")
+    memory_limit_mb = request.args.get("memory_limit_mb", DEFAULT_MEMORY_LIMIT_MB, type=int)
+    # Parallel validation: ?workers=N processes (0 = all cores)
+    workers = request.args.get("workers", DEFAULT_WORKERS, type=int) or None
+    # CSV reader: ?engine=pandas (default) or ?engine=arrow
+    engine = request.args.get("engine", DEFAULT_ENGINE)
+    # Incremental run: unchanged files keep their previous verdict unless ?full=1
+    full = request.args.get("full", "").lower() in ("1", "true", "yes")
+    # Profiling: ?profile=run (whole run) or ?profile=file (each file of at least ?profile_min_mb=N MB)
+    profile = request.args.get("profile") or None
+    profile_min_mb = request.args.get("profile_min_mb", DEFAULT_PROFILE_MIN_MB, type=float)
+    check_engine(engine)
+    check_profile_mode(profile)
+    return {"streaming": streaming, "memory_limit_mb": memory_limit_mb, "workers": workers, "engine": engine,
+            "full": full, "export_json": wants_json_export(), "profile": profile, "profile_min_mb": profile_min_mb}
+
+@app.route('/process_files', methods=['POST'])
+def process_files_endpoint():
+    """Classifies and validates the current drop in a single pass: one name parse and one move per file."""
+    ensure_directories()
+    try:
+        options = validation_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    del options["full"], options["export_json"]  # dropped files are always new
+
+    try:
+        spec = get_spec()
+    except FileNotFoundError as e:
+        logging.error("❌ Cahier des charges introuvable : %s", e)
+        return jsonify({"error": "Spec workbook not found"}), 503
+
+    # Same job kind as /classify_files: both move the drop, so they never run at the same time
+    return run_or_enqueue(CLASSIFICATION, run_pipeline, spec, params=dict(options, pipeline=True), **options)
+
+def run_pipeline(spec, progress=None, **options):
+    """Runs the single-pass pipeline on the current drop; returns the endpoint payload."""
+    outcome = process_drop(spec, TEST_DIR, q_dir=Q_DIR, m_dir=M_DIR, no_match_dir=NO_MATCH_DIR, report_dir=REPORT_DIR,
+                           progress=progress, **options)
+    files = [
+        {"filename": entry["filename"], "status": entry["status"], "reason": entry["reason"],
+         "failed_part": entry["failed_part"], "validation_status": entry.get("validation", {}).get("status"),
+         "validation_reason": entry.get("validation", {}).get("reason"), "final_path": entry["final_path"]}
+        for entry in outcome["files"]
+    ]
+    return {"message": "Files classified and validated", "reporting_date": outcome["reporting_date"],
+            "run_ids": {CLASSIFICATION: outcome["classification_run_id"], VALIDATION: outcome["validation_run_id"]},
+            "summaries": outcome["summaries"], "failed_files": outcome["failed_files"], "files": files}
 
 @app.route('/check_mandatory_columns', methods=['POST'])
 def check_mandatory_columns_endpoint():
-    failed_files = []
-
-    # Load the Excel file
-    excel_path = "Cahier des charges - Reporting Flux Standard - V25.1.0.xlsx"
-    while not os.path.exists(excel_path):
-        excel_path = input("❌ Fichier introuvable. Veuillez entrer le chemin complet vers le fichier Excel : ")
+    ensure_directories()
+    try:
+        options = validation_options()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    # Use the compiled spec currently held by the registry (reloaded in the background on change)
     try:
-        cahier_des_charges = pd.read_excel(excel_path, sheet_name=None)
+        spec = get_spec()
+    except FileNotFoundError as e:
+        logging.error("❌ Cahier des charges introuvable : %s", e)
+        return jsonify({"error": "Spec workbook not found"}), 503
     except Exception as e:
         logging.error("Erreur lors de la lecture du fichier Excel : %s", e)
         return jsonify({"error": "Failed to read Excel file"}), 500
 
-    # Extract mandatory columns
-    mandatory_columns_by_flux = {}
-    for sheet_name, df in cahier_des_charges.items():
-        sheet_name_clean = sheet_name.strip().upper()
-        mandatory_columns = extract_mandatory_columns(df)
-        if mandatory_columns:
-            mandatory_columns_by_flux[sheet_name_clean] = mandatory_columns
+    return run_or_enqueue(VALIDATION, run_mandatory_columns_check, spec, params=options, **options)
+
+def run_mandatory_columns_check(spec, streaming=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, workers=DEFAULT_WORKERS,
+                                engine=DEFAULT_ENGINE, full=False, export_json=False, profile=None,
+                                profile_min_mb=DEFAULT_PROFILE_MIN_MB, progress=None):
+    """Validates every classified file, moves the failures and records the run; returns the endpoint payload."""
+    # Optional profiling of the whole run or of each large file, written next to the report
+    profiled = RunProfile(profile, os.path.join(REPORT_DIR, PROFILE_DIR), "validation", profile_min_mb)
+    with profiled:
+        failed_files = []
+        resolver = get_resolver(spec)
+
+        # Extract mandatory columns
+        mandatory_columns_by_flux = {}
+        for sheet_name_clean, mandatory_columns in spec["mandatory_columns_by_flux"].items():
+            if mandatory_columns:
+                mandatory_columns_by_flux[sheet_name_clean] = mandatory_columns
+            else:
+                logging.warning("⚠️ Feuille ignorée : Moins de 4 colonnes détectées dans %s.", sheet_name_clean)
+
+        # Process files: validated in parallel by the workers, moved and reported here in path order
+        tasks = []
+        for file_path in iter_classified_files(DATA_DIRS):
+            filename = os.path.basename(file_path)
+            flux_name = resolver.resolve(filename) or filename.upper()
+            logging.info(f"📂 flux_name utilisé : {flux_name}")
+            plan = get_plan(spec, flux_name) if flux_name in mandatory_columns_by_flux else None
+            tasks.append((file_path, flux_name, plan))
+
+        manifest = ValidationManifest() if full else ValidationManifest.load()
+        results = validate_changed_files(tasks, manifest, spec["fingerprint"]["sha256"], progress=progress,
+                                         workers=workers, streaming=streaming, memory_limit_mb=memory_limit_mb,
+                                         engine=engine, **profiled.validate_options)
+        registry = run_registry()
+        store = ResultsStore()
+        run_id = store.start_run(VALIDATION, spec["fingerprint"]["sha256"])
+        # One buffered report per run, replaced each run and written once at the end
+        with FailureReport(REPORT_DIR, registry=registry) as report:
+            for result in results:
+                profiled.collect(result)
+                registry.record_validation(result, ent=file_location(result["file_path"])[0])
+                record_validation_result(result, failed_files, registry, report)
+                store.add_validation(run_id, result)
+
+        if failed_files:
+            logging.info("Rapport généré : %s", report_file_path)
         else:
-            logging.warning("⚠️ Feuille ignorée : Moins de 4 colonnes détectées dans %s.", sheet_name_clean)
-
-    # Process files
-    for data_dir in DATA_DIRS:
-        if not os.path.exists(data_dir):
-            logging.warning("Le dossier %s n'existe pas.", data_dir)
-            continue
-        
-        for ent_folder in os.listdir(data_dir):
-            ent_path = os.path.join(data_dir, ent_folder)
-            if not os.path.isdir(ent_path):
-                continue
-
-            for filename in os.listdir(ent_path):
-                if filename.endswith(".csv"):
-                    file_path = os.path.join(ent_path, filename)
-                    flux_name = next((flux for flux in org_flux_sheets if flux in filename.upper()), filename.upper())
-                    logging.info(f"📂 flux_name utilisé : {flux_name}")
-                    check_mandatory_columns(file_path, flux_name, mandatory_columns_by_flux, cahier_des_charges, failed_files)
-
-    # Generate report
-    if failed_files:
-        with open(report_file_path, "w", encoding="utf-8") as report_file:
-            for file_path, reason in failed_files:
-                report_file.write(f"❌ {file_path}\nRaison : {reason}\n\n")
-        logging.info("Rapport généré : %s", report_file_path)
-    else:
-        logging.info("\n🆗 Tous les fichiers ont passé les tests.")
-        shutil.rmtree(REPORT_DIR, ignore_errors=True)
-
-    # Generate JSON report for dashboard
-    generate_test_results(failed_files, json_report_path)
-
-    return jsonify({"message": "Mandatory columns check completed", "failed_files": failed_files})
-
-def check_mandatory_columns(file_path, flux_name, mandatory_columns_by_flux, cahier_des_charges, failed_files):
-    logging.info("🔍 Traitement du fichier : %s", file_path)
-    try:
-        df = pd.read_csv(file_path, sep=";", encoding="utf-8", low_memory=False)
-        df.columns = df.columns.str.strip()
-    except Exception as e:
-        error_message = f"Erreur lors de la lecture -> {e}"
-        logging.error(f"{file_path} : {error_message}")
-        failed_files.append((file_path, error_message))
-        shutil.move(file_path, os.path.join(REPORT_DIR, os.path.basename(file_path)))
-        return  
-
-    if len(df) == 1:
-        logging.info("%s : Le fichier contient une seule ligne et est considéré comme valide.", file_path)
-        return
-
-    if flux_name not in mandatory_columns_by_flux:
-        logging.warning("⚠️ Flux inconnu dans le cahier des charges : %s", flux_name)
-        return
-
-    mandatory_columns = mandatory_columns_by_flux.get(flux_name, [])
-    missing_columns = [col for col in mandatory_columns if col not in df.columns]
-    
-    if missing_columns:
-        error_message = f"Colonnes manquantes pour {flux_name} -> {missing_columns}"
+            logging.info("\n🆗 Tous les fichiers ont passé les tests.")
+    summary = store.finish_run(run_id, registry.snapshot(), profiled.summary())
+
+    # Optional JSON export of the run (the dashboard reads the store)
+    if export_json:
+        store.export_json(run_id, json_report_path)
+    store.close()
+
+    return {"message": "Mandatory columns check completed", "run_id": run_id, "summary": summary,
+            "failed_files": failed_files}
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Stage timings and file, byte, row and violation counters since start-up (Prometheus text format)."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    """Known jobs, most recent first (without their final results)."""
+    return jsonify({"jobs": [job.to_dict(with_result=False) for job in job_queue.list()]})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status, progress counters (done/total, files per second) and, once finished, the result of a job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'"}), 404
+    return jsonify(job.to_dict())
+
+def record_validation_result(result, failed_files, registry=REGISTRY, report=None):
+    """Logs a validation result and, for failures, moves the file and adds it to the run's report writer."""
+    file_path, flux_name = result["file_path"], result["flux_name"]
+    if result["status"] == "Skipped":
+        logging.warning("⚠️ %s", result["reason"])
+    elif result["status"] == "Failed":
+        error_message = result["reason"]
         logging.error(f"{file_path} : {error_message}")
         failed_files.append((file_path, error_message))
-        shutil.move(file_path, os.path.join(REPORT_DIR, os.path.basename(file_path)))
-        return
-
-    headers_types = extract_headers_and_types(cahier_des_charges[flux_name])
-    length_check_failed = []
-    type_check_failed = []
-
-    for header, expected_type, expected_length in headers_types:
-        if header in df.columns:
-            actual_values = df[header].astype(str)
-
-            # Check length
-            if pd.notna(expected_length) and isinstance(expected_length, (int, float)):
-                expected_length = int(expected_length)
-                max_allowed_length = 10 if expected_length == 8 else expected_length
-                if any(actual_values.str.len() > max_allowed_length):
-                    length_check_failed.append(f"{header} (Attendu max: {max_allowed_length}, Trouvé: {actual_values.str.len().max()})")
-
-            # Check type
-            if expected_type == "Numérique":
-                df[header] = df[header].astype(str).str.strip()
-                df[header] = df[header].replace(['nan', 'NaN', 'None', '-', 'NULL'], pd.NA)
-                df[header] = df[header].fillna(0)
-                df[header] = df[header].str.replace(',', '.', regex=False)
-                df[header] = pd.to_numeric(df[header], errors='coerce')
-
-                if df[header].isna().any():
-                    invalid_numbers = df[df[header].isna()][header].unique()
-                    type_check_failed.append(f"{header} : Attendu 'Numérique', trouvé des valeurs non numériques. Valeurs problématiques: {invalid_numbers}")
-
-        if length_check_failed or type_check_failed:
-            error_message = f"Erreurs -> Longueur: {', '.join(length_check_failed)}, Type: {', '.join(type_check_failed)}"
-            logging.error(f"{file_path} : {error_message}")
-            failed_files.append((file_path, error_message))
+        ent = file_location(file_path)[0]
+        with registry.timed("move", flux=flux_name, ent=ent):
             shutil.move(file_path, os.path.join(REPORT_DIR, os.path.basename(file_path)))
-
-            with open(report_file_path, "a", encoding="utf-8") as report_file:
-                report_file.write(f"❌ {file_path}\n")
-                report_file.write(f"Raison : Longueur -> {', '.join(length_check_failed)}\n")
-                report_file.write(f"Raison : Type -> {', '.join(type_check_failed)}\n\n")
-            
-        else:
-            logging.info("%s \n🆗 : Toutes les colonnes obligatoires, leurs longueurs et types sont corrects pour %s", file_path, flux_name)
-
-def generate_test_results(failed_files, json_path):
-    os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    
-    test_results = []
-    for file_path, reason in failed_files:
-        result = {
-            "file_path": file_path,
-            "status": "Failed",
-            "reason": reason
-        }
-        test_results.append(result)
-    
-    for data_dir in DATA_DIRS:
-        if os.path.exists(data_dir):
-            for ent_folder in os.listdir(data_dir):
-                ent_path = os.path.join(data_dir, ent_folder)
-                if os.path.isdir(ent_path):
-                    for filename in os.listdir(ent_path):
-                        if filename.endswith(".csv"):
-                            file_path = os.path.join(ent_path, filename)
-                            if file_path not in [f[0] for f in failed_files]:
-                                test_results.append({
-                                    "file_path": file_path,
-                                    "status": "Passed",
-                                    "reason": None
-                                })
-    
-    with open(json_path, "w", encoding="utf-8") as json_file:
-        json.dump(test_results, json_file, indent=4, ensure_ascii=False)
-    logging.info("Rapport JSON généré : %s", json_path)
+        if report is not None:
+            report.add(failure_record(result, ent))
+    else:
+        logging.info("%s \n🆗 : Toutes les colonnes obligatoires, leurs longueurs et types sont corrects pour %s", file_path, flux_name)
+    return result
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,446 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import resource
+import multiprocessing
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from csv_validator import validate_csv, check_engine, ENGINES, DEFAULT_MEMORY_LIMIT_MB
+from validation_plan import compile_plan, get_plan
+
+# 🔹 Flux synthétique utilisé quand aucun fichier n'est fourni
+SYNTHETIC_FLUX = "BENCHMARK"
+SYNTHETIC_MANDATORY = ["NUM_CONTRAT", "DATE_EFFET"]
+SYNTHETIC_HEADERS = [
+    ("NUM_CONTRAT", "Alphanumérique", 10),
+    ("DATE_EFFET", "Date aaaammjj", 8),
+    ("MONTANT", "Numérique", 12),
+]
+
+
+# 🔹 Corpus fixes de la suite : nombre de fichiers, lignes par fichier, colonnes hors obligatoires, part d'échecs
+SUITE_CORPORA = {
+    "many_small": {"files": 2000, "rows": 20, "extra_columns": 0, "failure_ratio": 0.05},
+    "few_huge": {"files": 3, "rows": 1_000_000, "extra_columns": 0, "failure_ratio": 0.0},
+    "wide": {"files": 20, "rows": 20_000, "extra_columns": 200, "failure_ratio": 0.05},
+    "high_failure": {"files": 500, "rows": 200, "extra_columns": 0, "failure_ratio": 0.5},
+}
+SUITE_FORMAT_VERSION = 1
+
+# Écart toléré par rapport à la référence avant de signaler une régression
+DEFAULT_TOLERANCE = 0.10
+# Étapes trop courtes (dans la référence comme dans la mesure) pour que l'écart soit significatif
+MIN_COMPARED_SECONDS = 0.1
+# Métriques comparées : plus haut est meilleur (débits) ou plus bas est meilleur (latences, mémoire)
+HIGHER_IS_BETTER = ("files_per_s", "mb_per_s", "rows_per_s")
+LOWER_IS_BETTER = ("p50_ms", "p99_ms", "peak_rss_mb")
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus courant, en Mo."""
+    try:
+        # Linux : VmHWM est propre à l'image du processus (ru_maxrss survit à fork/exec)
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Ko, macOS : octets
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss():
+    """Remet le pic de mémoire résidente au niveau actuel (Linux uniquement, sans effet ailleurs)."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def write_synthetic_csv(path, rows, extra_columns=10, seed=0):
+    """Écrit un CSV conforme au flux synthétique, avec ``extra_columns`` colonnes texte hors cahier des charges."""
+    rng = np.random.default_rng(seed)
+    data = {
+        "NUM_CONTRAT": np.char.add("C", rng.integers(0, 10**8, rows).astype("U8")),
+        "DATE_EFFET": rng.choice(pd.date_range("2020-01-01", "2024-12-31").strftime("%Y%m%d").to_numpy(), rows),
+        "MONTANT": np.char.replace(np.round(rng.random(rows) * 10000, 2).astype("U12"), ".", ","),
+    }
+    for i in range(extra_columns):
+        data[f"LIBELLE_{i}"] = np.char.add("texte libre ", rng.integers(0, 10**6, rows).astype("U7"))
+    pd.DataFrame(data).to_csv(path, sep=";", index=False)
+    return path
+
+
+def _run_engine(engine, tasks, streaming, memory_limit_mb):
+    """Exécuté dans un processus neuf : valide les fichiers et mesure temps et pic mémoire."""
+    if engine == "arrow":
+        import pyarrow.csv  # noqa: F401  (import hors mesure, comme pandas)
+    reset_peak_rss()
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    results = [
+        validate_csv(file_path, flux_name, plan, streaming=streaming, memory_limit_mb=memory_limit_mb, engine=engine)
+        for file_path, flux_name, plan in tasks
+    ]
+    elapsed = time.perf_counter() - start
+
+    total_bytes = sum(os.path.getsize(file_path) for file_path, _, _ in tasks)
+    total_rows = sum(result.get("rows") or 0 for result in results)
+    return {
+        "engine": engine,
+        "files": len(tasks),
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        "rows_per_s": round(total_rows / elapsed) if elapsed else None,
+        "baseline_rss_mb": round(baseline_rss, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "statuses": [result["status"] for result in results],
+    }
+
+
+def benchmark_engines(tasks, engines=ENGINES, streaming=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+    """Compare les moteurs de lecture sur les mêmes fichiers, chacun dans un processus séparé."""
+    context = multiprocessing.get_context("spawn")
+    report = []
+    for engine in engines:
+        check_engine(engine)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            report.append(executor.submit(_run_engine, engine, tasks, streaming, memory_limit_mb).result())
+    return report
+
+
+def synthetic_filenames(count, invalid_ratio=0.2, seed=0):
+    """Noms de fichiers flux variés (ENT, MOD1, période, dates multiples), dont une part invalide."""
+    rng = random.Random(seed)
+    fluxes = ["CONTRATSCOLLECTIFS", "REFERENTIEL_GROUPE", "PRESTATIONS_SANTE", "COTISATIONS"]
+    corruptions = [
+        lambda name: name.replace("OCIANE", "OCEANE"),
+        lambda name: name.replace("_Q_", "_X_").replace("_M_", "_X_"),
+        lambda name: name.replace(".csv", ".txt"),
+        lambda name: name[:-8] + "9" + name[-8:],
+        lambda name: name.replace("ENT-", "ENT-0"),
+    ]
+    names = []
+    for _ in range(count):
+        name = (
+            (f"ENT-{rng.randint(1, 100)}_" if rng.random() < 0.7 else "")
+            + ("MOD1_" if rng.random() < 0.3 else "")
+            + f"OCIANE_RC2_{rng.randint(1, 99)}_{rng.choice(fluxes)}_{rng.choice('QM')}"
+            + ("_F" if rng.random() < 0.2 else "")
+            + f"_2024{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+            + ("_20240131" if rng.random() < 0.3 else "")
+            + ".csv"
+        )
+        if rng.random() < invalid_ratio:
+            name = rng.choice(corruptions)(name)
+        names.append(name)
+    return names
+
+
+def _legacy_find_failed_part(name):
+    """find_failed_part tel qu'il était avant filename_parser : huit re.search non ancrés."""
+    import re
+
+    segments = [
+        r'^(?:(?:ENT-(?:[1-9]|[1-9][0-9]|100))_)?', r'(?:MOD1_)?', r'OCIANE_RC2_\d+_', r'([A-Z_]+(?:_[A-Z_]+)*)',
+        r'_(Q|M)(?:_F)?', r'_(\d{8}(?:\d{8})?)', r'(?:_(\d{8}))*', r'\.csv$',
+    ]
+    return next((part for part in segments if not re.search(part, name)), None)
+
+
+def benchmark_filenames(names):
+    """Débit (noms/minute) du parseur en une passe face au chemin regex + find_failed_part historique."""
+    from filename_parser import parse_filename
+    from test_filenames import FILENAME_PATTERN, extract_latest_date
+
+    def legacy(name):
+        match = FILENAME_PATTERN.match(name)
+        if not match:
+            return _legacy_find_failed_part(name)
+        flux_name, period, first_date, *additional_dates = match.groups()
+        return extract_latest_date("_".join([first_date] + [d for d in additional_dates if d]))
+
+    report = []
+    for label, parse in (("parser", parse_filename), ("regex", legacy)):
+        start = time.perf_counter()
+        for name in names:
+            parse(name)
+        elapsed = time.perf_counter() - start
+        report.append({
+            "parser": label,
+            "names": len(names),
+            "seconds": round(elapsed, 3),
+            "names_per_minute": round(len(names) / elapsed * 60) if elapsed else None,
+        })
+    return report
+
+
+def synthetic_spec(extra_columns=0):
+    """
+    Spec compilée en mémoire pour le flux synthétique (feuille CONTRATSCOLLECTIFS, nommée
+    CONTRATCOLLECTIF_STOCK dans les fichiers), avec ``extra_columns`` colonnes texte facultatives.
+    """
+    from spec_cache import compile_spec_from_sheets
+
+    headers = SYNTHETIC_HEADERS + [(f"LIBELLE_{i}", "Alphanumérique", 30) for i in range(extra_columns)]
+    rows = [[None] * 7 for _ in range(4)]
+    rows += [[None, None, header, "Oui" if header in SYNTHETIC_MANDATORY else "Non", None, data_type, length]
+             for header, data_type, length in headers]
+    notice = [[None, None] for _ in range(11)] + [[None, "Client_N°Flux_CONTRATCOLLECTIF_STOCK_FREQUENCE_AAAAMMJJ.csv"]]
+    sheets = {
+        "CONTRATSCOLLECTIFS": pd.DataFrame(rows, columns=[f"C{i}" for i in range(7)]),
+        "Notice": pd.DataFrame(notice, columns=["A", "B"]),
+    }
+    spec = compile_spec_from_sheets(sheets)
+    spec["fingerprint"] = {"sha256": hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()}
+    return spec
+
+
+def stage_metrics(stage, seconds, latencies, files, total_bytes, total_rows, peak_rss):
+    """Débits, latences par fichier (p50/p99) et pic mémoire d'une étape."""
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "stage": stage,
+        "files": files,
+        "seconds": round(seconds, 3),
+        "files_per_s": round(files / seconds, 1) if seconds else None,
+        "mb_per_s": round(total_bytes / (1024 * 1024) / seconds, 2) if seconds and total_bytes is not None else None,
+        "rows_per_s": round(total_rows / seconds) if seconds else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3) if len(latencies_ms) else None,
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3) if len(latencies_ms) else None,
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+def benchmark_corpus(spec, work_dir, files, rows, failure_ratio=0.0, seed=0):
+    """
+    Génère un dépôt puis mesure chaque étape sur ce dépôt : classement (plan et
+    déplacements), validation des fichiers classés (un par un), enregistrement des
+    résultats dans le store.
+    """
+    from generate_csv import generate_corpus, FAILURE_KINDS
+    from classification import plan_classification, apply_plan
+    from flux_resolver import get_resolver
+    from results_store import ResultsStore, CLASSIFICATION, VALIDATION
+
+    drop = os.path.join(work_dir, "drop")
+    rates = {kind: failure_ratio / len(FAILURE_KINDS) for kind in FAILURE_KINDS} if failure_ratio else {}
+    generated = generate_corpus(spec, drop, files, rows, rates, seed)
+    sizes = {entry["filename"]: os.path.getsize(os.path.join(drop, entry["filename"])) for entry in generated}
+    dirs = [os.path.join(work_dir, name) for name in ("Q_FILES", "M_FILES", "NO_MATCH")]
+    report = []
+
+    # Classement : un nom analysé et un déplacement par fichier
+    reset_peak_rss()
+    latencies, last = [], time.perf_counter()
+
+    def moved(entry):
+        nonlocal last
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+
+    start = time.perf_counter()
+    plan = plan_classification(sorted(sizes), spec["renamed_flux_sheets"], spec["notice_names"], *dirs,
+                               resolver=get_resolver(spec))
+    last = time.perf_counter()
+    apply_plan(plan, drop, on_moved=moved)
+    report.append(stage_metrics(CLASSIFICATION, time.perf_counter() - start, latencies, len(sizes),
+                                sum(sizes.values()), len(sizes) * rows, peak_rss_mb()))
+
+    # Validation des fichiers classés
+    classified = [entry for entry in plan["files"] if entry["status"] == "Passed"]
+    reset_peak_rss()
+    latencies, results = [], []
+    start = time.perf_counter()
+    for entry in classified:
+        began = time.perf_counter()
+        results.append(validate_csv(entry["destination"], entry["spec_flux"], get_plan(spec, entry["spec_flux"])))
+        latencies.append(time.perf_counter() - began)
+    report.append(stage_metrics(VALIDATION, time.perf_counter() - start, latencies, len(classified),
+                                sum(sizes[entry["filename"]] for entry in classified),
+                                sum(result.get("rows") or 0 for result in results), peak_rss_mb()))
+
+    # Enregistrement des deux passages dans le store (ce que lit le tableau de bord)
+    reset_peak_rss()
+    start = time.perf_counter()
+    with ResultsStore(os.path.join(work_dir, "results.sqlite")) as store:
+        runs = [store.start_run(CLASSIFICATION), store.start_run(VALIDATION)]
+        latencies = []
+        for entry in plan["files"]:
+            began = time.perf_counter()
+            store.add_classification(runs[0], entry, entry["destination"], ent=entry["ent"], flux=entry["flux"],
+                                     period=entry["period"])
+            latencies.append(time.perf_counter() - began)
+        for result in results:
+            began = time.perf_counter()
+            store.add_validation(runs[1], result)
+            latencies.append(time.perf_counter() - began)
+        for run_id in runs:
+            store.finish_run(run_id)
+    # Débit en octets rapporté au corpus dont les résultats sont enregistrés
+    report.append(stage_metrics("store", time.perf_counter() - start, latencies, len(latencies),
+                                sum(sizes.values()), len(sizes) * rows, peak_rss_mb()))
+    return report
+
+
+def run_suite(corpora=None, scale=1.0, work_dir=None, seed=0):
+    """
+    Exécute la suite sur les corpus fixes (réduits par ``scale`` : nombre de fichiers et
+    lignes multipliés) et retourne le rapport sérialisable en JSON.
+    """
+    corpora = corpora or list(SUITE_CORPORA)
+    report = {
+        "version": SUITE_FORMAT_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "scale": scale,
+        "corpora": {},
+    }
+    for name in corpora:
+        settings = SUITE_CORPORA[name]
+        files = max(1, round(settings["files"] * scale))
+        rows = max(1, round(settings["rows"] * scale))
+        corpus_dir = tempfile.mkdtemp(prefix=f"bench_{name}_", dir=work_dir)
+        try:
+            stages = benchmark_corpus(synthetic_spec(settings["extra_columns"]), corpus_dir, files, rows,
+                                      settings["failure_ratio"], seed)
+        finally:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+        report["corpora"][name] = {"files": files, "rows": rows, "stages": stages}
+    return report
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare un rapport à la référence, étape par étape et corpus par corpus.
+
+    Returns:
+        list: régressions {corpus, stage, metric, baseline, current, change} au-delà de ``tolerance``.
+    """
+    regressions = []
+    for name, corpus in report["corpora"].items():
+        reference = baseline.get("corpora", {}).get(name)
+        if reference is None or (reference["files"], reference["rows"]) != (corpus["files"], corpus["rows"]):
+            continue
+        reference_stages = {stage["stage"]: stage for stage in reference["stages"]}
+        for stage in corpus["stages"]:
+            previous = reference_stages.get(stage["stage"])
+            if previous is None or max(previous["seconds"], stage["seconds"]) < MIN_COMPARED_SECONDS:
+                continue
+            for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+                before, after = previous.get(metric), stage.get(metric)
+                if not before or after is None:
+                    continue
+                change = (after - before) / before
+                if (metric in HIGHER_IS_BETTER and change < -tolerance) or (metric in LOWER_IS_BETTER and change > tolerance):
+                    regressions.append({"corpus": name, "stage": stage["stage"], "metric": metric,
+                                        "baseline": before, "current": after, "change": round(change, 3)})
+    return regressions
+
+
+def _shown(value):
+    """Valeur affichable dans une colonne alignée (un débit non mesuré vaut None)."""
+    return "-" if value is None else value
+
+
+def _suite_command(args):
+    report = run_suite(args.corpora, args.scale, args.work_dir)
+    for name, corpus in report["corpora"].items():
+        print(f"{name} ({corpus['files']} fichiers x {corpus['rows']} lignes)")
+        for line in corpus["stages"]:
+            print(f"  {line['stage']:>14} : {_shown(line['files_per_s']):>10} fichiers/s  "
+                  f"{_shown(line['mb_per_s']):>8} Mo/s  {_shown(line['rows_per_s']):>10} lignes/s  "
+                  f"p50 {line['p50_ms']} ms  p99 {line['p99_ms']} ms  pic RSS {line['peak_rss_mb']} Mo")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"❌ {regression['corpus']}/{regression['stage']} {regression['metric']} : "
+                  f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.0%})")
+        if not regressions:
+            print(f"✅ Aucune régression au-delà de {args.tolerance:.0%} par rapport à {args.baseline}")
+    return report
+
+
+def _engines_command(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.files:
+            from spec_cache import load_spec
+            from validation_plan import get_plan
+
+            plan = get_plan(load_spec(), args.flux)
+            tasks = [(file_path, args.flux, plan) for file_path in args.files]
+        else:
+            file_path = write_synthetic_csv(os.path.join(tmp_dir, "synthetic.csv"), args.rows, args.extra_columns)
+            plan = compile_plan(SYNTHETIC_FLUX, SYNTHETIC_MANDATORY, SYNTHETIC_HEADERS)
+            tasks = [(file_path, SYNTHETIC_FLUX, plan)]
+
+        report = benchmark_engines(tasks, args.engines, args.streaming, args.memory_limit_mb)
+
+    for line in report:
+        print(f"{line['engine']:>7} : {line['seconds']:>8.3f}s  {_shown(line['mb_per_s']):>8} Mo/s  "
+              f"{_shown(line['rows_per_s']):>10} lignes/s  pic RSS {line['peak_rss_mb']} Mo (base {line['baseline_rss_mb']} Mo)")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de la validation des fichiers flux.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    engines = subparsers.add_parser("engines", help="Compare les moteurs de lecture pandas et Arrow.")
+    engines.add_argument("files", nargs="*", help="Fichiers CSV à valider (par défaut : un fichier synthétique).")
+    engines.add_argument("--flux", help="Flux des fichiers fournis (colonnes lues dans le cahier des charges).")
+    engines.add_argument("--rows", type=int, default=1_000_000, help="Lignes du fichier synthétique.")
+    engines.add_argument("--extra-columns", type=int, default=10, help="Colonnes hors cahier des charges du fichier synthétique.")
+    engines.add_argument("--streaming", action="store_true", default=None, help="Forcer la validation par blocs.")
+    engines.add_argument("--memory-limit-mb", type=int, default=DEFAULT_MEMORY_LIMIT_MB)
+    engines.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    engines.add_argument("--output", help="Fichier JSON où enregistrer les résultats.")
+
+    filenames = subparsers.add_parser("filenames", help="Compare le parseur de noms de fichiers au chemin regex.")
+    filenames.add_argument("--count", type=int, default=1_000_000, help="Nombre de noms synthétiques.")
+    filenames.add_argument("--invalid-ratio", type=float, default=0.2, help="Part de noms invalides.")
+    filenames.add_argument("--output", help="Fichier JSON où enregistrer les résultats.")
+    suite = subparsers.add_parser("suite", help="Débit du classement, de la validation et du store sur des corpus fixes.")
+    suite.add_argument("--corpora", nargs="+", choices=list(SUITE_CORPORA), help="Corpus à mesurer (par défaut : tous).")
+    suite.add_argument("--scale", type=float, default=1.0, help="Facteur appliqué au nombre de fichiers et de lignes.")
+    suite.add_argument("--work-dir", help="Dossier des corpus temporaires (par défaut : dossier temporaire système).")
+    suite.add_argument("--baseline", help="Rapport JSON de référence : signale les régressions.")
+    suite.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Écart toléré (0.10 = 10 %%).")
+    suite.add_argument("--output", help="Fichier JSON où enregistrer les résultats (nouvelle référence).")
+    args = parser.parse_args(argv)
+
+    if args.command == "suite":
+        report = _suite_command(args)
+    elif args.command == "filenames":
+        report = benchmark_filenames(synthetic_filenames(args.count, args.invalid_ratio))
+        for line in report:
+            print(f"{line['parser']:>7} : {line['seconds']:>8.3f}s  {line['names_per_minute']:>12} noms/minute")
+    else:
+        report = _engines_command(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+    if args.command == "suite" and report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
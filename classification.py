@@ -0,0 +1,105 @@
+import os
+import re
+import shutil
+from filename_parser import parse_filename
+from metrics import REGISTRY
+
+# 🔹 Dossiers de classement
+TEST_DIR = "data"
+Q_DIR = os.path.join(TEST_DIR, "Q_FILES")
+M_DIR = os.path.join(TEST_DIR, "M_FILES")
+NO_MATCH_DIR = os.path.join(TEST_DIR, "NO_MATCH")
+
+PATTERN_MISMATCH = "Filename does not match the pattern."
+CLASSIFIED = "File successfully classified."
+
+ENT_NUMBER = re.compile(r'^ENT-(\d+)')
+
+
+def list_drop(source_dir=TEST_DIR):
+    """Fichiers déposés à la racine de ``source_dir`` (hors dossiers de classement), triés par nom."""
+    return sorted(name for name in os.listdir(source_dir) if os.path.isfile(os.path.join(source_dir, name)))
+
+
+def ent_folder(filename, record=None):
+    """Dossier ENT d'un fichier (ENT12, ou NO_ENT si le nom ne commence pas par ENT-<n>)."""
+    if record is not None:
+        return f"ENT{record.ent}" if record.ent is not None else "NO_ENT"
+    match = ENT_NUMBER.match(filename)
+    return f"ENT{match.group(1)}" if match else "NO_ENT"
+
+
+def plan_classification(filenames, flux_names, notice_names, q_dir=Q_DIR, m_dir=M_DIR, no_match_dir=NO_MATCH_DIR,
+                        resolver=None, reporting_date=None):
+    """
+    Calcule le classement d'une liste de noms de fichiers, sans toucher au disque.
+
+    La date de reporting du lot est la date la plus récente du premier fichier valide
+    d'un flux connu (ou ``reporting_date`` si elle est imposée, par exemple par le
+    coordinateur d'un traitement réparti) ; les fichiers d'une autre date partent dans NO_MATCH.
+    Avec un ``resolver`` (flux_resolver.FluxResolver), chaque entrée porte aussi
+    ``spec_flux``, le flux du cahier des charges résolu depuis le bloc flux analysé.
+
+    Returns:
+        dict: ``reporting_date`` et ``files``, une entrée par nom (dans l'ordre reçu) avec
+        filename, status, reason, failed_part, destination, ent, flux et period
+        (et failed_offset si le nom ne respecte pas le format).
+    """
+    flux_names, notice_names = set(flux_names), set(notice_names)
+    entries = []
+
+    for filename in filenames:
+        record, failure = parse_filename(filename)
+        entry = {"filename": filename, "status": "Failed", "reason": "", "failed_part": "",
+                 "destination": os.path.join(no_match_dir, filename), "ent": ent_folder(filename, record),
+                 "flux": record and record.flux, "period": record and record.period}
+        if resolver is not None:
+            entry["spec_flux"] = resolver.lookup(record.flux) if record else None
+        entries.append(entry)
+
+        if failure:
+            entry.update(reason=PATTERN_MISMATCH, failed_part=failure.segment, failed_offset=failure.offset)
+            continue
+
+        if record.flux not in flux_names or record.flux not in notice_names:
+            entry["reason"] = f"Unknown flux '{record.flux}'."
+            continue
+
+        latest_date = max(record.dates)
+        if reporting_date is None:
+            reporting_date = latest_date
+        elif latest_date != reporting_date:
+            entry["reason"] = f"Different date '{latest_date}', expected '{reporting_date}'."
+            continue
+
+        entry.update(status="Passed", reason=CLASSIFIED,
+                     destination=os.path.join(q_dir if record.period == "Q" else m_dir, entry["ent"], filename))
+
+    return {"reporting_date": reporting_date, "files": entries}
+
+
+def apply_plan(plan, source_dir=TEST_DIR, on_moved=None, registry=None):
+    """
+    Exécute un plan de classement : déplace chaque fichier vers sa destination.
+
+    Args:
+        on_moved (callable): appelé avec chaque entrée une fois le fichier déplacé.
+        registry (MetricsRegistry): registre des mesures (REGISTRY par défaut).
+
+    Returns:
+        list: résultats au format historique (filename, status, reason, failed_part).
+    """
+    registry = registry or REGISTRY
+    results = []
+    for entry in plan["files"]:
+        registry.record_classification(entry)
+        with registry.timed("move", flux=entry["flux"], ent=entry["ent"]):
+            os.makedirs(os.path.dirname(entry["destination"]), exist_ok=True)
+            shutil.move(os.path.join(source_dir, entry["filename"]), entry["destination"])
+        if on_moved is not None:
+            on_moved(entry)
+        result = {key: entry[key] for key in ("filename", "status", "reason", "failed_part")}
+        if "failed_offset" in entry:
+            result["failed_offset"] = entry["failed_offset"]
+        results.append(result)
+    return results
@@ -0,0 +1,56 @@
+import pytest
+import pandas as pd
+
+# Cahier des charges minimal : une feuille par flux (entêtes à partir de la 5ᵉ ligne) + la Notice
+SPEC_FLUX_COLUMNS = {
+    "CONTRATSCOLLECTIFS": [
+        ("NUM_CONTRAT", "Oui", "Alphanumérique", 10),
+        ("DATE_EFFET", "Oui", "Date aaaammjj", 8),
+        ("MONTANT", "Non", "Numérique", 12),
+    ],
+    "REFERENTIEL_GROUPES": [
+        ("CODE_GROUPE", "Oui", "Alphanumérique", 5),
+        ("LIBELLE", "Non", "Alphanumérique", 30),
+    ],
+}
+
+
+def write_spec_workbook(path, flux_columns=SPEC_FLUX_COLUMNS):
+    """Écrit un cahier des charges au format attendu par mapping.py et Notice_ext.py."""
+    with pd.ExcelWriter(path) as writer:
+        for flux, columns in flux_columns.items():
+            rows = [[None] * 7 for _ in range(4)]
+            rows += [[None, None, name, mandatory, None, data_type, length] for name, mandatory, data_type, length in columns]
+            pd.DataFrame(rows, columns=[f"C{i}" for i in range(7)]).to_excel(writer, sheet_name=flux, index=False)
+
+        notice = [[None, None] for _ in range(11)]
+        notice += [[None, "Client_N°Flux_MOD1_CONTRATCOLLECTIF_STOCK_FREQUENCE_AAAAMMJJ.csv"]]
+        notice += [[None, "Client_N°Flux_REFERENTIEL_GROUPE_FREQUENCE_AAAAMMJJ.csv"]]
+        pd.DataFrame(notice, columns=["A", "B"]).to_excel(writer, sheet_name="Notice", index=False)
+    return path
+
+
+@pytest.fixture
+def spec_workbook(tmp_path):
+    return str(write_spec_workbook(tmp_path / "cahier.xlsx"))
+
+
+@pytest.fixture
+def spec(spec_workbook, tmp_path):
+    """Spec compilée du cahier des charges minimal (cache dans tmp_path)."""
+    from spec_cache import load_spec
+    return load_spec(spec_workbook, cache_dir=str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def drop(tmp_path):
+    """Dossier de dépôt vide."""
+    path = tmp_path / "drop"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def pipeline_dirs(tmp_path):
+    """Dossiers de classement et de rapport, à passer à process_files / process_drop."""
+    return {name: str(tmp_path / name) for name in ("q_dir", "m_dir", "no_match_dir", "report_dir")}
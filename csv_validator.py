@@ -0,0 +1,344 @@
+import os
+import logging
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from metrics import NULL_TIMER, stage_timer
+from profiling import profile_call
+from spec_cache import file_fingerprint
+
+# pandas (et les contrôles vectorisés de type_kernels) ne sont importés qu'à la première
+# lecture d'un fichier : importer app ou le pipeline reste rapide
+# 🔹 Lecture des fichiers flux
+CSV_SEP = ";"
+CSV_ENCODING = "utf-8"
+# Moteurs de lecture : pandas (chaînes object) ou Arrow (lecteur CSV pyarrow, colonnes string[pyarrow])
+ENGINES = ("pandas", "arrow")
+DEFAULT_ENGINE = "pandas"
+# Valeurs lues comme vides : liste par défaut de pandas, imposée aussi au lecteur Arrow
+CSV_NULL_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+# 🔹 Plafond mémoire : au-delà, le fichier est validé par blocs de lignes
+DEFAULT_MEMORY_LIMIT_MB = 512
+# Estimation de l'occupation mémoire pandas (chaînes object) par octet de CSV
+MEMORY_OVERHEAD_FACTOR = 10
+MIN_CHUNK_ROWS = 1000
+SAMPLE_BYTES = 1024 * 1024
+
+# 🔹 Validation multi-fichiers : nombre de processus par défaut (None = tous les cœurs)
+DEFAULT_WORKERS = 1
+
+# Version des règles de validation : à incrémenter dès qu'un changement modifie des verdicts,
+# pour que les verdicts gardés dans le manifeste (voir manifest.py) soient recalculés
+RULES_VERSION = 1
+
+# Nombre maximal de valeurs et de lignes problématiques conservées par colonne pour le rapport
+MAX_REPORTED_VALUES = 20
+
+
+def estimate_row_bytes(file_path):
+    """Estime la taille moyenne d'une ligne du CSV à partir de son premier Mo."""
+    with open(file_path, "rb") as f:
+        sample = f.read(SAMPLE_BYTES)
+    line_count = max(sample.count(b"\n"), 1)
+    return max(len(sample) / line_count, 1)
+
+
+def estimate_chunksize(file_path, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, column_ratio=1.0):
+    """Estime le nombre de lignes par bloc pour rester sous le plafond mémoire."""
+    bytes_per_row = max(estimate_row_bytes(file_path) * column_ratio, 1)
+    rows = int(memory_limit_mb * 1024 * 1024 / (bytes_per_row * MEMORY_OVERHEAD_FACTOR))
+    return max(rows, MIN_CHUNK_ROWS)
+
+
+def check_engine(engine):
+    """Vérifie que le moteur de lecture demandé existe et que ses dépendances sont installées."""
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur de lecture inconnu : {engine!r} (attendu : {', '.join(ENGINES)})")
+    if engine == "arrow":
+        try:
+            import pyarrow.csv  # noqa: F401
+        except ImportError as e:
+            raise ValueError("Le moteur 'arrow' nécessite pyarrow (pip install pyarrow).") from e
+
+
+def needs_streaming(file_path, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, column_ratio=1.0):
+    """Indique si le chargement complet du fichier dépasserait le plafond mémoire."""
+    estimated_bytes = os.path.getsize(file_path) * column_ratio * MEMORY_OVERHEAD_FACTOR
+    return estimated_bytes > memory_limit_mb * 1024 * 1024
+
+
+def read_csv_head(file_path, nrows=2):
+    """Lit uniquement l'entête (noms bruts, non nettoyés) et les ``nrows`` premières lignes du CSV."""
+    import pandas as pd
+
+    return pd.read_csv(file_path, sep=CSV_SEP, encoding=CSV_ENCODING, dtype=str, nrows=nrows)
+
+
+def read_csv_chunks(file_path, chunksize=None, usecols=None, engine=DEFAULT_ENGINE):
+    """Lit le CSV (colonnes ``usecols`` en chaînes) en un seul bloc ou par blocs de ``chunksize`` lignes."""
+    if engine == "arrow":
+        yield from _read_csv_chunks_arrow(file_path, chunksize, usecols)
+        return
+
+    import pandas as pd
+    options = {"sep": CSV_SEP, "encoding": CSV_ENCODING, "dtype": str, "usecols": usecols}
+    if chunksize is None:
+        yield pd.read_csv(file_path, **options)
+        return
+    with pd.read_csv(file_path, chunksize=chunksize, **options) as reader:
+        yield from reader
+
+
+def _read_csv_chunks_arrow(file_path, chunksize, usecols):
+    """Variante Arrow : colonnes string[pyarrow], blocs d'environ ``chunksize`` lignes."""
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    read_options = pa_csv.ReadOptions(encoding=CSV_ENCODING)
+    if chunksize is not None:
+        read_options.block_size = max(int(chunksize * estimate_row_bytes(file_path)), SAMPLE_BYTES)
+    parse_options = pa_csv.ParseOptions(delimiter=CSV_SEP)
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=usecols,
+        column_types={column: pa.string() for column in usecols or []},
+        null_values=CSV_NULL_VALUES,
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=True,
+    )
+    types_mapper = {pa.string(): pd.StringDtype("pyarrow")}.get
+
+    if chunksize is None:
+        table = pa_csv.read_csv(file_path, read_options, parse_options, convert_options)
+        yield table.to_pandas(types_mapper=types_mapper)
+        return
+
+    offset = 0
+    with pa_csv.open_csv(file_path, read_options, parse_options, convert_options) as reader:
+        for batch in reader:
+            chunk = batch.to_pandas(types_mapper=types_mapper)
+            # Index continu d'un bloc à l'autre, comme le lecteur pandas
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+
+
+def _new_column_stats():
+    return {"max_length": 0, "invalid_values": [], "invalid_count": 0, "long_rows": [], "invalid_rows": []}
+
+
+def _extend_capped(reported, values):
+    room = MAX_REPORTED_VALUES - len(reported)
+    if room > 0:
+        reported.extend([v for v in values if v not in reported][:room])
+
+
+def _update_column_stats(stats, values, rule, timer=NULL_TIMER):
+    """Met à jour les statistiques d'une colonne avec un bloc de valeurs (une passe par contrôle)."""
+    from type_kernels import TYPE_KERNELS, check_length, clean_values
+
+    values = clean_values(values)
+    if values.empty:
+        return
+
+    with timer.time("length_check"):
+        length_ok, long_rows, max_length = check_length(values, rule.max_length)
+    stats["max_length"] = max(stats["max_length"], max_length)
+    if not length_ok:
+        _extend_capped(stats["long_rows"], long_rows.tolist())
+
+    kernel = TYPE_KERNELS.get(rule.kind)
+    if kernel is None:
+        return
+    with timer.time("type_check"):
+        type_ok, invalid_rows = kernel(values)
+    if not type_ok:
+        stats["invalid_count"] += len(invalid_rows)
+        _extend_capped(stats["invalid_rows"], invalid_rows.tolist())
+        _extend_capped(stats["invalid_values"], values.loc[invalid_rows[:MAX_REPORTED_VALUES]].unique().tolist())
+
+
+def _result(file_path, flux_name, status, reason=None, **details):
+    return dict({"file_path": file_path, "flux_name": flux_name, "status": status, "reason": reason}, **details)
+
+
+def validate_csv(file_path, flux_name, plan, streaming=None,
+                 memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, chunksize=None, engine=DEFAULT_ENGINE):
+    """
+    Valide un fichier flux (colonnes obligatoires, longueurs et types) sans le déplacer.
+
+    L'entête et les deux premières lignes sont lus d'abord : un fichier d'une seule
+    ligne, d'un flux inconnu ou sans ses colonnes obligatoires est tranché sans lire
+    le reste. Seules les colonnes décrites par le cahier des charges sont ensuite
+    chargées, en entier ou, en mode streaming, par blocs bornés par ``memory_limit_mb`` :
+    les violations et longueurs maximales sont cumulées d'un bloc à l'autre, si bien
+    que le verdict est identique dans les deux modes.
+
+    Args:
+        plan (ValidationPlan | None): plan compilé du flux (voir validation_plan.py), None si le flux est inconnu.
+        streaming (bool | None): force le mode ; None le choisit selon la taille du fichier.
+        engine (str): "pandas" ou "arrow" (lecteur CSV pyarrow et calculs Arrow sur les chaînes).
+
+    Returns:
+        dict: file_path, flux_name, status ("Passed", "Failed" ou "Skipped"), reason,
+        rows, max_lengths, length_errors et type_errors ; avec l'instrumentation active
+        (voir metrics.py), ``metrics`` {"timings": {étape: secondes}, "bytes": taille lue}.
+    """
+    timer = stage_timer()
+    result = _validate_csv(file_path, flux_name, plan, streaming, memory_limit_mb, chunksize, engine, timer)
+    if timer.timings is not None:
+        size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
+        result["metrics"] = {"timings": dict(timer.timings), "bytes": size}
+    return result
+
+
+def _validate_csv(file_path, flux_name, plan, streaming, memory_limit_mb, chunksize, engine, timer):
+    try:
+        with timer.time("read_head"):
+            head = read_csv_head(file_path)
+    except Exception as e:
+        return _result(file_path, flux_name, "Failed", f"Erreur lors de la lecture -> {e}")
+    raw_columns = list(head.columns)
+    head.columns = head.columns.str.strip()
+
+    if len(head) == 1:
+        return _result(file_path, flux_name, "Passed", rows=1)
+
+    if plan is None:
+        return _result(file_path, flux_name, "Skipped", f"Flux inconnu dans le cahier des charges : {flux_name}")
+
+    missing_columns = [col for col in plan.mandatory_columns if col not in head.columns]
+    if missing_columns:
+        return _result(file_path, flux_name, "Failed", f"Colonnes manquantes pour {flux_name} -> {missing_columns}",
+                       missing_columns=missing_columns)
+
+    rules = [rule for rule in plan.rules if rule.header in head.columns]
+    column_stats = {rule.header: _new_column_stats() for rule in rules}
+
+    # Noms bruts des colonnes utiles : ceux du fichier peuvent contenir des espaces
+    raw_names = dict(zip(head.columns, raw_columns))
+    usecols = [raw_names[rule.header] for rule in rules]
+
+    rows = None
+    if usecols:
+        if chunksize is None:
+            column_ratio = len(usecols) / len(head.columns)
+            if streaming is None:
+                streaming = needs_streaming(file_path, memory_limit_mb, column_ratio)
+            if streaming:
+                chunksize = estimate_chunksize(file_path, memory_limit_mb, column_ratio)
+
+        rows = 0
+        try:
+            chunks = read_csv_chunks(file_path, chunksize, usecols, engine)
+            while True:
+                with timer.time("read_csv"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                chunk.columns = chunk.columns.str.strip()
+                rows += len(chunk)
+                for rule in rules:
+                    _update_column_stats(column_stats[rule.header], chunk[rule.header], rule, timer)
+        except Exception as e:
+            return _result(file_path, flux_name, "Failed", f"Erreur lors de la lecture -> {e}")
+
+    length_check_failed = []
+    type_check_failed = []
+    for rule in rules:
+        stats = column_stats[rule.header]
+        if rule.max_length is not None and stats["max_length"] > rule.max_length:
+            length_check_failed.append(f"{rule.header} (Attendu max: {rule.max_length}, Trouvé: {stats['max_length']})")
+        if stats["invalid_count"]:
+            type_check_failed.append(
+                f"{rule.header} : Attendu '{rule.expected_type}', trouvé des valeurs invalides. "
+                f"Valeurs problématiques: {stats['invalid_values']}"
+            )
+
+    details = {
+        "rows": rows,
+        "max_lengths": {header: stats["max_length"] for header, stats in column_stats.items()},
+        "length_errors": length_check_failed,
+        "type_errors": type_check_failed,
+        # Index (base 0) des lignes de données fautives, par colonne
+        "violation_rows": {
+            header: {"length": stats["long_rows"], "type": stats["invalid_rows"]}
+            for header, stats in column_stats.items()
+            if stats["long_rows"] or stats["invalid_rows"]
+        },
+    }
+    if length_check_failed or type_check_failed:
+        reason = f"Erreurs -> Longueur: {', '.join(length_check_failed)}, Type: {', '.join(type_check_failed)}"
+        return _result(file_path, flux_name, "Failed", reason, **details)
+    return _result(file_path, flux_name, "Passed", **details)
+
+
+def iter_classified_files(data_dirs):
+    """Parcourt ``data_dir/<ENT>/*.csv`` pour chaque dossier et retourne les chemins triés."""
+    file_paths = []
+    for data_dir in data_dirs:
+        if not os.path.exists(data_dir):
+            logging.warning("Le dossier %s n'existe pas.", data_dir)
+            continue
+
+        for ent_folder in os.listdir(data_dir):
+            ent_path = os.path.join(data_dir, ent_folder)
+            if not os.path.isdir(ent_path):
+                continue
+
+            for filename in os.listdir(ent_path):
+                if filename.endswith(".csv"):
+                    file_paths.append(os.path.join(ent_path, filename))
+    return sorted(file_paths)
+
+
+def _fingerprinted(validate, file_path, *args):
+    """Empreinte du fichier (voir spec_cache.file_fingerprint) prise juste avant sa validation."""
+    try:
+        fingerprint = file_fingerprint(file_path)
+    except OSError:
+        fingerprint = None
+    return dict(validate(file_path, *args), fingerprint=fingerprint)
+
+
+def validate_files(tasks, workers=DEFAULT_WORKERS, streaming=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                   engine=DEFAULT_ENGINE, progress=None, profile_dir=None, profile_min_bytes=0, fingerprint=False):
+    """
+    Valide plusieurs fichiers, en parallèle sur ``workers`` processus si demandé.
+
+    Chaque tâche est un tuple (file_path, flux_name, plan) : seul le plan de
+    validation du flux du fichier est envoyé aux processus.
+    Les résultats sont retournés triés par chemin, quel que soit l'ordre de fin des
+    processus ; les déplacements et rapports restent à la charge de l'appelant.
+    ``progress(done, total)`` est appelé après chaque fichier validé.
+    Avec ``profile_dir``, chaque fichier d'au moins ``profile_min_bytes`` octets est
+    profilé dans son processus (voir profiling.profile_call).
+    Avec ``fingerprint``, chaque résultat porte l'empreinte du fichier prise avant sa
+    lecture, dans le même processus (clé ``fingerprint``, None si le fichier a disparu).
+    """
+    tasks = sorted(tasks, key=lambda task: (task[0], task[1]))
+    check_engine(engine)
+    validate = partial(validate_csv, streaming=streaming, memory_limit_mb=memory_limit_mb, engine=engine)
+    if profile_dir is not None:
+        validate = partial(profile_call, validate, output_dir=profile_dir, min_bytes=profile_min_bytes)
+    if fingerprint:
+        validate = partial(_fingerprinted, validate)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    def collect(results):
+        collected = []
+        for result in results:
+            collected.append(result)
+            if progress is not None:
+                progress(len(collected), len(tasks))
+        return collected
+
+    if workers <= 1 or len(tasks) <= 1:
+        return collect(validate(*task) for task in tasks)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        return collect(executor.map(validate, *zip(*tasks)))
@@ -1,52 +1,37 @@
+import os
 import dash
 from dash import dcc, html, dash_table
-import pandas as pd
-import json
+from dash.dependencies import Input, Output, State
 import plotly.express as px
-from collections import Counter
-
-# Load JSON files
-no_match_path = "data/NO_MATCH/file_test_results.json"
-mandatory_failure_path = "data/Mandatory_columns_failure/test_results.json"
-
-def load_json(path):
-    try:
-        with open(path, "r", encoding="utf-8") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return []
-
-# Load JSON data into DataFrames
-no_match_results = load_json(no_match_path)
-mandatory_failure_results = load_json(mandatory_failure_path)
-
-df_no_match = pd.DataFrame(no_match_results) if no_match_results else pd.DataFrame(columns=["filename", "status", "reason"])
-df_mandatory_failure = pd.DataFrame(mandatory_failure_results) if mandatory_failure_results else pd.DataFrame(columns=["filename", "status", "reason"])
-
-# Filter failed results
-df_no_match_failed = df_no_match[df_no_match["status"] == "Failed"]
-df_mandatory_failure_failed = df_mandatory_failure[df_mandatory_failure["status"] == "Failed"]
-
-# Combine all results
-df_combined = pd.concat([df_no_match, df_mandatory_failure])
-
-# Calculate statistics
-total_tests = len(df_combined)
-passed_tests = len(df_combined[df_combined["status"] == "Passed"])
-failed_tests = len(df_combined[df_combined["status"] == "Failed"])
-pass_rate = (passed_tests / total_tests * 100) if total_tests else 0
-failure_rate = (failed_tests / total_tests * 100) if total_tests else 0
-
-# Determine most common failure reason
-failure_reasons = df_combined[df_combined["status"] == "Failed"]["reason"].dropna().tolist()
-most_common_failure, most_common_failure_count = Counter(failure_reasons).most_common(1)[0] if failure_reasons else ("N/A", 0)
-most_common_failure_percent = (most_common_failure_count / failed_tests * 100) if failed_tests else 0
-
-# Calculate statistics for each dataset
-def calculate_stats(df, name):
-    total_files = len(df)
-    passed_files = len(df[df["status"] == "Passed"])
-    failed_files = len(df[df["status"] == "Failed"])
+from results_store import ResultsStore, RESULTS_DB_PATH, CLASSIFICATION, VALIDATION
+
+# Rows sent to the browser per table page
+PAGE_SIZE = 10
+
+# Runs shown in the trend chart
+TREND_RUNS = 30
+
+# Columns shown for each dataset (all of them can be sorted server-side)
+TABLE_COLUMNS = {
+    CLASSIFICATION: ["filename", "ent", "flux", "period", "status", "reason", "failed_part"],
+    VALIDATION: ["file_path", "ent", "flux", "period", "status", "reason"],
+}
+FILTERS = [("ent", "ENT"), ("flux", "Flux"), ("period", "Period"), ("status", "Status")]
+
+TABLE_STYLE = dict(
+    style_table={"overflowX": "auto"},
+    style_cell={"textAlign": "left", "padding": "10px"},
+    style_header={"backgroundColor": "#003366", "color": "white", "fontWeight": "bold"},
+)
+
+def open_store(db_path=RESULTS_DB_PATH):
+    return ResultsStore(db_path) if os.path.exists(db_path) else None
+
+# Calculate statistics for each dataset from the per-status counts of its latest run summary
+def calculate_stats(counts, name):
+    total_files = sum(counts.values())
+    failed_files = counts.get("Failed", 0)
+    passed_files = total_files - failed_files
     pass_rate = (passed_files / total_files * 100) if total_files else 0
     failure_rate = (failed_files / total_files * 100) if total_files else 0
     return {
@@ -58,124 +43,220 @@ def calculate_stats(df, name):
         "failure_rate": failure_rate,
     }
 
-no_match_stats = calculate_stats(df_no_match, "NO_MATCH")
-mandatory_failure_stats = calculate_stats(df_mandatory_failure, "Mandatory Columns Failure")
-
-# Failure reasons distribution
-failure_reasons_distribution = Counter(failure_reasons)
-failure_reasons_df = pd.DataFrame(failure_reasons_distribution.items(), columns=["Reason", "Count"])
-failure_reasons_df["Percentage"] = (failure_reasons_df["Count"] / failed_tests * 100) if failed_tests else 0
-
-# Create pie chart for Passed vs. Failed
-pie_chart = px.pie(
-    df_combined,
-    names="status",
-    title="Proportion of Passed vs. Failed Files",
-    hole=0.3,
-    color_discrete_sequence=["darkblue", "grey"],
-)
+def load_page(store, run_id, columns, page_current, page_size, sort_by, filters, reason):
+    """One page of a run's files, filtered and sorted by the store; returns (records, page_count)."""
+    if store is None or run_id is None:
+        return [], 1
+    sort_by = [(s["column_id"], s["direction"] == "desc") for s in sort_by or []]
+    rows, total = store.query_files(run_id, filters, reason, sort_by, page_current or 0, page_size)
+    page_count = max(1, -(-total // page_size))
+    if not rows and total:
+        # Filters narrowed the result below the current page: show the last one instead
+        rows, total = store.query_files(run_id, filters, reason, sort_by, page_count - 1, page_size)
+    return [{column: row[column] for column in columns} for row in rows], page_count
+
+def filter_options(summary):
+    """Dropdown values for each filter, read from the run summary instead of the files table."""
+    if not summary:
+        return {column: [] for column, _ in FILTERS}
+    options = {column: sorted(value for value in summary[column] if value != "N/A") for column in ("ent", "flux", "period")}
+    options["status"] = sorted(summary["status"])
+    return options
+
+def trend_chart(summaries_by_dataset):
+    """Failure rate of each run, run after run, for every dataset."""
+    points = [
+        {"dataset": name, "run": summary["finished_at"], "failure_rate": summary["status"].get("Failed", 0) / summary["total"] * 100}
+        for name, summaries in summaries_by_dataset.items()
+        for summary in summaries
+        if summary["total"]
+    ]
+    return px.line(
+        points,
+        x="run" if points else None,
+        y="failure_rate" if points else None,
+        color="dataset" if points else None,
+        markers=True,
+        title="Failure Rate per Run (%)",
+        color_discrete_sequence=["darkblue", "grey"],
+    )
+
+def results_section(prefix, title, run_id, failed_count, options):
+    """Title, filters and callback-driven table for one dataset (failed files by default)."""
+    return [
+        html.H2(f"{title} - Failed Test Results", style={"color": "#003366"}),
+        html.P(f"Total Failed Test Results: {failed_count}", style={"color": "#003366", "fontSize": "16px", "fontWeight": "bold"}),
+        dcc.Store(id=f"{prefix}-run-id", data=run_id),
+        html.Div(style={"display": "flex", "gap": "10px", "marginBottom": "10px"}, children=[
+            dcc.Dropdown(
+                id=f"{prefix}-filter-{column}",
+                options=[{"label": value, "value": value} for value in options[column]],
+                value=["Failed"] if column == "status" else [],
+                multi=True,
+                placeholder=label,
+                style={"minWidth": "150px", "flex": 1},
+            )
+            for column, label in FILTERS
+        ] + [
+            dcc.Input(id=f"{prefix}-filter-reason", type="text", debounce=True, placeholder="Reason contains...",
+                      style={"flex": 2}),
+        ]),
+        dash_table.DataTable(
+            id=f"{prefix}-table",
+            columns=[{"name": col, "id": col} for col in TABLE_COLUMNS[prefix]],
+            page_current=0,
+            page_size=PAGE_SIZE,
+            page_action="custom",
+            sort_action="custom",
+            sort_mode="multi",
+            sort_by=[],
+            **TABLE_STYLE,
+        ),
+        html.Hr(),
+    ]
 
+def serve_layout():
+    """Built on every page load from the pre-aggregated run summaries (never from the files table)."""
+    store = open_store()
+    summaries = {kind: store.run_summaries(kind, TREND_RUNS) if store else [] for kind in TABLE_COLUMNS}
+    if store:
+        store.close()
+    latest = {kind: runs[-1] if runs else None for kind, runs in summaries.items()}
 
+    no_match_stats = calculate_stats(latest[CLASSIFICATION]["status"] if latest[CLASSIFICATION] else {}, "NO_MATCH")
+    mandatory_failure_stats = calculate_stats(latest[VALIDATION]["status"] if latest[VALIDATION] else {}, "Mandatory Columns Failure")
+
+    # Overall statistics
+    total_tests = no_match_stats["total_files"] + mandatory_failure_stats["total_files"]
+    failed_tests = no_match_stats["failed_files"] + mandatory_failure_stats["failed_files"]
+    passed_tests = total_tests - failed_tests
+    pass_rate = (passed_tests / total_tests * 100) if total_tests else 0
+    failure_rate = (failed_tests / total_tests * 100) if total_tests else 0
+
+    # Determine most common failure category
+    category_counts = {}
+    for summary in filter(None, latest.values()):
+        for category, count in summary["category"].items():
+            category_counts[category] = category_counts.get(category, 0) + count
+    most_common_failure, most_common_failure_count = max(category_counts.items(), key=lambda item: item[1]) if category_counts else ("N/A", 0)
+    most_common_failure_percent = (most_common_failure_count / failed_tests * 100) if failed_tests else 0
+
+    # Create pie chart for Passed vs. Failed
+    pie_chart = px.pie(
+        names=["Passed", "Failed"],
+        values=[passed_tests, failed_tests],
+        title="Proportion of Passed vs. Failed Files",
+        hole=0.3,
+        color_discrete_sequence=["darkblue", "grey"],
+    )
+
+    sections = []
+    for kind, stats in ((CLASSIFICATION, no_match_stats), (VALIDATION, mandatory_failure_stats)):
+        summary = latest[kind]
+        sections += results_section(kind, stats["name"], summary and summary["run_id"], stats["failed_files"], filter_options(summary))
+
+    return html.Div(style={"padding": "20px", "fontFamily": "Arial, sans-serif", "backgroundColor": "#f4f4f4", "textAlign": "center"},
+    children=[
+        html.Img(src="assets/Logo.jpg", style={"width": "200px", "marginBottom": "20px"}),
+        html.H1("Test Results CSV Files", style={"color": "#003366"}),
+        html.Hr(style={"borderTop": "2px solid #003366"}),
+
+        # Pie chart for Proportion of Passed vs. Failed Files
+        dcc.Graph(
+            id="pie-chart",
+            figure=pie_chart,
+            style={"marginBottom": "30px"}
+        ),
+
+        # Run-over-run trend
+        dcc.Graph(
+            id="trend-chart",
+            figure=trend_chart({no_match_stats["name"]: summaries[CLASSIFICATION],
+                                mandatory_failure_stats["name"]: summaries[VALIDATION]}),
+            style={"marginBottom": "30px"}
+        ),
+
+        # NO_MATCH and Mandatory Columns Failure sections (paged by the server)
+        *sections,
+
+        # Summary statistics table
+        html.H2(f"Summary Statistics", style={"color": "#003366"}),
+        dash_table.DataTable(
+            columns=[
+                {"name": "Metric", "id": "metric"},
+                {"name": "Value", "id": "value"}
+            ],
+            data=[
+                {"metric": "Total Tests Processed", "value": total_tests},
+                {"metric": "Passed Tests", "value": passed_tests},
+                {"metric": "Failed Tests", "value": failed_tests},
+                {"metric": "Pass Rate", "value": f"{pass_rate:.2f}%"},
+                {"metric": "Failure Rate", "value": f"{failure_rate:.2f}%"},
+                {"metric": "Most Common Failure Category", "value": most_common_failure},
+                {"metric": "Failure Percentage", "value": f"{most_common_failure_percent:.2f}%"}
+            ],
+            style_table={"marginBottom": "30px", "width": "60%", "margin": "auto"},
+            style_header={"backgroundColor": "#003366", "color": "white", "fontWeight": "bold"},
+            style_cell={"textAlign": "center", "padding": "10px"},
+        ),
+
+        # Dataset-Specific Statistics
+        html.H2(f"Dataset-Specific Statistics", style={"color": "#003366"}),
+        dash_table.DataTable(
+            columns=[
+                {"name": "Dataset", "id": "dataset"},
+                {"name": "Total Files", "id": "total_files"},
+                {"name": "Passed Files", "id": "passed_files"},
+                {"name": "Failed Files", "id": "failed_files"},
+                {"name": "Pass Rate", "id": "pass_rate"},
+                {"name": "Failure Rate", "id": "failure_rate"},
+            ],
+            data=[
+                {
+                    "dataset": stats["name"],
+                    "total_files": stats["total_files"],
+                    "passed_files": stats["passed_files"],
+                    "failed_files": stats["failed_files"],
+                    "pass_rate": f"{stats['pass_rate']:.2f}%",
+                    "failure_rate": f"{stats['failure_rate']:.2f}%",
+                }
+                for stats in (no_match_stats, mandatory_failure_stats)
+            ],
+            style_table={"marginBottom": "30px", "width": "80%", "margin": "auto"},
+            style_header={"backgroundColor": "#003366", "color": "white", "fontWeight": "bold"},
+            style_cell={"textAlign": "center", "padding": "10px"},
+        ),
+    ])
 
 # Initialize Dash app
 app = dash.Dash(__name__)
+app.layout = serve_layout
+
+# Server-side paging, sorting and filtering: only the requested page leaves the database
+def register_table_callbacks(prefix):
+    @app.callback(
+        Output(f"{prefix}-table", "data"),
+        Output(f"{prefix}-table", "page_count"),
+        Input(f"{prefix}-table", "page_current"),
+        Input(f"{prefix}-table", "page_size"),
+        Input(f"{prefix}-table", "sort_by"),
+        *[Input(f"{prefix}-filter-{column}", "value") for column, _ in FILTERS],
+        Input(f"{prefix}-filter-reason", "value"),
+        State(f"{prefix}-run-id", "data"),
+    )
+    def update_table(page_current, page_size, sort_by, *args):
+        *filter_values, reason, run_id = args
+        filters = {column: value for (column, _), value in zip(FILTERS, filter_values)}
+        store = open_store()
+        try:
+            return load_page(store, run_id, TABLE_COLUMNS[prefix], page_current, page_size, sort_by, filters, reason)
+        finally:
+            if store:
+                store.close()
 
-# Define layout
-app.layout = html.Div(style={"padding": "20px", "fontFamily": "Arial, sans-serif", "backgroundColor": "#f4f4f4", "textAlign": "center"}, 
-children=[
-    html.Img(src="assets/Logo.jpg", style={"width": "200px", "marginBottom": "20px"}),
-    html.H1("Test Results CSV Files", style={"color": "#003366"}),
-    html.Hr(style={"borderTop": "2px solid #003366"}),
-
-    # Pie chart for Proportion of Passed vs. Failed Files
-    dcc.Graph(
-        id="pie-chart",
-        figure=pie_chart,
-        style={"marginBottom": "30px"}
-    ),
-
-    # NO_MATCH Section
-    html.H2(f"{no_match_stats['name']} - Failed Test Results", style={"color": "#003366"}),
-    html.P(f"Total Failed Test Results: {len(df_no_match_failed)}", style={"color": "#003366", "fontSize": "16px", "fontWeight": "bold"}),  # Added line
-    dash_table.DataTable(
-        columns=[{"name": col, "id": col} for col in df_no_match_failed.columns],
-        data=df_no_match_failed.to_dict("records"),
-        page_size=10,
-        style_table={"overflowX": "auto"},
-        style_cell={"textAlign": "left", "padding": "10px"},
-        style_header={"backgroundColor": "#003366", "color": "white", "fontWeight": "bold"},
-    ),
-    html.Hr(),
-
-    # Mandatory Columns Failure Section
-    html.H2(f"{mandatory_failure_stats['name']} - Failed Test Results", style={"color": "#003366"}),
-    html.P(f"Total Failed Test Results: {len(df_mandatory_failure_failed)}", style={"color": "#003366", "fontSize": "16px", "fontWeight": "bold"}),  # Added line
-    dash_table.DataTable(
-        columns=[{"name": col, "id": col} for col in df_mandatory_failure_failed.columns],
-        data=df_mandatory_failure_failed.to_dict("records"),
-        page_size=10,
-        style_table={"overflowX": "auto"},
-        style_cell={"textAlign": "left", "padding": "10px"},
-        style_header={"backgroundColor": "#003366", "color": "white", "fontWeight": "bold"},
-    ),
-    html.Hr(),
-
-    # Summary statistics table
-    html.H2(f"Summary Statistics", style={"color": "#003366"}),
-    dash_table.DataTable(
-        columns=[
-            {"name": "Metric", "id": "metric"},
-            {"name": "Value", "id": "value"}
-        ],
-        data=[
-            {"metric": "Total Tests Processed", "value": total_tests},
-            {"metric": "Passed Tests", "value": passed_tests},
-            {"metric": "Failed Tests", "value": failed_tests},
-            {"metric": "Pass Rate", "value": f"{pass_rate:.2f}%"},
-            {"metric": "Failure Rate", "value": f"{failure_rate:.2f}%"},
-            {"metric": "Most Common Failure", "value": most_common_failure},
-            {"metric": "Failure Percentage", "value": f"{most_common_failure_percent:.2f}%"}
-        ],
-        style_table={"marginBottom": "30px", "width": "60%", "margin": "auto"},
-        style_header={"backgroundColor": "#003366", "color": "white", "fontWeight": "bold"},
-        style_cell={"textAlign": "center", "padding": "10px"},
-    ),
-
-    # Dataset-Specific Statistics
-    html.H2(f"Dataset-Specific Statistics", style={"color": "#003366"}),
-    dash_table.DataTable(
-        columns=[
-            {"name": "Dataset", "id": "dataset"},
-            {"name": "Total Files", "id": "total_files"},
-            {"name": "Passed Files", "id": "passed_files"},
-            {"name": "Failed Files", "id": "failed_files"},
-            {"name": "Pass Rate", "id": "pass_rate"},
-            {"name": "Failure Rate", "id": "failure_rate"},
-        ],
-        data=[
-            {
-                "dataset": no_match_stats["name"],
-                "total_files": no_match_stats["total_files"],
-                "passed_files": no_match_stats["passed_files"],
-                "failed_files": no_match_stats["failed_files"],
-                "pass_rate": f"{no_match_stats['pass_rate']:.2f}%",
-                "failure_rate": f"{no_match_stats['failure_rate']:.2f}%",
-            },
-            {
-                "dataset": mandatory_failure_stats["name"],
-                "total_files": mandatory_failure_stats["total_files"],
-                "passed_files": mandatory_failure_stats["passed_files"],
-                "failed_files": mandatory_failure_stats["failed_files"],
-                "pass_rate": f"{mandatory_failure_stats['pass_rate']:.2f}%",
-                "failure_rate": f"{mandatory_failure_stats['failure_rate']:.2f}%",
-            }
-        ],
-        style_table={"marginBottom": "30px", "width": "80%", "margin": "auto"},
-        style_header={"backgroundColor": "#003366", "color": "white", "fontWeight": "bold"},
-        style_cell={"textAlign": "center", "padding": "10px"},
-    ),
-])
+for prefix in TABLE_COLUMNS:
+    register_table_callbacks(prefix)
 
 # Run the app
 if __name__ == "__main__":
-    app.run_server(debug=True)
\ No newline at end of file
+    app.run_server(debug=True)
@@ -0,0 +1,115 @@
+import os
+import json
+import time
+from datetime import datetime
+from metrics import REGISTRY
+
+# 🔹 Rapport des fichiers refusés à la validation : un enregistrement JSON par ligne,
+# et sa version lisible (dérivée des mêmes enregistrements) à côté.
+# Un fichier par nature de passage, chacun avec une seule politique :
+# - failure_report : dernier passage de validation des fichiers classés (remplacé à chaque passage) ;
+# - pipeline_failure_report : journal des dépôts classés et validés d'un coup (lots et fragments ajoutés).
+REPORT_NAME = "failure_report"
+PIPELINE_REPORT_NAME = "pipeline_failure_report"
+REPORT_JSONL = REPORT_NAME + ".jsonl"
+REPORT_FILE = REPORT_NAME + ".txt"
+
+# Seuils de vidage du tampon en cours de passage (sinon, un seul vidage à la fin)
+DEFAULT_FLUSH_BYTES = 1024 * 1024
+DEFAULT_FLUSH_SECONDS = 10.0
+
+
+def failure_record(result, ent=None):
+    """Enregistrement du rapport pour un résultat de validate_csv en échec."""
+    return {
+        "file_path": result["file_path"],
+        "flux": result["flux_name"],
+        "ent": ent,
+        "status": result["status"],
+        "reason": result["reason"],
+        "missing_columns": result.get("missing_columns", []),
+        "length_errors": result.get("length_errors", []),
+        "type_errors": result.get("type_errors", []),
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def render_text(record):
+    """Version lisible d'un enregistrement, au format historique de failure_report.txt."""
+    return f"❌ {record['file_path']}\nRaison : {record['reason']}\n\n"
+
+
+class FailureReport:
+    """
+    Écriture tamponnée du rapport d'échecs d'un passage : ``with FailureReport(dossier) as report: report.add(...)``.
+
+    Les enregistrements sont gardés en mémoire et écrits d'un bloc (JSON Lines et texte)
+    à la fermeture, ou plus tôt dès que le tampon dépasse ``flush_bytes`` octets ou que
+    le dernier vidage date de plus de ``flush_seconds`` secondes. Les deux fichiers sont
+    ouverts une seule fois par passage, au premier vidage.
+
+    Sans ``append``, le rapport est celui du seul passage : il est remplacé, et vidé si
+    rien n'a échoué. Avec ``append``, les passages successifs s'y ajoutent. ``name``
+    choisit le rapport (voir REPORT_NAME et PIPELINE_REPORT_NAME).
+    """
+
+    def __init__(self, report_dir, append=False, flush_bytes=DEFAULT_FLUSH_BYTES,
+                 flush_seconds=DEFAULT_FLUSH_SECONDS, registry=None, name=REPORT_NAME):
+        self.report_dir = report_dir
+        self.jsonl_path = os.path.join(report_dir, name + ".jsonl")
+        self.text_path = os.path.join(report_dir, name + ".txt")
+        self.append = append
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        self.registry = registry or REGISTRY
+        self.count = 0
+        self._buffer = []
+        self._buffered_bytes = 0
+        self._last_flush = time.monotonic()
+        self._files = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def add(self, record):
+        """Ajoute un enregistrement (voir failure_record) ; vide le tampon si un seuil est atteint."""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._buffer.append((line, render_text(record)))
+        self._buffered_bytes += len(line)
+        self.count += 1
+        if self._buffered_bytes >= self.flush_bytes or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """Écrit les enregistrements en attente dans les deux fichiers."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        with self.registry.timed("report"):
+            jsonl_file, text_file = self._open()
+            # Un seul write par fichier et par vidage : en mode ajout, les passages concurrents
+            # (processus de fragments) n'entremêlent pas leurs enregistrements
+            jsonl_file.write("".join(line for line, _ in self._buffer).encode("utf-8"))
+            text_file.write("".join(text for _, text in self._buffer).encode("utf-8"))
+        self._buffer, self._buffered_bytes = [], 0
+
+    def close(self):
+        """Dernier vidage ; un rapport non cumulatif est (re)créé même vide."""
+        self.flush()
+        if self.count == 0 and not self.append:
+            self._open()
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+            self._files = None
+
+    def _open(self):
+        if self._files is None:
+            os.makedirs(self.report_dir, exist_ok=True)
+            mode = "ab" if self.append else "wb"
+            self._files = (open(self.jsonl_path, mode, buffering=0), open(self.text_path, mode, buffering=0))
+        return self._files
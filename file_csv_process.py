@@ -1,95 +1,59 @@
 import os
-import pandas as pd
 import shutil
+import argparse
 import logging
-import re
-import json
-from mapping import extract_headers_and_types, extract_mandatory_columns, org_flux_sheets
-
-# 🔹 Configuration des logs
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+from spec_cache import load_spec
+from validation_plan import get_plan
+from flux_resolver import FluxResolver, get_resolver
+from manifest import ValidationManifest, validate_changed_files, MANIFEST_PATH
+from results_store import ResultsStore, RESULTS_DB_PATH, VALIDATION, file_location
+from profiling import RunProfile, PROFILE_MODES, PROFILE_DIR, DEFAULT_PROFILE_MIN_MB
+from failure_report import FailureReport, failure_record, REPORT_FILE
+from csv_validator import (validate_csv, iter_classified_files,
+                           DEFAULT_MEMORY_LIMIT_MB, DEFAULT_WORKERS, DEFAULT_ENGINE, ENGINES)
 
 # 🔹 Définition des dossiers
 DATA_DIRS = ["data/M_FILES", "data/Q_FILES"]
 REPORT_DIR = "data/Mandatory_columns_failure"
-os.makedirs(REPORT_DIR, exist_ok=True)
-report_file_path = os.path.join(REPORT_DIR, "failure_report.txt")
+report_file_path = os.path.join(REPORT_DIR, REPORT_FILE)
 json_report_path = os.path.join(REPORT_DIR, "test_results.json")
 
-# 🔹 Chargement du fichier Excel
+# 🔹 Cahier des charges (chargé au premier besoin depuis la spec compilée)
 excel_path = "Cahier des charges - Reporting Flux Standard - V25.1.0.xlsx"
-while not os.path.exists(excel_path):
-    excel_path = input("❌ Fichier introuvable. Veuillez entrer le chemin complet vers le fichier Excel : ")
-
-try:
-    cahier_des_charges = pd.read_excel(excel_path, sheet_name=None)
-except Exception as e:
-    logging.error("Erreur lors de la lecture du fichier Excel : %s", e)
-    exit(1)
-
-# 🔹 Extraction des colonnes obligatoires
-mandatory_columns_by_flux = {
-    sheet.strip().upper(): extract_mandatory_columns(df)
-    for sheet, df in cahier_des_charges.items()
-    if len(df.columns) >= 4
-}
+
+# 🔹 Résolution du flux à partir du nom de fichier
+def get_flux_name_from_filename(filename, flux_names):
+    """Retourne le plus long flux contenu dans le nom de fichier (insensible à la casse), sinon None."""
+    return FluxResolver.from_names(flux_names).find(filename)
 
 # 🔹 Fonction de validation
-def check_mandatory_columns(file_path, flux_name, failed_files):
+def check_mandatory_columns(file_path, flux_name, failed_files, spec=None, streaming=None,
+                            memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, engine=DEFAULT_ENGINE, report=None):
+    """Valide un fichier ; un échec est déplacé et ajouté à ``report``, le rapport (FailureReport) de l'appelant."""
     logging.info("🔍 Vérification du fichier : %s", file_path)
-
-    try:
-        df = pd.read_csv(file_path, sep=";", encoding="utf-8", low_memory=False)
-        df.columns = df.columns.str.strip()
-    except Exception as e:
-        log_and_move(file_path, f"Erreur de lecture -> {e}", failed_files)
-        return  
-
-    if len(df) == 1:
-        logging.info("🆗 Fichier avec une seule ligne accepté : %s", file_path)
-        return
-
-    if flux_name not in mandatory_columns_by_flux:
-        logging.warning("⚠️ Flux inconnu : %s", flux_name)
-        return
-
-    missing_columns = [col for col in mandatory_columns_by_flux[flux_name] if col not in df.columns]
-    if missing_columns:
-        log_and_move(file_path, f"Colonnes manquantes : {missing_columns}", failed_files)
-        return
-
-    headers_types = extract_headers_and_types(cahier_des_charges[flux_name])
-    length_check_failed, type_check_failed = [], []
-
-    for header, expected_type, expected_length in headers_types:
-        if header not in df.columns:
-            continue
-
-        actual_values = df[header].astype(str).str.strip()  # Supprimer les espaces
-
-        # 🔹 Vérification de la longueur
-        if pd.notna(expected_length) and isinstance(expected_length, (int, float)):
-            max_allowed_length = 10 if expected_length == 8 else int(expected_length)
-            if any(actual_values.str.len() > max_allowed_length):
-                length_check_failed.append(f"{header} (Max: {max_allowed_length}, Trouvé: {actual_values.str.len().max()})\n")
-
-        # 🔹 Vérification du type
-        if expected_type == "Numérique":
-            if not all(actual_values.isna() | actual_values.astype(str).str.match(r'^\d+$', na=True)):
-                type_check_failed.append(f"{header} : Attendu 'Numérique', trouvé des valeurs non numériques.")
-
-        elif expected_type == "Date aaaammjj":
-            if not all(actual_values.isna() | actual_values.astype(str).str.match(r'^\d{8}$', na=True)):
-                type_check_failed.append(f"{header} : Attendu 'Date aaaammjj', format incorrect.")
-
-
-    # 🔹 Enregistrement des erreurs
-    if length_check_failed or type_check_failed:
-        log_and_move(
-            file_path,
-            f"Erreurs -> Longueur: {', '.join(length_check_failed)}, Type: {', '.join(type_check_failed)}",
-            failed_files
-        )
+    spec = spec or load_spec(excel_path)
+
+    result = validate_csv(
+        file_path,
+        flux_name,
+        get_plan(spec, flux_name),
+        streaming=streaming,
+        memory_limit_mb=memory_limit_mb,
+        engine=engine,
+    )
+    return record_result(result, failed_files, report)
+
+# 🔹 Enregistrement des erreurs
+def record_result(result, failed_files, report=None):
+    if result["status"] == "Skipped":
+        logging.warning("⚠️ Flux inconnu : %s", result["flux_name"])
+    elif result["status"] == "Failed":
+        log_and_move(result["file_path"], result["reason"], failed_files)
+        if report is not None:
+            report.add(failure_record(result, file_location(result["file_path"])[0]))
+    elif result["rows"] == 1:
+        logging.info("🆗 Fichier avec une seule ligne accepté : %s", result["file_path"])
+    return result
 
 # 🔹 Fonction pour logguer et déplacer les fichiers échoués
 def log_and_move(file_path, reason, failed_files):
@@ -97,59 +61,85 @@ def log_and_move(file_path, reason, failed_files):
     failed_files.append((file_path, reason))
     shutil.move(file_path, os.path.join(REPORT_DIR, os.path.basename(file_path)))
 
-    with open(report_file_path, "a", encoding="utf-8") as report_file:
-        report_file.write(f"❌ {file_path}\nRaison : {reason}\n\n")
-
-# 🔹 Génération des résultats JSON
-def generate_test_results(failed_files, json_path):
-    os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    
-    test_results = [{"file_path": f, "status": "Failed", "reason": r} for f, r in failed_files]
-
-    # Ajouter les fichiers valides
-    for data_dir in DATA_DIRS:
-        if os.path.exists(data_dir):
-            for ent_folder in os.listdir(data_dir):
-                ent_path = os.path.join(data_dir, ent_folder)
-                if os.path.isdir(ent_path):
-                    for filename in os.listdir(ent_path):
-                        if filename.endswith(".csv"):
-                            file_path = os.path.join(ent_path, filename)
-                            if file_path not in [f[0] for f in failed_files]:
-                                test_results.append({"file_path": file_path, "status": "Passed", "reason": None})
-
-    with open(json_path, "w", encoding="utf-8") as json_file:
-        json.dump(test_results, json_file, indent=4, ensure_ascii=False)
-    
-    logging.info("📄 Rapport JSON généré : %s", json_path)
-
 # 🔹 Traitement des fichiers
-failed_files = []
-for data_dir in DATA_DIRS:
-    if not os.path.exists(data_dir):
-        logging.warning("Le dossier %s n'existe pas.", data_dir)
-        continue
-    
-    for ent_folder in os.listdir(data_dir):
-        ent_path = os.path.join(data_dir, ent_folder)
-        if not os.path.isdir(ent_path):
-            continue
-
-        for filename in os.listdir(ent_path):
-            if filename.endswith(".csv"):
-                file_path = os.path.join(ent_path, filename)
-                flux_name = next((flux for flux in org_flux_sheets if flux in filename.upper()), filename.upper())
-                logging.info("📂 Flux détecté : %s", flux_name)
-                check_mandatory_columns(file_path, flux_name, failed_files)
-
-# 🔹 Génération des rapports
-if failed_files:
-    with open(report_file_path, "w", encoding="utf-8") as report_file:
-        for file_path, reason in failed_files:
-            report_file.write(f"❌ {file_path}\nRaison : {reason}\n\n")
-    logging.info("📑 Rapport des erreurs généré : %s", report_file_path)
-else:
-    logging.info("✅ Tous les fichiers ont passé les tests.")
-    shutil.rmtree(REPORT_DIR, ignore_errors=True)
-
-generate_test_results(failed_files, json_report_path)
+def main(argv=None):
+    global excel_path
+
+    parser = argparse.ArgumentParser(description="Vérifie les colonnes, longueurs et types des fichiers flux classés.")
+    parser.add_argument("--streaming", action="store_true", default=None, help="Valider tous les fichiers par blocs de lignes.")
+    parser.add_argument("--memory-limit-mb", type=int, default=DEFAULT_MEMORY_LIMIT_MB,
+                        help="Plafond mémoire par fichier au-delà duquel la validation passe en streaming.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="Nombre de processus de validation en parallèle (0 = tous les cœurs).")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE,
+                        help="Moteur de lecture CSV (arrow nécessite pyarrow).")
+    parser.add_argument("--full", action="store_true",
+                        help="Revalider tous les fichiers, même ceux inchangés depuis le dernier passage.")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Manifeste des fichiers déjà validés.")
+    parser.add_argument("--results-db", default=RESULTS_DB_PATH, help="Base SQLite des résultats.")
+    parser.add_argument("--export-json", action="store_true",
+                        help=f"Exporter aussi les résultats du passage dans {json_report_path}.")
+    parser.add_argument("--profile", choices=PROFILE_MODES,
+                        help="Profiler (CPU et mémoire) le passage ou chaque fichier d'au moins --profile-min-mb.")
+    parser.add_argument("--profile-min-mb", type=float, default=DEFAULT_PROFILE_MIN_MB,
+                        help="Taille minimale des fichiers profilés avec --profile file.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    os.makedirs(REPORT_DIR, exist_ok=True)
+
+    while not os.path.exists(excel_path):
+        excel_path = input("❌ Fichier introuvable. Veuillez entrer le chemin complet vers le fichier Excel : ")
+
+    try:
+        spec = load_spec(excel_path)
+    except Exception as e:
+        logging.error("Erreur lors de la lecture du fichier Excel : %s", e)
+        exit(1)
+
+    # 🔹 Profilage optionnel du passage entier ou des gros fichiers, écrit à côté du rapport
+    profiled = RunProfile(args.profile, os.path.join(REPORT_DIR, PROFILE_DIR), "validation", args.profile_min_mb)
+    with profiled:
+        # 🔹 Validation (en parallèle si --workers), déplacements et rapport dans l'ordre des chemins
+        tasks = []
+        resolver = get_resolver(spec)
+        for file_path in iter_classified_files(DATA_DIRS):
+            filename = os.path.basename(file_path)
+            flux_name = resolver.resolve(filename) or filename.upper()
+            logging.info("📂 Flux détecté : %s", flux_name)
+            tasks.append((file_path, flux_name, get_plan(spec, flux_name)))
+
+        # 🔹 Seuls les fichiers modifiés (ou validés avec une autre spec) sont revalidés
+        failed_files = []
+        manifest = ValidationManifest(args.manifest) if args.full else ValidationManifest.load(args.manifest)
+        results = validate_changed_files(tasks, manifest, spec["fingerprint"]["sha256"], workers=args.workers or None,
+                                         streaming=args.streaming, memory_limit_mb=args.memory_limit_mb,
+                                         engine=args.engine, **profiled.validate_options)
+        store = ResultsStore(args.results_db)
+        run_id = store.start_run(VALIDATION, spec["fingerprint"]["sha256"])
+        # 🔹 Rapport du passage, tamponné et écrit en une fois (remplacé à chaque passage)
+        with FailureReport(REPORT_DIR) as report:
+            for result in results:
+                profiled.collect(result)
+                record_result(result, failed_files, report)
+                store.add_validation(run_id, result)
+
+        if failed_files:
+            logging.info("📑 Rapport des erreurs généré : %s", report_file_path)
+        else:
+            logging.info("✅ Tous les fichiers ont passé les tests.")
+
+    summary = store.finish_run(run_id, profile=profiled.summary())
+    logging.info("📊 Passage %s : %d fichier(s), statuts %s, échecs par catégorie %s",
+                 run_id, summary["total"], summary["status"], summary["category"])
+    if summary.get("profile"):
+        logging.info("⏱️ Profils écrits dans %s (résumé dans le passage %s)", profiled.output_dir, run_id)
+
+    if args.export_json:
+        store.export_json(run_id, json_report_path)
+        logging.info("📄 Rapport JSON généré : %s", json_report_path)
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
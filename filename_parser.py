@@ -0,0 +1,114 @@
+import re
+from collections import namedtuple
+
+# 🔹 Nom de fichier décomposé : ENT-<n>_[MOD1_]OCIANE_RC2_<n>_<FLUX>_<Q|M>[_F]_<dates>.csv
+FilenameRecord = namedtuple("FilenameRecord", ["ent", "mod1", "rc2_number", "flux", "period", "final", "dates"])
+
+# 🔹 Échec d'analyse : position (0-based) et segment attendu à cet endroit
+ParseFailure = namedtuple("ParseFailure", ["offset", "segment"])
+
+# Libellés des segments (repris de find_failed_part)
+ENT_SEGMENT = "ENT number (optional)"
+RC2_SEGMENT = "OCIANE_RC2 with number"
+FLUX_SEGMENT = "Flux name"
+PERIOD_SEGMENT = "Period (_Q or _M)"
+FIRST_DATE_SEGMENT = "First date (YYYYMMDD or YYYYMMDDYYYYMMDD)"
+ADDITIONAL_DATES_SEGMENT = "Additional dates (_YYYYMMDD, optional)"
+EXTENSION_SEGMENT = "File extension .csv"
+
+ENT_PREFIX = "ENT-"
+MOD1_PREFIX = "MOD1_"
+RC2_PREFIX = "OCIANE_RC2_"
+EXTENSION = ".csv"
+MAX_ENT = 100
+
+# Suffixes possibles du bloc lettres/soulignés : période (+ fichier final) puis "_" avant les dates
+PERIOD_SUFFIXES = (("_Q_F_", "Q", True), ("_M_F_", "M", True), ("_Q_", "Q", False), ("_M_", "M", False))
+
+_DIGITS = re.compile(r"[0-9]*")
+_FLUX_CHARS = re.compile(r"[A-Z_]*")
+_DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def is_valid_date(date):
+    """Date aaaammjj réelle du calendrier (années bissextiles comprises)."""
+    year, month, day = int(date[:4]), int(date[4:6]), int(date[6:])
+    if year < 1 or not 1 <= month <= 12 or day < 1:
+        return False
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return day <= 29
+    return day <= _DAYS_IN_MONTH[month]
+
+
+def parse_filename(filename):
+    """
+    Analyse un nom de fichier flux de gauche à droite, en une seule passe.
+
+    Accepte les mêmes noms que FILENAME_PATTERN, avec en plus des dates vérifiées
+    (réelles) et toutes les dates additionnelles conservées.
+
+    Returns:
+        tuple: (FilenameRecord, None) si le nom est valide, sinon (None, ParseFailure)
+        indiquant la position et le segment où l'analyse s'est arrêtée.
+    """
+    pos = 0
+
+    ent = None
+    if filename.startswith(ENT_PREFIX):
+        end = _DIGITS.match(filename, 4).end()
+        number = filename[4:end]
+        if not number or number[0] == "0" or int(number) > MAX_ENT or filename[end:end + 1] != "_":
+            return None, ParseFailure(4, ENT_SEGMENT)
+        ent = int(number)
+        pos = end + 1
+
+    mod1 = filename.startswith(MOD1_PREFIX, pos)
+    if mod1:
+        pos += len(MOD1_PREFIX)
+
+    if not filename.startswith(RC2_PREFIX, pos):
+        return None, ParseFailure(pos, RC2_SEGMENT)
+    pos += len(RC2_PREFIX)
+    end = _DIGITS.match(filename, pos).end()
+    if end == pos or filename[end:end + 1] != "_":
+        return None, ParseFailure(end, RC2_SEGMENT)
+    rc2_number = int(filename[pos:end])
+    pos = end + 1
+
+    # Flux et période forment un seul bloc [A-Z_]+ suivi des chiffres de la première date
+    end = _FLUX_CHARS.match(filename, pos).end()
+    block = filename[pos:end]
+    if not block:
+        return None, ParseFailure(pos, FLUX_SEGMENT)
+    for suffix, period, final in PERIOD_SUFFIXES:
+        if block.endswith(suffix):
+            flux = block[:-len(suffix)]
+            break
+    else:
+        # Une lettre hors [A-Z_] (minuscule, accent) coupe le nom du flux ; sinon la période manque
+        return None, ParseFailure(end, FLUX_SEGMENT if filename[end:end + 1].isalpha() else PERIOD_SEGMENT)
+    if not flux:
+        return None, ParseFailure(pos, FLUX_SEGMENT)
+    pos = end
+
+    end = _DIGITS.match(filename, pos).end()
+    digits = filename[pos:end]
+    if len(digits) not in (8, 16):
+        return None, ParseFailure(pos, FIRST_DATE_SEGMENT)
+    dates = [digits[:8], digits[8:]] if len(digits) == 16 else [digits]
+    if not all(is_valid_date(date) for date in dates):
+        return None, ParseFailure(pos, FIRST_DATE_SEGMENT)
+    pos = end
+
+    while filename.startswith("_", pos):
+        end = _DIGITS.match(filename, pos + 1).end()
+        date = filename[pos + 1:end]
+        if len(date) != 8 or not is_valid_date(date):
+            return None, ParseFailure(pos + 1, ADDITIONAL_DATES_SEGMENT)
+        dates.append(date)
+        pos = end
+
+    if filename[pos:] != EXTENSION:
+        return None, ParseFailure(pos, EXTENSION_SEGMENT)
+
+    return FilenameRecord(ent, mod1, rc2_number, flux, period, final, tuple(dates)), None
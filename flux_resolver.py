@@ -0,0 +1,118 @@
+from collections import deque
+from filename_parser import parse_filename
+
+# 🔹 Feuille du cahier des charges qui ne décrit pas un flux
+NOTICE_SHEET = "NOTICE"
+
+# Résolveurs déjà construits, pour la spec courante uniquement (sha256 -> FluxResolver)
+_resolvers = {}
+
+
+def spec_key(sheet_name):
+    """Clé d'un flux dans la spec compilée (mandatory_columns_by_flux, headers_types_by_flux)."""
+    return sheet_name.strip().upper()
+
+
+class FluxResolver:
+    """
+    Résolution d'un nom de fichier vers le flux du cahier des charges.
+
+    Chaque flux est connu sous son nom de feuille et sous son nom dans les fichiers
+    (``flux_mapping``). La résolution essaie d'abord le bloc flux lu par filename_parser
+    (recherche exacte), puis cherche dans le nom entier la plus longue occurrence d'un
+    alias (automate d'Aho-Corasick) : le résultat ne dépend que du nom, en O(longueur du nom).
+    """
+
+    def __init__(self, aliases):
+        """``aliases`` : {alias: flux}, les alias sont comparés en majuscules."""
+        self.aliases = {alias.upper(): flux for alias, flux in aliases.items()}
+        self._build_automaton()
+
+    @classmethod
+    def from_names(cls, flux_names, mapping=None):
+        """Résolveur des flux ``flux_names`` et de leurs noms de fichier ``mapping`` {flux: nom dans les fichiers}."""
+        mapping = mapping or {}
+        aliases = {}
+        for flux in flux_names:
+            aliases[flux] = flux
+            if flux in mapping:
+                aliases[mapping[flux]] = flux
+        return cls(aliases)
+
+    @classmethod
+    def from_spec(cls, spec):
+        """Flux de toutes les feuilles (hors Notice), sous leur clé de spec."""
+        aliases = {}
+        for sheet in spec["flux_sheets"]:
+            flux = spec_key(sheet)
+            if flux == NOTICE_SHEET:
+                continue
+            aliases[flux] = flux
+            if sheet in spec["flux_mapping"]:
+                aliases[spec["flux_mapping"][sheet]] = flux
+        return cls(aliases)
+
+    def _build_automaton(self):
+        # Transitions, lien d'échec et alias le plus long reconnu en chaque état
+        self._goto = [{}]
+        self._fail = [0]
+        self._longest = [None]
+        for alias in self.aliases:
+            state = 0
+            for char in alias:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._longest.append(None)
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._longest[state] = alias
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0) if state else 0
+                # Un alias terminant en cet état est plus long que tout alias reconnu par son lien d'échec
+                if self._longest[child] is None:
+                    self._longest[child] = self._longest[self._fail[child]]
+
+    def lookup(self, token):
+        """Flux d'un alias exact (bloc flux d'un nom de fichier), sinon None."""
+        return self.aliases.get(token.upper())
+
+    def find(self, text):
+        """Flux de la plus longue occurrence d'un alias dans ``text`` (la plus à gauche à longueur égale), sinon None."""
+        state, best, best_start = 0, None, None
+        for position, char in enumerate(text.upper()):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            alias = self._longest[state]
+            if alias is not None:
+                start = position - len(alias) + 1
+                if best is None or len(alias) > len(best) or (len(alias) == len(best) and start < best_start):
+                    best, best_start = alias, start
+        return self.aliases[best] if best is not None else None
+
+    def resolve(self, filename):
+        """Flux d'un nom de fichier : bloc flux analysé si le nom est valide, sinon plus longue occurrence."""
+        record, _ = parse_filename(filename)
+        if record is not None:
+            flux = self.lookup(record.flux)
+            if flux is not None:
+                return flux
+        return self.find(filename)
+
+
+def get_resolver(spec):
+    """Retourne le résolveur de flux de cette spec, construit une seule fois."""
+    fingerprint = spec["fingerprint"]["sha256"]
+    if fingerprint not in _resolvers:
+        _resolvers.clear()
+        _resolvers[fingerprint] = FluxResolver.from_spec(spec)
+    return _resolvers[fingerprint]
@@ -0,0 +1,231 @@
+import os
+import json
+import argparse
+import logging
+import numpy as np
+from spec_cache import load_spec, EXCEL_PATH
+from validation_plan import get_plan
+from flux_resolver import get_resolver
+from csv_validator import CSV_SEP, CSV_ENCODING
+
+# 🔹 Génération de fichiers flux synthétiques conformes au cahier des charges
+
+# Lignes générées et écrites à la fois (la mémoire ne dépend pas de la taille du fichier)
+CHUNK_ROWS = 100_000
+
+# Échecs injectables : trois sur le nom (classement), trois sur le contenu (validation)
+NAME_FAILURES = ("bad_name", "unknown_flux", "wrong_date")
+CONTENT_FAILURES = ("missing_column", "overlong", "bad_type")
+FAILURE_KINDS = NAME_FAILURES + CONTENT_FAILURES
+
+UNKNOWN_FLUX = "FLUX_INCONNU"
+DEFAULT_REPORTING_DATE = "20241231"
+DATE_RANGE = (np.datetime64("2020-01-01"), np.datetime64("2024-12-31"))
+TEXT_LENGTH = 12
+
+
+def _digits(values, width):
+    """Entiers -> matrice (lignes, width) des codes ASCII de leurs chiffres, complétés par des zéros."""
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    return (values[:, None] // powers % 10 + ord("0")).astype(np.uint8)
+
+
+def generate_column(rule, rows, rng):
+    """
+    Valeurs valides d'une colonne (type et longueur maximale de sa règle), générées d'un bloc.
+
+    Les valeurs sont de largeur fixe (nombres complétés par des zéros, que les contrôles
+    acceptent) : la colonne est une matrice (lignes, largeur) d'octets ASCII, recopiée
+    telle quelle dans le tampon des lignes CSV.
+    """
+    max_length = rule.max_length
+    if rule.kind == "date":
+        days = DATE_RANGE[0] + rng.integers(0, int((DATE_RANGE[1] - DATE_RANGE[0]).astype(int)) + 1, rows)
+        months = days.astype("datetime64[M]")
+        year = months.astype("datetime64[Y]").astype(np.int64) + 1970
+        month = months.astype(np.int64) % 12 + 1
+        day = (days - months).astype(np.int64) + 1
+        return _digits(year * 10000 + month * 100 + day, 8)
+    if rule.kind == "integer" or (rule.kind == "numeric" and max_length is not None and max_length < 4):
+        return rng.integers(ord("0"), ord("9") + 1, (rows, min(9, max_length or 9)), dtype=np.uint8)
+    if rule.kind == "numeric":
+        width = min(9, (max_length or TEXT_LENGTH) - 3) + 3
+        column = rng.integers(ord("0"), ord("9") + 1, (rows, width), dtype=np.uint8)
+        column[:, -3] = ord(",")
+        return column
+    column = rng.integers(ord("0"), ord("9") + 1, (rows, min(max_length or TEXT_LENGTH, TEXT_LENGTH)), dtype=np.uint8)
+    column[:, 0] = ord("V")
+    return column
+
+
+def _csv_block(columns):
+    """Lignes CSV (séparateur CSV_SEP) d'un bloc de colonnes de largeur fixe, en un seul tampon d'octets."""
+    rows = columns[0].shape[0] if columns else 0
+    width = sum(column.shape[1] + 1 for column in columns)
+    block = np.full((rows, width), ord(CSV_SEP), dtype=np.uint8)
+    position = 0
+    for column in columns:
+        block[:, position:position + column.shape[1]] = column
+        position += column.shape[1] + 1
+    block[:, -1] = ord("\n")
+    return block
+
+
+def content_failure_column(plan, failure):
+    """Colonne visée par un échec de contenu, ou None si le flux ne s'y prête pas."""
+    if failure == "missing_column":
+        return next((column for column in plan.mandatory_columns if any(r.header == column for r in plan.rules)), None)
+    if failure == "overlong":
+        # Une colonne texte de préférence : la valeur trop longue n'y est pas aussi une erreur de type
+        candidates = sorted((rule for rule in plan.rules if rule.max_length is not None), key=lambda r: r.kind != "text")
+        return candidates[0].header if candidates else None
+    if failure == "bad_type":
+        return next((rule.header for rule in plan.rules if rule.kind in ("numeric", "integer", "date")), None)
+    return None
+
+
+def write_flux_csv(path, plan, rows, rng, failure=None, chunk_rows=CHUNK_ROWS):
+    """
+    Écrit un CSV du flux ``plan`` par blocs de ``chunk_rows`` lignes.
+
+    ``failure`` (missing_column, overlong, bad_type) rend le fichier invalide sur une
+    colonne ; l'échec est ignoré si le flux n'a pas de colonne qui s'y prête.
+
+    Returns:
+        str | None: l'échec effectivement injecté.
+    """
+    column = content_failure_column(plan, failure) if failure in CONTENT_FAILURES else None
+    failure = failure if column else None
+    rules = [rule for rule in plan.rules if not (failure == "missing_column" and rule.header == column)]
+    broken_row = int(rng.integers(0, rows)) if rows else None
+
+    with open(path, "wb") as f:
+        f.write((CSV_SEP.join(rule.header for rule in rules) + "\n").encode(CSV_ENCODING))
+        for start in range(0, rows, chunk_rows):
+            size = min(chunk_rows, rows - start)
+            block = _csv_block([generate_column(rule, size, rng) for rule in rules])
+            if failure in ("overlong", "bad_type") and start <= broken_row < start + size:
+                # La ligne fautive n'a plus la largeur fixe du bloc : elle est réécrite à part
+                index = broken_row - start
+                rule = next(rule for rule in rules if rule.header == column)
+                values = block[index, :-1].tobytes().decode(CSV_ENCODING).split(CSV_SEP)
+                values[rules.index(rule)] = "X" * (rule.max_length + 1) if failure == "overlong" else (
+                    "20241340" if rule.kind == "date" else "X")
+                f.write(block[:index].tobytes())
+                f.write((CSV_SEP.join(values) + "\n").encode(CSV_ENCODING))
+                f.write(block[index + 1:].tobytes())
+            else:
+                f.write(block.tobytes())
+    return failure
+
+
+def flux_filename(alias, ent=None, number=1, period="Q", date=DEFAULT_REPORTING_DATE, mod1=False):
+    """Nom de fichier conforme à FILENAME_PATTERN."""
+    prefix = (f"ENT-{ent}_" if ent else "") + ("MOD1_" if mod1 else "")
+    return f"{prefix}OCIANE_RC2_{number}_{alias}_{period}_{date}.csv"
+
+
+def generable_fluxes(spec):
+    """Noms de flux utilisables dans les fichiers (connus de la Notice) -> plan de validation du flux."""
+    resolver = get_resolver(spec)
+    fluxes = {}
+    for alias in sorted(set(spec["renamed_flux_sheets"]) & set(spec["notice_names"])):
+        flux = resolver.lookup(alias)
+        plan = get_plan(spec, flux) if flux else None
+        if plan is not None and plan.rules:
+            fluxes[alias] = plan
+    return fluxes
+
+
+def generate_corpus(spec, output_dir, files, rows, failure_rates=None, seed=0, reporting_date=DEFAULT_REPORTING_DATE,
+                    chunk_rows=CHUNK_ROWS):
+    """
+    Génère ``files`` fichiers flux dans ``output_dir`` (un dépôt prêt à classer).
+
+    ``failure_rates`` {échec: proportion} choisit l'échec injecté dans chaque fichier.
+    Le premier fichier dans l'ordre des noms fixe la date de reporting du lot : il est
+    toujours valide (ENT-100, MOD1, numéro 0, le plus petit nom possible).
+
+    Returns:
+        list: [{"filename", "flux", "rows", "failure"}] dans l'ordre de génération.
+    """
+    fluxes = generable_fluxes(spec)
+    if not fluxes:
+        raise ValueError("Aucun flux du cahier des charges n'est à la fois décrit et présent dans la Notice.")
+    failure_rates = failure_rates or {}
+    unknown = set(failure_rates) - set(FAILURE_KINDS)
+    if unknown:
+        raise ValueError(f"Échecs inconnus : {', '.join(sorted(unknown))} (attendus : {', '.join(FAILURE_KINDS)})")
+    kinds = [None] + list(failure_rates)
+    probabilities = [max(0.0, 1 - sum(failure_rates.values()))] + list(failure_rates.values())
+    probabilities = np.array(probabilities) / sum(probabilities)
+
+    rng = np.random.default_rng(seed)
+    aliases = list(fluxes)
+    wrong_date = str(int(reporting_date[:4]) - 1) + reporting_date[4:]
+    os.makedirs(output_dir, exist_ok=True)
+
+    generated = []
+    for index in range(files):
+        failure = kinds[rng.choice(len(kinds), p=probabilities)] if index else None
+        alias = aliases[rng.integers(len(aliases))]
+        ent, mod1 = (100, True) if index == 0 else (int(rng.integers(1, 101)), bool(rng.random() < 0.3))
+        filename = flux_filename(UNKNOWN_FLUX if failure == "unknown_flux" else alias, ent, index,
+                                 "Q" if rng.random() < 0.5 else "M",
+                                 wrong_date if failure == "wrong_date" else reporting_date, mod1)
+        if failure == "bad_name":
+            filename = filename.replace("OCIANE", "OCEANE")
+        injected = write_flux_csv(os.path.join(output_dir, filename), fluxes[alias], rows, rng,
+                                  failure if failure in CONTENT_FAILURES else None, chunk_rows)
+        generated.append({"filename": filename, "flux": alias, "rows": rows,
+                          "failure": failure if failure in NAME_FAILURES else injected})
+    return generated
+
+
+def parse_failure_rates(values):
+    """["overlong=0.1", ...] -> {"overlong": 0.1}."""
+    rates = {}
+    for value in values or []:
+        kind, _, rate = value.partition("=")
+        rates[kind] = float(rate)
+    return rates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des fichiers flux conformes au cahier des charges (tests de charge).")
+    parser.add_argument("--spec", default=EXCEL_PATH, help="Cahier des charges.")
+    parser.add_argument("--rows", type=int, default=100, help="Lignes par fichier.")
+    parser.add_argument("--output", help="Écrire un seul CSV (sans nom de flux imposé) à ce chemin.")
+    parser.add_argument("--flux", help="Flux du fichier unique (--output), nom utilisé dans les fichiers.")
+    parser.add_argument("--output-dir", default="data", help="Dossier de dépôt des fichiers générés.")
+    parser.add_argument("--files", type=int, default=10, help="Nombre de fichiers générés dans --output-dir.")
+    parser.add_argument("--inject", action="append", metavar="ÉCHEC=PROPORTION",
+                        help=f"Proportion de fichiers en échec, par type ({', '.join(FAILURE_KINDS)}).")
+    parser.add_argument("--reporting-date", default=DEFAULT_REPORTING_DATE)
+    parser.add_argument("--manifest", help="Écrire la liste des fichiers générés et de leurs échecs (JSON).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    spec = load_spec(args.spec)
+
+    if args.output:
+        fluxes = generable_fluxes(spec)
+        if args.flux and args.flux not in fluxes:
+            parser.error(f"flux inconnu : {args.flux} (disponibles : {', '.join(fluxes)})")
+        alias = args.flux or next(iter(fluxes))
+        write_flux_csv(args.output, fluxes[alias], args.rows, np.random.default_rng(args.seed))
+        logging.info("✅ %d ligne(s) du flux %s écrites dans %s", args.rows, alias, args.output)
+        return
+
+    generated = generate_corpus(spec, args.output_dir, args.files, args.rows, parse_failure_rates(args.inject),
+                                args.seed, args.reporting_date)
+    if args.manifest:
+        with open(args.manifest, "w", encoding="utf-8") as f:
+            json.dump(generated, f, ensure_ascii=False, indent=2)
+    failures = sum(1 for entry in generated if entry["failure"])
+    logging.info("✅ %d fichier(s) générés dans %s, dont %d en échec volontaire.", len(generated), args.output_dir, failures)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import logging
+import argparse
+import ctypes
+import ctypes.util
+from spec_registry import get_spec
+from classification import TEST_DIR
+from csv_validator import DEFAULT_MEMORY_LIMIT_MB, DEFAULT_ENGINE, ENGINES
+from results_store import RESULTS_DB_PATH
+from pipeline import process_files
+from profiling import PROFILE_MODES, DEFAULT_PROFILE_MIN_MB
+
+# 🔹 Délai sans changement de taille/mtime avant de considérer un fichier comme complet
+DEFAULT_SETTLE_SECONDS = 2.0
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Fichiers en cours de dépôt (renommés à la fin de l'écriture)
+IGNORED_SUFFIXES = (".part", ".tmp", ".crdownload")
+
+# inotify(7) : fichier fermé après écriture, ou renommé / déplacé dans le dossier
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_candidate(filename):
+    return not filename.startswith(".") and not filename.endswith(IGNORED_SUFFIXES)
+
+
+def list_inbox(inbox):
+    return {name for name in os.listdir(inbox) if is_candidate(name) and os.path.isfile(os.path.join(inbox, name))}
+
+
+class PollingWatcher:
+    """Repli portable : relit le dossier à chaque attente."""
+
+    def __init__(self, inbox):
+        self.inbox = inbox
+
+    def wait(self, timeout):
+        """Retourne (fichiers présents, fichiers signalés complets) ; ici aucun n'est garanti complet."""
+        time.sleep(timeout)
+        return list_inbox(self.inbox), set()
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux : événements IN_CLOSE_WRITE / IN_MOVED_TO via inotify (ctypes, sans dépendance)."""
+
+    def __init__(self, inbox):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(self.fd, os.fsencode(inbox), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch({inbox})")
+
+    def wait(self, timeout):
+        """Retourne (fichiers signalés, fichiers signalés complets) : ici les deux ensembles sont identiques."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        names = set()
+        while readable:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    break
+                raise
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if name and is_candidate(name):
+                    names.add(name)
+        return names, set(names)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(inbox, polling=False):
+    """inotify sous Linux, sinon (ou si demandé) scrutation périodique du dossier."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(inbox)
+        except (OSError, AttributeError) as e:
+            logging.warning("⚠️ inotify indisponible (%s), scrutation du dossier toutes les secondes.", e)
+    return PollingWatcher(inbox)
+
+
+class InboxIngestor:
+    """
+    Traite les fichiers du dossier de dépôt dès qu'ils sont complets : classement,
+    puis validation des colonnes obligatoires des fichiers classés.
+
+    Un fichier est complet quand inotify signale sa fermeture après écriture (ou son
+    renommage dans le dossier), ou, à défaut, quand sa taille et son mtime n'ont pas
+    changé depuis ``settle_seconds``.
+
+    La date de reporting est celle du premier lot qui en établit une (ou ``reporting_date``
+    si elle est imposée) : les lots suivants sont classés avec cette même date. Un lot en
+    erreur est journalisé et ses fichiers restent dans le dossier de dépôt, repris au
+    bout de ``settle_seconds`` ; la surveillance continue.
+    """
+
+    def __init__(self, inbox=TEST_DIR, settle_seconds=DEFAULT_SETTLE_SECONDS, poll_interval=DEFAULT_POLL_INTERVAL,
+                 polling=False, results_db=RESULTS_DB_PATH, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                 engine=DEFAULT_ENGINE, profile=None, profile_min_mb=DEFAULT_PROFILE_MIN_MB, reporting_date=None):
+        self.inbox = inbox
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.polling = polling
+        self.results_db = results_db
+        self.memory_limit_mb = memory_limit_mb
+        self.engine = engine
+        self.profile = profile
+        self.profile_min_mb = profile_min_mb
+        self.reporting_date = reporting_date
+        # nom -> (taille, mtime_ns, instant depuis lequel ils sont inchangés)
+        self._pending = {}
+
+    def _observe(self, names, complete=()):
+        now = time.monotonic()
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.inbox, name))
+            except FileNotFoundError:
+                self._pending.pop(name, None)
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous = self._pending.get(name)
+            if name in complete:
+                self._pending[name] = signature + (float("-inf"),)
+            elif previous is None or previous[:2] != signature:
+                self._pending[name] = signature + (now,)
+
+    def _ready(self):
+        now = time.monotonic()
+        # Les fichiers déjà observés sont revérifiés : une écriture en cours repousse leur échéance
+        self._observe([name for name, entry in self._pending.items() if entry[2] != float("-inf")])
+        ready = sorted(name for name, entry in self._pending.items() if now - entry[2] >= self.settle_seconds)
+        for name in ready:
+            del self._pending[name]
+        return ready
+
+    def process(self, filenames, spec=None):
+        """Classe et valide un lot de fichiers complets en un seul passage (voir pipeline.process_files)."""
+        outcome = process_files(filenames, spec or get_spec(), self.inbox, results_db=self.results_db,
+                                memory_limit_mb=self.memory_limit_mb, engine=self.engine,
+                                reporting_date=self.reporting_date, profile=self.profile,
+                                profile_min_mb=self.profile_min_mb)
+        if self.reporting_date is None and outcome["reporting_date"] is not None:
+            self.reporting_date = outcome["reporting_date"]
+            logging.info("📅 Date de reporting de l'ingestion : %s", self.reporting_date)
+        return outcome
+
+    def run(self, once=False):
+        """Boucle d'ingestion ; avec ``once``, s'arrête quand le dossier de dépôt est vide."""
+        watcher = open_watcher(self.inbox, self.polling)
+        logging.info("👀 Surveillance de %s (%s)", self.inbox, type(watcher).__name__)
+        try:
+            self._observe(list_inbox(self.inbox))
+            while True:
+                ready = self._ready()
+                if ready:
+                    try:
+                        self.process(ready)
+                    except Exception:
+                        logging.exception("❌ Lot de %d fichier(s) en échec, laissés dans %s.", len(ready), self.inbox)
+                        if not once:
+                            self._observe(ready)
+                if once and not self._pending:
+                    return
+                names, complete = watcher.wait(min(self.poll_interval, self.settle_seconds) if self._pending else self.poll_interval)
+                self._observe(names, complete)
+        finally:
+            watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingestion continue du dossier de dépôt (classement + validation).")
+    parser.add_argument("--inbox", default=TEST_DIR, help="Dossier de dépôt surveillé.")
+    parser.add_argument("--settle-seconds", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="Délai sans modification avant de traiter un fichier (scrutation).")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL)
+    parser.add_argument("--polling", action="store_true", help="Ne pas utiliser inotify.")
+    parser.add_argument("--once", action="store_true", help="Traiter les fichiers présents puis s'arrêter.")
+    parser.add_argument("--memory-limit-mb", type=int, default=DEFAULT_MEMORY_LIMIT_MB)
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE)
+    parser.add_argument("--reporting-date", help="Date de reporting imposée (aaaammjj), sinon celle du premier lot.")
+    parser.add_argument("--profile", choices=PROFILE_MODES, help="Profiler chaque lot ou chaque fichier volumineux.")
+    parser.add_argument("--profile-min-mb", type=float, default=DEFAULT_PROFILE_MIN_MB)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    ingestor = InboxIngestor(args.inbox, args.settle_seconds, args.poll_interval, args.polling,
+                             memory_limit_mb=args.memory_limit_mb, engine=args.engine, profile=args.profile,
+                             profile_min_mb=args.profile_min_mb, reporting_date=args.reporting_date)
+    try:
+        ingestor.run(once=args.once)
+    except KeyboardInterrupt:
+        logging.info("⏹️ Ingestion arrêtée.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import time
+import uuid
+import logging
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# 🔹 Exécution en arrière-plan des traitements longs (classement, validation)
+DEFAULT_JOB_WORKERS = 2
+DEFAULT_MAX_PENDING = 8
+# Jobs terminés conservés pour consultation (les plus anciens sont oubliés)
+MAX_FINISHED_JOBS = 100
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class QueueFull(Exception):
+    """Trop de jobs en attente ou en cours : la soumission est refusée."""
+
+
+class Job:
+    """Un traitement soumis : statut, compteurs d'avancement et résultat final."""
+
+    def __init__(self, kind, params=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+
+    def progress(self, done, total=None):
+        """Rappel transmis au traitement : ``done`` fichiers traités sur ``total``."""
+        self.done = done
+        if total is not None:
+            self.total = total
+
+    def to_dict(self, with_result=True):
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        job = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "progress": {
+                "done": self.done,
+                "total": self.total,
+                "files_per_s": round(self.done / elapsed, 2) if elapsed else None,
+            },
+            "error": self.error,
+        }
+        if with_result:
+            job["result"] = self.result
+        return job
+
+
+class JobQueue:
+    """
+    File bornée de jobs exécutés par un pool de threads.
+
+    Au plus ``max_pending`` jobs peuvent être en attente ou en cours : au-delà,
+    ``submit`` lève QueueFull plutôt que de surcharger la machine. Deux jobs d'un même
+    type (qui déplacent les mêmes fichiers) ne s'exécutent jamais en même temps : le
+    suivant attend dans la file de son type, sans occuper de thread du pool, qui reste
+    disponible pour les autres types.
+    """
+
+    def __init__(self, workers=DEFAULT_JOB_WORKERS, max_pending=DEFAULT_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Jobs en attente par type, et types dont un job occupe le pool
+        self._waiting = defaultdict(deque)
+        self._running_kinds = set()
+        self._executor = None
+
+    def submit(self, kind, fn, *args, params=None, **kwargs):
+        """Met ``fn(*args, progress=job.progress, **kwargs)`` en file et retourne le Job."""
+        job = Job(kind, params)
+        with self._lock:
+            active = sum(1 for other in self._jobs.values() if other.status in (QUEUED, RUNNING))
+            if active >= self.max_pending:
+                raise QueueFull(f"{active} job(s) déjà en attente ou en cours (maximum {self.max_pending}).")
+            self._forget_finished()
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            if job.kind in self._running_kinds:
+                self._waiting[job.kind].append((job, fn, args, kwargs))
+                return job
+            self._running_kinds.add(job.kind)
+            self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn(*args, progress=job.progress, **kwargs)
+            job.status = SUCCEEDED
+        except Exception as e:
+            logging.exception("❌ Job %s (%s) en échec", job.id, job.kind)
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            self._next(job.kind)
+
+    def _next(self, kind):
+        """Passe au pool le job suivant du même type, s'il y en a un."""
+        with self._lock:
+            waiting = self._waiting[kind]
+            if not waiting:
+                self._running_kinds.discard(kind)
+                return
+            job, fn, args, kwargs = waiting.popleft()
+            try:
+                if self._executor is None:
+                    raise RuntimeError("executor arrêté")
+                self._executor.submit(self._run, job, fn, args, kwargs)
+            except RuntimeError:
+                # File arrêtée entre-temps : les jobs encore en attente ne seront pas lancés
+                for skipped in [job] + [pending[0] for pending in waiting]:
+                    skipped.error = "File de jobs arrêtée avant le lancement du job."
+                    skipped.status = FAILED
+                    skipped.finished_at = time.time()
+                waiting.clear()
+                self._running_kinds.discard(kind)
+
+    def _forget_finished(self):
+        finished = [job for job in self._jobs.values() if job.status in (SUCCEEDED, FAILED)]
+        for job in sorted(finished, key=lambda job: job.finished_at)[:max(0, len(finished) - MAX_FINISHED_JOBS + 1)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def list(self):
+        """Jobs connus, du plus récent au plus ancien."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,119 @@
+import os
+import json
+import logging
+from spec_cache import file_fingerprint
+from csv_validator import validate_files, RULES_VERSION
+
+# 🔹 Manifeste des fichiers déjà validés (hors de data/, que classify_files parcourt)
+MANIFEST_PATH = os.path.join(".validation_cache", "manifest.json")
+MANIFEST_FORMAT_VERSION = 2
+
+
+class ValidationManifest:
+    """
+    Verdicts des validations précédentes, indexés par chemin de fichier.
+
+    Une entrée est réutilisée si le fichier n'a pas changé (taille + mtime, sinon sha256
+    du contenu) et si elle a été produite avec la même spec (sha256 du cahier des charges).
+    Un manifeste écrit avec d'autres règles (csv_validator.RULES_VERSION) est ignoré en entier.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.entries = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path=MANIFEST_PATH):
+        manifest = cls(path)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return manifest
+        if data.get("version") == MANIFEST_FORMAT_VERSION and data.get("rules") == RULES_VERSION:
+            manifest.entries = data.get("files", {})
+        return manifest
+
+    def lookup(self, file_path, flux_name, spec_fingerprint):
+        """Retourne le verdict enregistré si le fichier et la spec sont inchangés, sinon None."""
+        entry = self.entries.get(file_path)
+        if entry is None or entry["spec"] != spec_fingerprint or entry["result"]["flux_name"] != flux_name:
+            return None
+
+        try:
+            stat_fingerprint = file_fingerprint(file_path, with_hash=False)
+        except OSError:
+            return None
+        if stat_fingerprint["size"] != entry["size"]:
+            return None
+        if stat_fingerprint["mtime_ns"] != entry["mtime_ns"]:
+            # Fichier touché ou recopié : seul le contenu fait foi
+            if file_fingerprint(file_path)["sha256"] != entry["sha256"]:
+                return None
+            entry["mtime_ns"] = stat_fingerprint["mtime_ns"]
+            self._dirty = True
+
+        return dict(entry["result"], cached=True)
+
+    def record(self, result, spec_fingerprint, fingerprint):
+        """
+        Enregistre le verdict d'un fichier qui vient d'être validé, avec l'empreinte prise
+        avant sa lecture : un fichier modifié pendant la validation ne correspondra plus
+        à cette empreinte et sera revalidé au passage suivant.
+        """
+        # Les mesures et profils ne valent que pour le passage qui a lu le fichier
+        result = {key: value for key, value in result.items() if key not in ("metrics", "profile")}
+        self.entries[result["file_path"]] = dict(fingerprint, spec=spec_fingerprint, result=result)
+        self._dirty = True
+
+    def retain(self, file_paths):
+        """Oublie les fichiers qui ne font plus partie des dossiers validés (déplacés ou supprimés)."""
+        file_paths = set(file_paths)
+        for file_path in [path for path in self.entries if path not in file_paths]:
+            del self.entries[file_path]
+            self._dirty = True
+
+    def save(self):
+        """Écrit le manifeste de façon atomique, seulement s'il a changé."""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_FORMAT_VERSION, "rules": RULES_VERSION, "files": self.entries}, f,
+                      ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def validate_changed_files(tasks, manifest, spec_fingerprint, progress=None, **options):
+    """
+    Comme ``validate_files``, mais ne revalide que les fichiers modifiés depuis le dernier
+    passage (ou validés avec une autre spec) ; les autres reprennent leur verdict enregistré,
+    marqué ``cached=True``. Les résultats restent triés par chemin.
+    """
+    tasks = list(tasks)
+    manifest.retain(file_path for file_path, _, _ in tasks)
+
+    cached, pending = [], []
+    for task in tasks:
+        result = manifest.lookup(task[0], task[1], spec_fingerprint)
+        if result is None:
+            pending.append(task)
+        else:
+            cached.append(result)
+    logging.info("♻️ %d fichier(s) inchangé(s) repris du manifeste, %d à valider.", len(cached), len(pending))
+
+    if progress is not None:
+        progress(len(cached), len(tasks))
+        options["progress"] = lambda done, total: progress(len(cached) + done, len(tasks))
+    results = validate_files(pending, fingerprint=True, **options)
+    for result in results:
+        fingerprint = result.pop("fingerprint")
+        # Les fichiers en échec sont déplacés hors des dossiers validés : inutile de les retenir
+        if result["status"] != "Failed" and fingerprint is not None:
+            manifest.record(result, spec_fingerprint, fingerprint)
+    manifest.save()
+
+    return sorted(cached + results, key=lambda result: (result["file_path"], result["flux_name"]))
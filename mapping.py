@@ -1,13 +1,9 @@
-import os
 import pandas as pd
 import json
 import re  
 
-# Vérifier si le fichier existe avant de continuer
+# Cahier des charges (lu une seule fois puis servi depuis le cache compilé, voir spec_cache.py)
 file_path = "Cahier des charges - Reporting Flux Standard - V25.1.0.xlsx"
-if not os.path.exists(file_path):
-    print(f"❌ Erreur : Le fichier '{file_path}' n'existe pas.")
-    exit()
 
 def extract_flux_sheet_names(sheets):
     """Retourne une liste de tous les noms de feuilles."""
@@ -24,46 +20,29 @@ flux_mapping = {
        
 }
 
-reverse_flux_mapping = {
-   
-    "CONTRATCOLLECTIF_STOCK": "CONTRATSCOLLECTIFS",
-    "ADHESIONSINDIVIDUELLES_STOCK": "ADHESIONSINDIVIDUELLES",
-    "FORMULES_REMBOURSEMENTS": "REFERENTIEL_FORMULE_REMB",
-    "REFERENTIEL_GROUPE": "REFERENTIEL_GROUPES",
-    "DECLARATION_HONORAIRES": "HONORAIRES",
-    "BENEFICIAIRE_EXTERNE":"BENEXT"
-       
-}
-
-
-
-# Charger toutes les feuilles du fichier Excel dans un dictionnaire de DataFrames
-sheets = pd.read_excel(file_path, sheet_name=None)
-
-# Extraire les noms des feuilles pertinentes
-flux_sheets = extract_flux_sheet_names(sheets)
+# Nom dans les fichiers -> feuille : dérivé de flux_mapping, seule table maintenue (voir flux_resolver.py)
+reverse_flux_mapping = {renamed: flux for flux, renamed in flux_mapping.items()}
 
-# Appliquer le mapping pour renommer les flux
-renamed_flux_sheets = {flux_mapping.get(flux, flux) for flux in flux_sheets}
 
-#reverse to org
-org_flux_sheets = {reverse_flux_mapping.get(flux, flux) for flux in flux_sheets}
-
-
-# Afficher le résultat
-#print("\n📌 Flux Sheets (avant mapping) :", flux_sheets)
-#print("\n🔄 Mapping des flux :", flux_mapping)
-print("\n✅ Flux après mapping :", renamed_flux_sheets)
-print("\n📌 org des flux :", org_flux_sheets)
 
+# Valeurs dérivées du cahier des charges, calculées au premier accès depuis la spec compilée
+_SPEC_ATTRIBUTES = {
+    "flux_sheets": lambda spec: spec["flux_sheets"],
+    "renamed_flux_sheets": lambda spec: set(spec["renamed_flux_sheets"]),
+    "org_flux_sheets": lambda spec: set(spec["org_flux_sheets"]),
+    "filtered_mapping": lambda spec: spec["flux_mapping"],
+}
 
 
-# Filtrer uniquement les flux qui existent dans le mapping
-filtered_mapping = {flux: flux_mapping[flux] for flux in flux_sheets if flux in flux_mapping}
+def __getattr__(name):
+    """Charge paresseusement les flux du cahier des charges (``from mapping import org_flux_sheets``)."""
+    if name not in _SPEC_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from spec_cache import load_spec
 
-# Affichage formaté des flux filtrés
-#print("\n📌 Mapping des flux correspondants :")
-#print(json.dumps(filtered_mapping, indent=4, ensure_ascii=False))
+    value = _SPEC_ATTRIBUTES[name](load_spec(file_path))
+    globals()[name] = value
+    return value
 
 
 
@@ -135,18 +114,6 @@ def extract_headers_and_types(df):
 
 
 
-# Vérifier si la feuille "ENCAISSEMENTS" existe avant de la traiter
-if "DECLARATION_HONORAIRES" in sheets:
-    df = sheets["DECLARATION_HONORAIRES"]
-    header = extract_headers_and_types(df)
-    C_column = get_entete_csv(df)
-    mandatory_cols = extract_mandatory_columns(df)
-    print("\n✅ Colonnes entete type :", header)
-    print("\n✅ Colonnes entete extraites :", C_column)
-    print("\n✅ Colonnes obligatoires extraites :", mandatory_cols)
-else:
-    print("⚠️ La feuille 'ENCAISSEMENTS' n'existe pas dans le fichier Excel.")
-
 def load_naming_constraints(notices_file, sheet_name="Notice"):
     """Charge les contraintes de nommage depuis la feuille 'Notice'."""
     try:
@@ -169,3 +136,19 @@ def load_naming_constraints(notices_file, sheet_name="Notice"):
         print(f"❌ Erreur : Le fichier '{notices_file}' n'existe pas.")
         return {}
 
+
+if __name__ == "__main__":
+    from spec_cache import load_spec
+
+    spec = load_spec(file_path)
+    print("\n✅ Flux après mapping :", set(spec["renamed_flux_sheets"]))
+    print("\n📌 org des flux :", set(spec["org_flux_sheets"]))
+
+    # Vérifier si la feuille "DECLARATION_HONORAIRES" existe avant de la traiter
+    if "DECLARATION_HONORAIRES" in spec["headers_types_by_flux"]:
+        header = spec["headers_types_by_flux"]["DECLARATION_HONORAIRES"]
+        print("\n✅ Colonnes entete type :", header)
+        print("\n✅ Colonnes entete extraites :", [h for h, _, _ in header])
+        print("\n✅ Colonnes obligatoires extraites :", spec["mandatory_columns_by_flux"].get("DECLARATION_HONORAIRES"))
+    else:
+        print("⚠️ La feuille 'DECLARATION_HONORAIRES' n'existe pas dans le fichier Excel.")
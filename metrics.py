@@ -0,0 +1,164 @@
+import os
+import time
+import threading
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# 🔹 Instrumentation (temps par étape, compteurs par flux et par ENT), désactivée par défaut.
+# FLUX_METRICS=1 l'active ; la variable est héritée par les processus de validation.
+METRICS_ENV = "FLUX_METRICS"
+
+# Métriques exposées : nom Prometheus -> (type, aide)
+METRICS = {
+    "flux_stage_seconds": ("summary", "Temps passé par étape (lecture, contrôles, déplacements, rapport)."),
+    "flux_files_total": ("counter", "Fichiers traités, par nature de passage et statut."),
+    "flux_bytes_read_total": ("counter", "Octets des fichiers dont le contenu a été lu."),
+    "flux_rows_scanned_total": ("counter", "Lignes de données contrôlées."),
+    "flux_violations_total": ("counter", "Colonnes en erreur, par nature (missing, length, type)."),
+}
+
+_enabled = os.environ.get(METRICS_ENV, "").lower() in ("1", "true", "yes")
+_NO_OP = nullcontext()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True):
+    """Active (ou coupe) l'instrumentation, y compris pour les processus lancés ensuite."""
+    global _enabled
+    _enabled = on
+    os.environ[METRICS_ENV] = "1" if on else "0"
+
+
+class StageTimer:
+    """Temps cumulés par étape pour un fichier : ``with timer.time("read_csv"): ...``."""
+
+    def __init__(self):
+        self.timings = defaultdict(float)
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] += time.perf_counter() - start
+
+
+class _NullTimer:
+    timings = None
+
+    def time(self, stage):
+        return _NO_OP
+
+
+NULL_TIMER = _NullTimer()
+
+
+def stage_timer():
+    """Chronomètre par étape si l'instrumentation est active, sinon un chronomètre sans effet."""
+    return StageTimer() if _enabled else NULL_TIMER
+
+
+class MetricsRegistry:
+    """
+    Compteurs et sommes de temps étiquetés, rendus au format texte Prometheus.
+
+    Un registre de passage (``parent=REGISTRY``) transmet aussi chaque mesure au registre
+    du processus : le passage garde ses propres totaux, ``/metrics`` les cumule.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        if not _enabled:
+            return
+        key = (name, tuple(sorted((label, str(v)) for label, v in labels.items() if v is not None)))
+        with self._lock:
+            self._values[key] += value
+        if self.parent is not None:
+            self.parent.inc(name, value, **labels)
+
+    def observe(self, stage, seconds, **labels):
+        self.inc("flux_stage_seconds_sum", seconds, stage=stage, **labels)
+        self.inc("flux_stage_seconds_count", 1, stage=stage, **labels)
+
+    def timed(self, stage, **labels):
+        """Contexte mesurant une étape (sans effet si l'instrumentation est coupée)."""
+        return self._timed(stage, labels) if _enabled else _NO_OP
+
+    @contextmanager
+    def _timed(self, stage, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def record_classification(self, entry):
+        self.inc("flux_files_total", kind="classification", status=entry["status"], flux=entry.get("flux"),
+                 ent=entry.get("ent"))
+
+    def record_validation(self, result, ent=None):
+        """Compteurs d'un résultat de validate_csv et temps par étape mesurés dans le processus de validation."""
+        if not _enabled:
+            return
+        labels = {"flux": result["flux_name"], "ent": ent}
+        self.inc("flux_files_total", kind="validation", status=result["status"],
+                 cached="1" if result.get("cached") else None, **labels)
+        self.inc("flux_violations_total", len(result.get("missing_columns", [])), kind="missing", **labels)
+        self.inc("flux_violations_total", len(result.get("length_errors", [])), kind="length", **labels)
+        self.inc("flux_violations_total", len(result.get("type_errors", [])), kind="type", **labels)
+        measured = result.get("metrics")
+        if measured and not result.get("cached"):
+            self.inc("flux_rows_scanned_total", result.get("rows") or 0, **labels)
+            self.inc("flux_bytes_read_total", measured["bytes"], **labels)
+            for stage, seconds in measured["timings"].items():
+                self.observe(stage, seconds, **labels)
+
+    def snapshot(self):
+        """{métrique: [{"labels": {...}, "value": v}]}, pour le résumé d'un passage."""
+        with self._lock:
+            items = sorted(self._values.items())
+        snapshot = defaultdict(list)
+        for (name, labels), value in items:
+            snapshot[name].append({"labels": dict(labels), "value": round(value, 6)})
+        return dict(snapshot)
+
+    def render(self):
+        """Format texte d'exposition Prometheus (version 0.0.4)."""
+        with self._lock:
+            items = sorted(self._values.items())
+        by_family = defaultdict(list)
+        for (name, labels), value in items:
+            family = name.rsplit("_", 1)[0] if name.endswith(("_sum", "_count")) else name
+            by_family[family].append((name, labels, value))
+
+        lines = []
+        for family, samples in by_family.items():
+            kind, help_text = METRICS.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            for name, labels, value in samples:
+                rendered = ",".join(f'{label}="{_escape(v)}"' for label, v in labels)
+                value = int(value) if value.is_integer() else value
+                lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+        return "".join(line + "\n" for line in lines)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# Registre du processus, exposé par /metrics
+REGISTRY = MetricsRegistry()
+
+
+def run_registry():
+    """Registre d'un passage, qui alimente aussi REGISTRY."""
+    return MetricsRegistry(parent=REGISTRY)
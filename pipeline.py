@@ -0,0 +1,140 @@
+import os
+import shutil
+import logging
+from validation_plan import get_plan
+from flux_resolver import get_resolver
+from classification import TEST_DIR, Q_DIR, M_DIR, NO_MATCH_DIR, plan_classification, list_drop
+from csv_validator import validate_files, DEFAULT_WORKERS, DEFAULT_MEMORY_LIMIT_MB, DEFAULT_ENGINE
+from results_store import ResultsStore, RESULTS_DB_PATH, CLASSIFICATION, VALIDATION
+from metrics import run_registry
+from profiling import RunProfile, PROFILE_DIR, DEFAULT_PROFILE_MIN_MB
+from failure_report import FailureReport, failure_record, PIPELINE_REPORT_NAME
+
+# 🔹 Dossier des fichiers classés mais en échec de validation
+REPORT_DIR = os.path.join(TEST_DIR, "Mandatory_columns_failure")
+
+
+def process_files(filenames, spec, source_dir=TEST_DIR, q_dir=Q_DIR, m_dir=M_DIR, no_match_dir=NO_MATCH_DIR,
+                  report_dir=REPORT_DIR, results_db=RESULTS_DB_PATH, progress=None, workers=DEFAULT_WORKERS,
+                  streaming=None, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB, engine=DEFAULT_ENGINE, reporting_date=None,
+                  profile=None, profile_min_mb=DEFAULT_PROFILE_MIN_MB, on_moved=None):
+    """
+    Classe et valide des fichiers déposés en un seul passage.
+
+    Chaque nom est analysé une fois (plan de classement), le flux en est déduit une fois,
+    le contenu des fichiers classés est validé là où ils ont été déposés, puis chaque
+    fichier est déplacé une seule fois : dossier ENT si tout est correct, NO_MATCH si le
+    nom est refusé, ``report_dir`` si le contenu est refusé. Les refus de contenu sont
+    ajoutés à ``report_dir/pipeline_failure_report.jsonl`` (voir failure_report.py).
+
+    Sans ``results_db``, rien n'est écrit dans le store : l'appelant enregistre lui-même
+    les entrées retournées (voir record_entries).
+
+    ``profile`` ("run" ou "file", voir profiling.RunProfile) profile le passage entier ou
+    chaque fichier d'au moins ``profile_min_mb`` Mo ; les profils sont écrits dans
+    ``report_dir/profiles`` et résumés dans les résumés des passages.
+
+    ``on_moved(entry)`` est appelé après le déplacement de chaque fichier, l'entrée étant
+    complète (``validation``, ``final_path``).
+
+    Returns:
+        dict: reporting_date, identifiants des deux passages enregistrés dans le store,
+        ``files`` (entrées du plan complétées de ``validation`` et ``final_path``),
+        ``failed_files`` [(chemin classé, raison)] des fichiers refusés à la validation,
+        ``metrics``, les mesures du passage (vide si l'instrumentation est coupée) et
+        ``profile``, le résumé du profilage (None sans profilage).
+    """
+    registry = run_registry()
+    profiled = RunProfile(profile, os.path.join(report_dir, PROFILE_DIR), "pipeline", profile_min_mb)
+    # Journal du pipeline, distinct du rapport de validation : les lots successifs
+    # (ingestion, fragments) s'y ajoutent
+    report = FailureReport(report_dir, append=True, registry=registry, name=PIPELINE_REPORT_NAME)
+    with profiled, report:
+        plan = plan_classification(filenames, spec["renamed_flux_sheets"], spec["notice_names"], q_dir, m_dir,
+                                   no_match_dir, resolver=get_resolver(spec), reporting_date=reporting_date)
+        entries = plan["files"]
+        total = len(entries)
+        if progress:
+            progress(0, total)
+
+        # Validation des fichiers classés à leur emplacement de dépôt (en parallèle si demandé)
+        tasks, classified = [], {}
+        for entry in entries:
+            if entry["status"] == "Passed":
+                flux_name = entry["spec_flux"] or entry["flux"]
+                source = os.path.join(source_dir, entry["filename"])
+                tasks.append((source, flux_name, get_plan(spec, flux_name)))
+                classified[source] = entry
+        results = validate_files(tasks, workers=workers, streaming=streaming, memory_limit_mb=memory_limit_mb,
+                                 engine=engine, progress=progress and (lambda done, _: progress(done, total)),
+                                 **profiled.validate_options)
+        for result in results:
+            entry = classified[result["file_path"]]
+            profiled.collect(result)
+            registry.record_validation(result, ent=entry["ent"])
+            # Le store range le résultat sous le chemin classé (ENT et période en sont déduits)
+            entry["validation"] = dict(result, file_path=entry["destination"])
+
+        failed_files = []
+        for entry in entries:
+            registry.record_classification(entry)
+            validation = entry.get("validation")
+            final_path = entry["destination"]
+            if validation and validation["status"] == "Failed":
+                final_path = os.path.join(report_dir, entry["filename"])
+                failed_files.append((entry["destination"], validation["reason"]))
+                report.add(failure_record(validation, entry["ent"]))
+                logging.error("❌ %s : %s", entry["filename"], validation["reason"])
+            elif validation and validation["status"] == "Skipped":
+                logging.warning("⚠️ %s", validation["reason"])
+
+            # Seul déplacement du fichier
+            with registry.timed("move", flux=entry["flux"], ent=entry["ent"]):
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                shutil.move(os.path.join(source_dir, entry["filename"]), final_path)
+            entry["final_path"] = final_path
+            if on_moved is not None:
+                on_moved(entry)
+
+    runs = {"classification_run_id": None, "validation_run_id": None, "summaries": {}}
+    if results_db:
+        with ResultsStore(results_db) as store:
+            runs = record_entries(store, spec["fingerprint"]["sha256"], entries, registry.snapshot(),
+                                  profiled.summary())
+    if progress:
+        progress(total, total)
+
+    logging.info("📦 %d fichier(s) traité(s) : %d classé(s), %d en échec de validation.",
+                 total, len(tasks), len(failed_files))
+    return dict(runs, reporting_date=plan["reporting_date"], files=entries, failed_files=failed_files,
+                metrics=registry.snapshot(), profile=profiled.summary())
+
+
+def record_entries(store, spec_sha256, entries, metrics=None, profile=None):
+    """
+    Enregistre les entrées traitées par process_files comme un passage de classement et,
+    si des fichiers ont été validés, un passage de validation. ``metrics`` (mesures du
+    traitement) et ``profile`` (résumé du profilage) sont joints au résumé de chacun.
+
+    Returns:
+        dict: classification_run_id, validation_run_id (None sans validation) et summaries.
+    """
+    classification_run = store.start_run(CLASSIFICATION, spec_sha256)
+    validated = [entry["validation"] for entry in entries if entry.get("validation")]
+    validation_run = store.start_run(VALIDATION, spec_sha256) if validated else None
+
+    for entry in entries:
+        store.add_classification(classification_run, entry, entry["destination"], ent=entry["ent"],
+                                 flux=entry["flux"], period=entry["period"])
+        if entry.get("validation"):
+            store.add_validation(validation_run, entry["validation"])
+
+    summaries = {CLASSIFICATION: store.finish_run(classification_run, metrics, profile)}
+    if validation_run is not None:
+        summaries[VALIDATION] = store.finish_run(validation_run, metrics, profile)
+    return {"classification_run_id": classification_run, "validation_run_id": validation_run, "summaries": summaries}
+
+
+def process_drop(spec, source_dir=TEST_DIR, **options):
+    """Traite en un seul passage tous les fichiers présents à la racine du dossier de dépôt."""
+    return process_files(list_drop(source_dir), spec, source_dir, **options)
@@ -0,0 +1,156 @@
+import os
+import pstats
+import cProfile
+import threading
+import tracemalloc
+from datetime import datetime
+
+# 🔹 Profilage à la demande : profil CPU (cProfile) et principaux allocateurs (tracemalloc)
+# "run" profile le passage entier, "file" chaque fichier validé au-delà d'une taille minimale
+PROFILE_MODES = ("run", "file")
+# Sous-dossier du dossier du rapport où sont écrits les profils
+PROFILE_DIR = "profiles"
+DEFAULT_PROFILE_MIN_MB = 100
+TOP_FUNCTIONS = 10
+TOP_ALLOCATIONS = 25
+
+# tracemalloc (et le pic mémoire qu'il mesure) est propre au processus : un seul profil à la fois
+_active = threading.Lock()
+
+
+class ProfileBusy(RuntimeError):
+    """Un autre profil est déjà en cours dans ce processus (par exemple un autre job)."""
+
+
+def check_profile_mode(mode):
+    """Lève ValueError si ``mode`` n'est ni None ni un mode de profilage connu."""
+    if mode is not None and mode not in PROFILE_MODES:
+        raise ValueError(f"Mode de profilage inconnu : {mode} (attendus : {', '.join(PROFILE_MODES)})")
+
+
+def hottest_functions(stats, limit=TOP_FUNCTIONS):
+    """Les ``limit`` fonctions au temps propre le plus élevé d'un pstats.Stats."""
+    rows = []
+    for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({"function": f"{os.path.basename(filename)}:{line}({name})", "calls": calls,
+                     "own_seconds": round(own, 6), "cumulative_seconds": round(cumulative, 6)})
+    return sorted(rows, key=lambda row: row["own_seconds"], reverse=True)[:limit]
+
+
+class Profile:
+    """
+    Profil CPU et mémoire d'un bloc de code : ``with Profile(dossier, nom) as profile: ...``.
+
+    À la sortie, ``<nom>.prof`` (pstats, lisible par ``python -m pstats`` ou snakeviz) et
+    ``<nom>.alloc.txt`` (principaux allocateurs encore vivants) sont écrits dans le dossier,
+    et ``summary`` décrit le profil : chemins, pic mémoire et fonctions les plus coûteuses.
+
+    Un seul profil peut être actif par processus : en ouvrir un second pendant le premier
+    lève ProfileBusy plutôt que de fausser le pic mémoire ou d'arrêter le traçage de l'autre.
+    """
+
+    def __init__(self, output_dir, name):
+        self.output_dir = output_dir
+        self.name = name
+        self.summary = None
+        self._profiler = cProfile.Profile()
+        self._owns_tracemalloc = False
+
+    def __enter__(self):
+        if not _active.acquire(blocking=False):
+            raise ProfileBusy("Un profilage est déjà en cours dans ce processus : relancer à sa fin, ou sans profil.")
+        try:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracemalloc = True
+            tracemalloc.reset_peak()
+            self._profiler.enable()
+        except BaseException:
+            _active.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self._profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+        finally:
+            _active.release()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.name)
+        self._profiler.dump_stats(base + ".prof")
+        allocators = snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+        with open(base + ".alloc.txt", "w", encoding="utf-8") as f:
+            f.write(f"Pic mémoire tracé : {peak / 1024 ** 2:.1f} Mo\n\n")
+            f.writelines(f"{statistic}\n" for statistic in allocators)
+
+        self.summary = {"name": self.name, "profile": base + ".prof", "allocations": base + ".alloc.txt",
+                        "peak_memory_mb": round(peak / 1024 ** 2, 3),
+                        "hottest": hottest_functions(pstats.Stats(self._profiler))}
+        return False
+
+
+def _stamp():
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+
+
+def profile_call(validate, file_path, *args, output_dir, min_bytes=0):
+    """
+    Appelle ``validate(file_path, *args)`` sous profilage si le fichier pèse au moins
+    ``min_bytes`` ; le résumé du profil est joint au résultat sous ``profile``.
+    """
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        size = 0
+    if size < min_bytes:
+        return validate(file_path, *args)
+    with Profile(output_dir, f"{os.path.basename(file_path)}-{_stamp()}") as profile:
+        result = validate(file_path, *args)
+    return dict(result, profile=dict(profile.summary, file_path=file_path, bytes=size))
+
+
+class RunProfile:
+    """
+    Profilage d'un passage selon ``mode`` : None (aucun), "run" (le passage entier, dans
+    ce contexte) ou "file" (chaque fichier d'au moins ``min_mb`` Mo, dans le processus qui
+    le valide, via ``validate_options``).
+    """
+
+    def __init__(self, mode, output_dir, name, min_mb=DEFAULT_PROFILE_MIN_MB):
+        check_profile_mode(mode)
+        self.mode = mode
+        self.output_dir = output_dir
+        self._profile = Profile(output_dir, f"{name}-{_stamp()}") if mode == "run" else None
+        self.validate_options = (
+            {"profile_dir": output_dir, "profile_min_bytes": int(min_mb * 1024 ** 2)} if mode == "file" else {}
+        )
+        self.files = []
+
+    def __enter__(self):
+        if self._profile is not None:
+            self._profile.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._profile is not None:
+            return self._profile.__exit__(*exc_info)
+        return False
+
+    def collect(self, result):
+        """Retient le profil joint à un résultat de validation (mode "file")."""
+        if result.get("profile"):
+            self.files.append(result["profile"])
+
+    def summary(self):
+        """Résumé à joindre au résumé du passage, ou None si rien n'a été profilé."""
+        if self._profile is not None and self._profile.summary is not None:
+            return dict(self._profile.summary, mode="run")
+        if self.files:
+            return {"mode": "file", "files": self.files}
+        return None
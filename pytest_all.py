@@ -8,8 +8,8 @@ from file_csv_process import (  # Replace 'file_csv_process' with the actual mod
     get_flux_name_from_filename,
     DATA_DIRS,
     REPORT_DIR,
-    extract_mandatory_columns,
 )
+from mapping import extract_mandatory_columns
 from test_filenames import (
     get_ent_number,
     get_ent_directory,
@@ -61,7 +61,7 @@ def test_file_movement(setup_test_files, tmp_path):
 
 # Fixture to set up test directories
 @pytest.fixture(autouse=True)
-def setup_test_directories(tmp_path):
+def setup_test_directories(tmp_path, monkeypatch):
     """
     Set up temporary directories for testing.
     """
@@ -85,6 +85,10 @@ def setup_test_directories(tmp_path):
     DATA_DIRS = [str(m_files_dir), str(q_files_dir)]
     REPORT_DIR = str(report_dir)
 
+    # Work inside tmp_path so the modules' relative data directories resolve there
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(original_report_dir, exist_ok=True)
+
     yield tmp_path
 
     # Restore original values
@@ -117,7 +121,7 @@ def test_read_excel_file(setup_test_directories):
         return df["Mandatory"].tolist()
 
     # Patch the function and verify the behavior
-    with patch("file_csv_process.extract_mandatory_columns", side_effect=mock_extract_mandatory_columns):
+    with patch("mapping.extract_mandatory_columns", side_effect=mock_extract_mandatory_columns):
         cahier_des_charges = pd.read_excel(mock_excel_path, sheet_name=None)
         mandatory_columns_by_flux = {
             sheet_name.strip().upper(): extract_mandatory_columns(df) for sheet_name, df in cahier_des_charges.items()
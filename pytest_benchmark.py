@@ -0,0 +1,26 @@
+import os
+import json
+from benchmark import run_suite, compare_to_baseline, main
+
+
+def test_benchmark_suite_reports_stages_and_regressions(tmp_path):
+    report = run_suite(["high_failure"], scale=0.02, work_dir=str(tmp_path))
+    corpus = report["corpora"]["high_failure"]
+    assert [stage["stage"] for stage in corpus["stages"]] == ["classification", "validation", "store"]
+    assert all(stage["p99_ms"] >= stage["p50_ms"] for stage in corpus["stages"])
+    assert not os.listdir(tmp_path)
+
+    baseline = json.loads(json.dumps(report))
+    assert compare_to_baseline(report, baseline) == []
+    slower = baseline["corpora"]["high_failure"]["stages"][1]
+    slower.update(seconds=1.0, files_per_s=slower["files_per_s"] * 2)
+    assert [(r["stage"], r["metric"]) for r in compare_to_baseline(report, baseline)] == [("validation", "files_per_s")]
+
+
+def test_benchmark_suite_command_runs_end_to_end(tmp_path, capsys):
+    output = tmp_path / "suite.json"
+    main(["suite", "--corpora", "high_failure", "--scale", "0.02", "--work-dir", str(tmp_path),
+          "--output", str(output)])
+    stages = json.loads(output.read_text(encoding="utf-8"))["corpora"]["high_failure"]["stages"]
+    assert all(stage["mb_per_s"] is not None for stage in stages)
+    assert capsys.readouterr().out.count("Mo/s") == 3
@@ -0,0 +1,162 @@
+import pytest
+import pandas as pd
+from csv_validator import validate_csv, estimate_chunksize
+from validation_plan import compile_plan, get_plan
+
+MANDATORY_COLUMNS = ["NUM_CONTRAT", "DATE_EFFET"]
+HEADERS_TYPES = [
+    ("NUM_CONTRAT", "Alphanumérique", 10),
+    ("DATE_EFFET", "Date aaaammjj", 8),
+    ("MONTANT", "Numérique", 12),
+]
+PLAN = compile_plan("FLUX", MANDATORY_COLUMNS, HEADERS_TYPES)
+
+
+def write_flux_csv(path, rows):
+    pd.DataFrame(rows, columns=["NUM_CONTRAT", "DATE_EFFET", "MONTANT"]).to_csv(path, sep=";", index=False)
+    return str(path)
+
+
+@pytest.fixture
+def valid_csv(tmp_path):
+    rows = [[f"C{i:05d}", "20240131", f"{i},50"] for i in range(500)]
+    return write_flux_csv(tmp_path / "valid.csv", rows)
+
+
+@pytest.fixture
+def invalid_csv(tmp_path):
+    rows = [[f"C{i:05d}", "20240131", str(i)] for i in range(500)]
+    rows[17] = ["CONTRAT_TROP_LONG", "20240131", "12"]
+    rows[250] = ["C00250", "2024-01-31", "abc"]
+    rows[499] = ["C00499", "20240131", "NULL"]
+    return write_flux_csv(tmp_path / "invalid.csv", rows)
+
+
+@pytest.mark.parametrize("chunksize", [None, 2, 7, 100])
+def test_streaming_matches_in_memory(invalid_csv, chunksize):
+    in_memory = validate_csv(invalid_csv, "FLUX", PLAN, streaming=False)
+    streamed = validate_csv(invalid_csv, "FLUX", PLAN, chunksize=chunksize)
+
+    assert streamed == in_memory
+    assert in_memory["status"] == "Failed"
+    assert in_memory["rows"] == 500
+    assert in_memory["max_lengths"]["NUM_CONTRAT"] == len("CONTRAT_TROP_LONG")
+    assert in_memory["length_errors"] == ["NUM_CONTRAT (Attendu max: 10, Trouvé: 17)"]
+    assert len(in_memory["type_errors"]) == 2
+
+
+def test_valid_file_passes_in_both_modes(valid_csv):
+    for streaming in (False, True):
+        result = validate_csv(valid_csv, "FLUX", PLAN, streaming=streaming, memory_limit_mb=1)
+        assert result["status"] == "Passed"
+        assert result["rows"] == 500
+
+
+def test_missing_columns_and_single_row(tmp_path):
+    path = tmp_path / "missing.csv"
+    pd.DataFrame({"NUM_CONTRAT": ["A", "B"]}).to_csv(path, sep=";", index=False)
+    result = validate_csv(str(path), "FLUX", PLAN, chunksize=10)
+    assert result["status"] == "Failed"
+    assert result["missing_columns"] == ["DATE_EFFET"]
+
+    # Un fichier d'une seule ligne est accepté tel quel, comme dans le chemin historique
+    pd.DataFrame({"NUM_CONTRAT": ["A"]}).to_csv(path, sep=";", index=False)
+    assert validate_csv(str(path), "FLUX", PLAN, chunksize=10)["status"] == "Passed"
+
+
+def test_unknown_flux_is_skipped(valid_csv):
+    assert validate_csv(valid_csv, "INCONNU", None)["status"] == "Skipped"
+
+
+def test_estimate_chunksize_respects_memory_limit(valid_csv):
+    assert estimate_chunksize(valid_csv, memory_limit_mb=1) < estimate_chunksize(valid_csv, memory_limit_mb=100)
+
+
+def test_header_precheck_rejects_without_reading_body(tmp_path, monkeypatch):
+    import csv_validator
+
+    path = tmp_path / "bad_header.csv"
+    path.write_text("NUM_CONTRAT;AUTRE\nA;1\nB;2\n" + "C;3\n" * 1000, encoding="utf-8")
+
+    def fail_full_read(*args, **kwargs):
+        raise AssertionError("le corps du fichier ne doit pas être lu")
+
+    monkeypatch.setattr(csv_validator, "read_csv_chunks", fail_full_read)
+    result = validate_csv(str(path), "FLUX", PLAN)
+    assert result["status"] == "Failed"
+    assert result["missing_columns"] == ["DATE_EFFET"]
+
+
+def test_only_spec_columns_are_loaded(tmp_path):
+    path = tmp_path / "extra.csv"
+    path.write_text(" NUM_CONTRAT ;DATE_EFFET;COMMENTAIRE\nA;20240101;" + "x" * 500 + "\nB;20240102;y\n", encoding="utf-8")
+    result = validate_csv(str(path), "FLUX", PLAN)
+    assert result["status"] == "Passed"
+    assert result["max_lengths"] == {"NUM_CONTRAT": 1, "DATE_EFFET": 8}
+
+
+def test_validate_files_parallel_is_deterministic(tmp_path, invalid_csv, valid_csv):
+    from csv_validator import validate_files
+
+    tasks = [
+        (valid_csv, "FLUX", PLAN),
+        (invalid_csv, "FLUX", PLAN),
+        (valid_csv, "INCONNU", None),
+    ]
+    sequential = validate_files(tasks, workers=1)
+    parallel = validate_files(list(reversed(tasks)), workers=3)
+
+    assert [r["file_path"] for r in sequential] == sorted(r["file_path"] for r in sequential)
+    assert [r["status"] for r in parallel] == [r["status"] for r in sequential]
+    assert [r["reason"] for r in parallel] == [r["reason"] for r in sequential]
+
+
+def test_plan_is_compiled_once_per_spec():
+    spec = {
+        "fingerprint": {"sha256": "abc"},
+        "mandatory_columns_by_flux": {"FLUX": MANDATORY_COLUMNS},
+        "headers_types_by_flux": {"FLUX": [list(h) for h in HEADERS_TYPES]},
+    }
+    plan = get_plan(spec, "FLUX")
+
+    assert get_plan(spec, "FLUX") is plan
+    assert get_plan(spec, "INCONNU") is None
+    assert [(r.header, r.kind, r.max_length, r.nullable) for r in plan.rules] == [
+        ("NUM_CONTRAT", "text", 10, False),
+        ("DATE_EFFET", "date", 10, False),
+        ("MONTANT", "numeric", 12, True),
+    ]
+    assert get_plan(dict(spec, fingerprint={"sha256": "def"}), "FLUX") is not plan
+
+
+def test_type_kernels_return_offending_rows():
+    from type_kernels import check_numeric, check_integer, check_date_aaaammjj, check_length
+
+    dates = pd.Series(["20240229", "20230229", "20241301", "20240431", "2024013", "2024-01-", "00010101"], dtype=str)
+    valid, rows = check_date_aaaammjj(dates)
+    assert not valid
+    assert rows.tolist() == [1, 2, 3, 4, 5]
+
+    numbers = pd.Series(["12", "-3,50", ".5", "1.", "NULL", "1e5", "12,5,3", "abc"], dtype=str)
+    assert check_numeric(numbers)[1].tolist() == [5, 6, 7]
+    assert check_integer(numbers)[1].tolist() == [1, 2, 3, 5, 6, 7]
+
+    valid, rows, max_found = check_length(pd.Series(["abc", "abcdef", ""], dtype=str), 5)
+    assert (valid, rows.tolist(), max_found) == (False, [1], 6)
+
+
+def test_violation_rows_are_reported(invalid_csv):
+    result = validate_csv(invalid_csv, "FLUX", PLAN, chunksize=50)
+    assert result["violation_rows"] == {
+        "NUM_CONTRAT": {"length": [17], "type": []},
+        "DATE_EFFET": {"length": [], "type": [250]},
+        "MONTANT": {"length": [], "type": [250]},
+    }
+
+
+@pytest.mark.parametrize("chunksize", [None, 50])
+def test_arrow_engine_matches_pandas(invalid_csv, chunksize):
+    pytest.importorskip("pyarrow")
+    pandas_result = validate_csv(invalid_csv, "FLUX", PLAN, chunksize=chunksize, engine="pandas")
+    arrow_result = validate_csv(invalid_csv, "FLUX", PLAN, chunksize=chunksize, engine="arrow")
+    assert arrow_result == pandas_result
@@ -38,3 +38,102 @@ def test_file_movement(setup_test_files, tmp_path):
     dest_dir.mkdir(parents=True, exist_ok=True)
     shutil.move(src_file, dest_dir / src_file.name)
     assert (dest_dir / src_file.name).exists()
+
+def test_parse_filename_returns_typed_record():
+    from filename_parser import parse_filename, FilenameRecord
+
+    record, failure = parse_filename("ENT-12_MOD1_OCIANE_RC2_7_REFERENTIEL_GROUPE_Q_F_2024010120240229_20240315_20240301.csv")
+    assert failure is None
+    assert record == FilenameRecord(12, True, 7, "REFERENTIEL_GROUPE", "Q", True,
+                                    ("20240101", "20240229", "20240315", "20240301"))
+    assert max(record.dates) == "20240315"
+
+@pytest.mark.parametrize("filename, offset, segment", [
+    ("ENT-101_OCIANE_RC2_1_FLUX_Q_20240101.csv", 4, "ENT number (optional)"),
+    ("ENT-1_OCEANE_RC2_1_FLUX_Q_20240101.csv", 6, "OCIANE_RC2 with number"),
+    ("OCIANE_RC2_1_Flux_Q_20240101.csv", 14, "Flux name"),
+    ("OCIANE_RC2_1_FLUX_X_20240101.csv", 20, "Period (_Q or _M)"),
+    ("OCIANE_RC2_1_FLUX_M_2024013.csv", 20, "First date (YYYYMMDD or YYYYMMDDYYYYMMDD)"),
+    ("OCIANE_RC2_1_FLUX_M_20230229.csv", 20, "First date (YYYYMMDD or YYYYMMDDYYYYMMDD)"),
+    ("OCIANE_RC2_1_FLUX_M_20240101_2024.csv", 29, "Additional dates (_YYYYMMDD, optional)"),
+    ("OCIANE_RC2_1_FLUX_M_20240101.txt", 28, "File extension .csv"),
+])
+def test_parse_filename_reports_failure_offset(filename, offset, segment):
+    from filename_parser import parse_filename
+
+    record, failure = parse_filename(filename)
+    assert record is None
+    assert (failure.offset, failure.segment) == (offset, segment)
+
+def test_parse_filename_agrees_with_pattern():
+    from filename_parser import parse_filename
+    from benchmark import synthetic_filenames
+
+    for filename in synthetic_filenames(2000, invalid_ratio=0.5):
+        record, _ = parse_filename(filename)
+        match = FILENAME_PATTERN.match(filename)
+        assert bool(record) == bool(match), filename
+        if record:
+            assert (record.flux, record.period) == match.group(1, 2)
+
+def test_plan_classification_does_not_touch_disk(tmp_path):
+    from classification import plan_classification
+
+    filenames = [
+        "ENT-3_OCIANE_RC2_1_FLUX_Q_20240131.csv",
+        "OCIANE_RC2_1_FLUX_M_20240115_20240131.csv",
+        "OCIANE_RC2_1_FLUX_M_20240229.csv",
+        "OCIANE_RC2_1_AUTRE_M_20240131.csv",
+        "notes.txt",
+    ]
+    plan = plan_classification(filenames, ["FLUX"], ["FLUX"], "Q", "M", "NO_MATCH")
+
+    assert plan["reporting_date"] == "20240131"
+    assert [(f["status"], f["destination"]) for f in plan["files"]] == [
+        ("Passed", os.path.join("Q", "ENT3", filenames[0])),
+        ("Passed", os.path.join("M", "NO_ENT", filenames[1])),
+        ("Failed", os.path.join("NO_MATCH", filenames[2])),
+        ("Failed", os.path.join("NO_MATCH", filenames[3])),
+        ("Failed", os.path.join("NO_MATCH", filenames[4])),
+    ]
+    assert plan["files"][2]["reason"] == "Different date '20240229', expected '20240131'."
+    assert plan["files"][3]["reason"] == "Unknown flux 'AUTRE'."
+    assert plan["files"][4]["failed_part"] == "OCIANE_RC2 with number"
+
+def test_apply_plan_moves_files(tmp_path):
+    from classification import plan_classification, apply_plan, list_drop
+
+    for name in ("ENT-3_OCIANE_RC2_1_FLUX_Q_20240131.csv", "bad.csv"):
+        (tmp_path / name).write_text("A;B\n")
+    (tmp_path / "Q").mkdir()
+
+    plan = plan_classification(list_drop(str(tmp_path)), ["FLUX"], ["FLUX"],
+                               str(tmp_path / "Q"), str(tmp_path / "M"), str(tmp_path / "NO_MATCH"))
+    moved = []
+    results = apply_plan(plan, str(tmp_path), on_moved=moved.append)
+
+    assert [r["status"] for r in results] == ["Passed", "Failed"]
+    assert moved == plan["files"]
+    assert all(os.path.exists(entry["destination"]) for entry in plan["files"])
+    assert list_drop(str(tmp_path)) == []
+
+
+def test_flux_resolver_prefers_parsed_token_then_longest_match():
+    from flux_resolver import FluxResolver
+
+    resolver = FluxResolver.from_names(["REFERENTIEL_GROUPES", "GROUPES", "CONTRATSCOLLECTIFS"],
+                                       {"REFERENTIEL_GROUPES": "REFERENTIEL_GROUPE",
+                                        "CONTRATSCOLLECTIFS": "CONTRATCOLLECTIF_STOCK"})
+    assert resolver.resolve("ENT-1_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv") == "CONTRATSCOLLECTIFS"
+    assert resolver.resolve("ENT-1_OCIANE_RC2_1_REFERENTIEL_GROUPE_M_20240101.csv") == "REFERENTIEL_GROUPES"
+    # Nom invalide : la plus longue occurrence l'emporte, quel que soit l'ordre des flux
+    assert resolver.find("export_referentiel_groupes.csv") == "REFERENTIEL_GROUPES"
+    assert resolver.find("GROUPES_et_CONTRATSCOLLECTIFS") == "CONTRATSCOLLECTIFS"
+    assert resolver.find("inconnu.csv") is None
+
+
+def test_reverse_flux_mapping_is_derived():
+    from mapping import flux_mapping, reverse_flux_mapping
+
+    assert reverse_flux_mapping == {renamed: flux for flux, renamed in flux_mapping.items()}
+    assert reverse_flux_mapping["HONORAIRES"] == "DECLARATION_HONORAIRES"
@@ -0,0 +1,14 @@
+from generate_csv import generate_corpus, FAILURE_KINDS
+from pipeline import process_drop
+
+
+def test_generated_corpus_fails_exactly_where_injected(spec, tmp_path, pipeline_dirs):
+    drop = tmp_path / "generated"
+    generated = generate_corpus(spec, str(drop), files=40, rows=50, failure_rates={kind: 0.1 for kind in FAILURE_KINDS},
+                                chunk_rows=16)
+    assert {entry["failure"] for entry in generated} >= set(FAILURE_KINDS)
+
+    outcome = process_drop(spec, str(drop), results_db=None, **pipeline_dirs)
+    failed = {entry["filename"] for entry in outcome["files"]
+              if entry["status"] == "Failed" or entry.get("validation", {}).get("status") == "Failed"}
+    assert failed == {entry["filename"] for entry in generated if entry["failure"]}
@@ -0,0 +1,39 @@
+import os
+import sys
+import subprocess
+import pytest
+
+# Budget de démarrage : importer app ne doit ni lire le cahier des charges ni dépasser ce temps
+# (environ 0,25 s sans pandas, importé seulement à la première lecture d'un fichier)
+IMPORT_TIME_BUDGET = 0.6
+# Modules lourds que l'import de app ne doit pas charger
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow")
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure_import(module, cwd):
+    code = (
+        "import sys, time; sys.path.insert(0, %r); t = time.perf_counter(); "
+        "import %s; print(time.perf_counter() - t)" % (PACKAGE_DIR, module)
+    )
+    output = subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", ["mapping", "Notice_ext", "file_csv_process", "test_filenames", "app"])
+def test_import_has_no_side_effects(module, tmp_path):
+    # Aucun cahier des charges dans tmp_path : l'import doit quand même réussir sans rien créer
+    measure_import(module, str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_import_app_does_not_load_pandas(tmp_path):
+    code = "import sys; sys.path.insert(0, %r); import app; print(*sorted(set(sys.modules) & set(%r)))" % (
+        PACKAGE_DIR, HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], cwd=str(tmp_path), capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1:] in ([], [""])
+
+
+def test_import_app_within_budget(tmp_path):
+    elapsed = measure_import("app", str(tmp_path))
+    assert elapsed < IMPORT_TIME_BUDGET, f"import app : {elapsed:.2f}s (budget {IMPORT_TIME_BUDGET}s)"
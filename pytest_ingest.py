@@ -0,0 +1,71 @@
+import os
+import time
+import pytest
+import ingest
+from ingest import InboxIngestor, InotifyWatcher, PollingWatcher, open_watcher
+
+
+def test_partial_files_wait_until_size_is_stable(tmp_path):
+    ingestor = InboxIngestor(str(tmp_path), settle_seconds=0.2)
+    (tmp_path / "a.csv").write_text("A;B\n")
+    (tmp_path / "b.csv.part").write_text("A;B\n")
+    ingestor._observe(["a.csv"])
+    assert ingestor._ready() == []
+
+    time.sleep(0.1)
+    (tmp_path / "a.csv").write_text("A;B\n1;2\n")
+    time.sleep(0.15)
+    assert ingestor._ready() == []  # la taille a changé : l'échéance repart de zéro
+
+    time.sleep(0.25)
+    assert ingestor._ready() == ["a.csv"]
+    assert ingestor._pending == {}
+
+
+def test_completed_files_are_ready_immediately(tmp_path):
+    ingestor = InboxIngestor(str(tmp_path), settle_seconds=60)
+    (tmp_path / "a.csv").write_text("A;B\n")
+    ingestor._observe(["a.csv", "gone.csv"], complete={"a.csv", "gone.csv"})
+    assert ingestor._ready() == ["a.csv"]
+
+
+def test_failed_batch_is_left_and_reporting_date_is_kept(tmp_path, monkeypatch):
+    calls = []
+
+    def process_files(filenames, spec, source_dir, reporting_date=None, **options):
+        calls.append((filenames, reporting_date))
+        if len(calls) == 1:
+            raise RuntimeError("store verrouillé")
+        for name in filenames:
+            os.remove(os.path.join(source_dir, name))
+        return {"reporting_date": reporting_date or "20241231"}
+
+    monkeypatch.setattr(ingest, "process_files", process_files)
+    monkeypatch.setattr(ingest, "get_spec", lambda: {})
+    ingestor = InboxIngestor(str(tmp_path), settle_seconds=0, polling=True, poll_interval=0.01)
+
+    (tmp_path / "a.csv").write_text("A;B\n")
+    ingestor.run(once=True)
+    assert (tmp_path / "a.csv").exists()
+
+    ingestor.run(once=True)
+    (tmp_path / "b.csv").write_text("A;B\n")
+    ingestor.run(once=True)
+    assert calls == [(["a.csv"], None), (["a.csv"], None), (["b.csv"], "20241231")]
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self"), reason="inotify (Linux) uniquement")
+def test_inotify_reports_closed_and_renamed_files(tmp_path):
+    watcher = open_watcher(str(tmp_path))
+    try:
+        assert isinstance(watcher, InotifyWatcher)
+        (tmp_path / "a.csv").write_text("A;B\n")
+        (tmp_path / "b.csv.part").write_text("A;B\n")
+        os.rename(tmp_path / "b.csv.part", tmp_path / "b.csv")
+        names, complete = watcher.wait(1)
+        assert names == complete == {"a.csv", "b.csv"}
+    finally:
+        watcher.close()
+
+    assert isinstance(open_watcher(str(tmp_path), polling=True), PollingWatcher)
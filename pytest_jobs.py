@@ -0,0 +1,82 @@
+import threading
+import pytest
+from jobs import JobQueue, QueueFull, SUCCEEDED, FAILED
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(workers=2, max_pending=2)
+    yield queue
+    queue.shutdown()
+
+
+def wait_for(job, timeout=5):
+    for _ in range(int(timeout / 0.01)):
+        if job.status in (SUCCEEDED, FAILED):
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job.id} toujours {job.status}")
+
+
+def test_job_reports_progress_and_result(queue):
+    def work(n, progress=None):
+        for i in range(n):
+            progress(i + 1, n)
+        return {"files": n}
+
+    job = wait_for(queue.submit("validation", work, 3, params={"n": 3}))
+    state = queue.get(job.id).to_dict()
+    assert state["status"] == SUCCEEDED
+    assert state["result"] == {"files": 3}
+    assert (state["progress"]["done"], state["progress"]["total"]) == (3, 3)
+    assert queue.list()[0] is job
+
+
+def test_queue_is_bounded_and_failures_are_kept(queue):
+    release = threading.Event()
+
+    def blocked(progress=None):
+        release.wait(5)
+
+    first, second = queue.submit("a", blocked), queue.submit("b", blocked)
+    with pytest.raises(QueueFull):
+        queue.submit("c", blocked)
+    release.set()
+    wait_for(first), wait_for(second)
+
+    def broken(progress=None):
+        raise RuntimeError("boom")
+
+    job = wait_for(queue.submit("c", broken))
+    assert (job.status, job.error) == (FAILED, "boom")
+
+
+def test_same_kind_jobs_run_one_at_a_time(queue):
+    running, overlaps = [], []
+
+    def work(progress=None):
+        running.append(1)
+        overlaps.append(len(running))
+        threading.Event().wait(0.05)
+        running.pop()
+
+    jobs = [queue.submit("classification", work), queue.submit("classification", work)]
+    for job in jobs:
+        wait_for(job)
+    assert overlaps == [1, 1]
+
+
+def test_waiting_kind_does_not_hold_a_pool_thread(queue):
+    queue.max_pending = 4
+    release = threading.Event()
+
+    def blocked(progress=None):
+        release.wait(5)
+
+    classifications = [queue.submit("classification", blocked), queue.submit("classification", blocked)]
+    # Le second classement attend hors du pool : la validation a encore un thread
+    validation = wait_for(queue.submit("validation", lambda progress=None: "ok"), timeout=2)
+    assert validation.result == "ok"
+    release.set()
+    for job in classifications:
+        assert wait_for(job).status == SUCCEEDED
@@ -0,0 +1,88 @@
+import os
+import json
+import pytest
+import csv_validator
+import manifest as manifest_module
+from manifest import ValidationManifest, validate_changed_files
+from validation_plan import compile_plan
+
+PLAN = compile_plan("FLUX", ["NUM_CONTRAT", "DATE_EFFET"], [("NUM_CONTRAT", "Alphanumérique", 10),
+                                                           ("DATE_EFFET", "Date aaaammjj", 8)])
+
+
+@pytest.fixture
+def flux_files(tmp_path):
+    """Un fichier valide et un fichier en échec (date invalide)."""
+    rows = "".join(f"C{i:05d};20240131\n" for i in range(20))
+    valid = tmp_path / "valid.csv"
+    valid.write_text("NUM_CONTRAT;DATE_EFFET\n" + rows, encoding="utf-8")
+    invalid = tmp_path / "invalid.csv"
+    invalid.write_text("NUM_CONTRAT;DATE_EFFET\n" + rows + "C99999;2024-131\n", encoding="utf-8")
+    return str(valid), str(invalid)
+
+
+@pytest.fixture
+def validated(monkeypatch):
+    """Tâches effectivement revalidées (hors manifeste), dans l'ordre."""
+    tasks = []
+    real_validate_files = manifest_module.validate_files
+    monkeypatch.setattr(manifest_module, "validate_files",
+                        lambda pending, **options: tasks.extend(pending) or real_validate_files(pending, **options))
+    return tasks
+
+
+def test_manifest_skips_unchanged_files(tmp_path, flux_files, validated):
+    valid, invalid = flux_files
+    manifest_path = str(tmp_path / "manifest.json")
+    tasks = [(valid, "FLUX", PLAN), (invalid, "FLUX", PLAN)]
+    first = validate_changed_files(tasks, ValidationManifest.load(manifest_path), "spec-1")
+    assert [r["status"] for r in first] == ["Failed", "Passed"]
+
+    # Fichier valide seulement touché : verdict repris ; le fichier en échec est revalidé
+    validated.clear()
+    os.utime(valid, ns=(1, 1))
+    second = validate_changed_files(tasks, ValidationManifest.load(manifest_path), "spec-1")
+    assert [task[0] for task in validated] == [invalid]
+    assert second[1]["cached"] and second[1]["status"] == "Passed"
+
+    # Nouvelle spec ou contenu modifié : tout est revalidé
+    validated.clear()
+    validate_changed_files(tasks, ValidationManifest.load(manifest_path), "spec-2")
+    assert sorted(task[0] for task in validated) == sorted([valid, invalid])
+
+
+def test_manifest_of_other_rules_version_is_ignored(tmp_path, flux_files, validated, monkeypatch):
+    valid, _ = flux_files
+    manifest_path = str(tmp_path / "manifest.json")
+    tasks = [(valid, "FLUX", PLAN)]
+    validate_changed_files(tasks, ValidationManifest.load(manifest_path), "spec-1")
+    with open(manifest_path, encoding="utf-8") as f:
+        assert json.load(f)["rules"] == csv_validator.RULES_VERSION
+
+    validated.clear()
+    monkeypatch.setattr(manifest_module, "RULES_VERSION", csv_validator.RULES_VERSION + 1)
+    assert not validate_changed_files(tasks, ValidationManifest.load(manifest_path), "spec-1")[0].get("cached")
+    assert [task[0] for task in validated] == [valid]
+
+
+def test_manifest_keeps_fingerprint_of_validated_content(tmp_path, flux_files, monkeypatch):
+    valid, _ = flux_files
+    real_validate_csv = csv_validator.validate_csv
+
+    def validate_then_rewrite(file_path, *args, **kwargs):
+        result = real_validate_csv(file_path, *args, **kwargs)
+        # Fichier remplacé pendant la validation, par un contenu de même taille
+        with open(file_path, "r+", encoding="utf-8") as f:
+            content = f.read()
+            f.seek(0)
+            f.write(content.replace("20240131", "2024-131"))
+        return result
+
+    manifest_path = str(tmp_path / "manifest.json")
+    tasks = [(valid, "FLUX", PLAN)]
+    monkeypatch.setattr(csv_validator, "validate_csv", validate_then_rewrite)
+    assert validate_changed_files(tasks, ValidationManifest.load(manifest_path), "spec-1")[0]["status"] == "Passed"
+
+    monkeypatch.setattr(csv_validator, "validate_csv", real_validate_csv)
+    second = validate_changed_files(tasks, ValidationManifest.load(manifest_path), "spec-1")[0]
+    assert not second.get("cached") and second["status"] == "Failed"
@@ -0,0 +1,29 @@
+import metrics
+from results_store import VALIDATION
+from pipeline import process_drop
+
+
+def test_pipeline_metrics_per_stage_and_in_summaries(spec, drop, pipeline_dirs, tmp_path, monkeypatch):
+    def run():
+        (drop / "ENT-1_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv").write_text(
+            "NUM_CONTRAT;DATE_EFFET;MONTANT\nC1;20240101;12\nC2;2024013;13\n")
+        return process_drop(spec, str(drop), results_db=str(tmp_path / "results.sqlite"), **pipeline_dirs)
+
+    # Coupée, l'instrumentation ne mesure rien
+    monkeypatch.setattr(metrics, "REGISTRY", metrics.MetricsRegistry())
+    assert run()["metrics"] == {} and metrics.REGISTRY.render() == ""
+
+    monkeypatch.setattr(metrics, "_enabled", True)
+    outcome = run()
+
+    snapshot = outcome["metrics"]
+    stages = {sample["labels"]["stage"] for sample in snapshot["flux_stage_seconds_count"]}
+    assert {"read_head", "read_csv", "length_check", "type_check", "move", "report"} <= stages
+    assert snapshot["flux_rows_scanned_total"] == [{"labels": {"ent": "ENT1", "flux": "CONTRATSCOLLECTIFS"}, "value": 2}]
+    violations = {s["labels"]["kind"]: s["value"] for s in snapshot["flux_violations_total"]}
+    assert violations == {"length": 0, "missing": 0, "type": 1}
+    assert outcome["summaries"][VALIDATION]["metrics"] == snapshot
+
+    text = metrics.REGISTRY.render()
+    assert "# TYPE flux_stage_seconds summary" in text
+    assert 'flux_files_total{ent="ENT1",flux="CONTRATSCOLLECTIFS",kind="validation",status="Failed"} 1' in text
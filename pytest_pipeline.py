@@ -0,0 +1,32 @@
+import os
+import json
+import shutil
+from results_store import ResultsStore
+from pipeline import process_drop
+
+
+def test_pipeline_moves_each_file_once(spec, drop, pipeline_dirs, tmp_path, monkeypatch):
+    (drop / "ENT-1_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv").write_text(
+        "NUM_CONTRAT;DATE_EFFET;MONTANT\nC1;20240101;12\nC2;20240102;13\n")
+    (drop / "ENT-2_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv").write_text("NUM_CONTRAT;MONTANT\nC1;12\nC2;13\n")
+    (drop / "junk.txt").write_text("x")
+
+    dropped = sorted(str(path) for path in drop.iterdir())
+    moves = []
+    real_move = shutil.move
+    monkeypatch.setattr(shutil, "move", lambda source, destination: moves.append(source) or real_move(source, destination))
+    outcome = process_drop(spec, str(drop), results_db=str(tmp_path / "results.sqlite"), **pipeline_dirs)
+
+    assert sorted(moves) == dropped and not os.listdir(drop)
+    final = {entry["filename"]: entry["final_path"] for entry in outcome["files"]}
+    assert final["ENT-1_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv"].startswith(
+        os.path.join(pipeline_dirs["q_dir"], "ENT1"))
+    assert final["ENT-2_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv"].startswith(pipeline_dirs["report_dir"])
+    assert final["junk.txt"].startswith(pipeline_dirs["no_match_dir"])
+    assert len(outcome["failed_files"]) == 1
+    with open(os.path.join(pipeline_dirs["report_dir"], "pipeline_failure_report.jsonl"), encoding="utf-8") as f:
+        assert [json.loads(line)["ent"] for line in f] == ["ENT2"]
+
+    with ResultsStore(str(tmp_path / "results.sqlite")) as store:
+        rows, total = store.query_files(outcome["validation_run_id"], {}, None, [], 0, 10)
+    assert total == 2 and {row["flux"] for row in rows} == {"CONTRATSCOLLECTIFS"}
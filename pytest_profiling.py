@@ -0,0 +1,41 @@
+import os
+import tracemalloc
+import pytest
+from profiling import Profile, ProfileBusy
+from results_store import CLASSIFICATION
+from pipeline import process_drop
+
+
+def test_pipeline_profiles_run_and_large_files(spec, drop, pipeline_dirs, tmp_path):
+    def run(**options):
+        for ent in (1, 2):
+            (drop / f"ENT-{ent}_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv").write_text(
+                "NUM_CONTRAT;DATE_EFFET;MONTANT\n" + "C1;20240101;12\n" * 50 * ent)
+        return process_drop(spec, str(drop), results_db=str(tmp_path / "results.sqlite"), **pipeline_dirs, **options)
+
+    assert run()["profile"] is None
+
+    profile = run(profile="run")["summaries"][CLASSIFICATION]["profile"]
+    assert profile["mode"] == "run" and len(profile["hottest"]) == 10
+    assert os.path.dirname(profile["profile"]) == os.path.join(pipeline_dirs["report_dir"], "profiles")
+    assert os.path.exists(profile["profile"]) and os.path.exists(profile["allocations"])
+
+    # Seul le fichier au-delà du seuil est profilé, dans son processus de validation
+    threshold_mb = 1500 / 1024 ** 2
+    profile = run(profile="file", profile_min_mb=threshold_mb, workers=2)["profile"]
+    assert [os.path.basename(f["file_path"]) for f in profile["files"]] == [
+        "ENT-2_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv"]
+    assert profile["files"][0]["hottest"] and os.path.exists(profile["files"][0]["profile"])
+
+
+def test_second_profile_in_the_same_process_is_refused(tmp_path):
+    with Profile(str(tmp_path), "first") as first:
+        with pytest.raises(ProfileBusy):
+            with Profile(str(tmp_path), "second"):
+                pass
+        data = [bytes(1024) for _ in range(100)]
+    assert first.summary["peak_memory_mb"] > 0 and data
+    assert not tracemalloc.is_tracing()
+    with Profile(str(tmp_path), "third") as third:
+        pass
+    assert third.summary is not None
@@ -0,0 +1,129 @@
+import os
+import json
+import pytest
+from results_store import ResultsStore, file_location, CLASSIFICATION, VALIDATION
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultsStore(str(tmp_path / "results.sqlite")) as store:
+        yield store
+
+
+def test_validation_results_and_violations_are_stored(store, tmp_path):
+    failed = {
+        "file_path": os.path.join("data", "Q_FILES", "ENT12", "a.csv"), "flux_name": "FLUX", "status": "Failed",
+        "reason": "Erreurs -> ...", "rows": 3,
+        "length_errors": ["NUM (Attendu max: 2, Trouvé: 5)"],
+        "type_errors": ["MONTANT : Attendu 'Numérique', trouvé des valeurs invalides. Valeurs problématiques: ['x']"],
+        "violation_rows": {"NUM": {"length": [0], "type": []}, "MONTANT": {"length": [], "type": [1, 2]}},
+    }
+    missing = {"file_path": os.path.join("data", "M_FILES", "NO_ENT", "b.csv"), "flux_name": "FLUX",
+               "status": "Failed", "reason": "Colonnes manquantes", "missing_columns": ["NUM"]}
+    passed = {"file_path": os.path.join("data", "M_FILES", "NO_ENT", "c.csv"), "flux_name": "FLUX",
+              "status": "Passed", "reason": None, "rows": 10, "cached": True}
+
+    run_id = store.start_run(VALIDATION, "sha")
+    for result in (failed, missing, passed):
+        store.add_validation(run_id, result)
+    store.finish_run(run_id)
+
+    assert store.latest_run_id(VALIDATION) == run_id
+    assert store.latest_run_id(CLASSIFICATION) is None
+    files = store.connection.execute("SELECT ent, period, status, cached FROM files ORDER BY id").fetchall()
+    assert [tuple(f) for f in files] == [("ENT12", "Q", "Failed", 0), ("NO_ENT", "M", "Failed", 0), ("NO_ENT", "M", "Passed", 1)]
+
+    violations = store.connection.execute(
+        "SELECT column_name, kind, message, sample_rows FROM violations ORDER BY id").fetchall()
+    assert [(v["column_name"], v["kind"], json.loads(v["sample_rows"] or "null")) for v in violations] == [
+        ("NUM", "length", [0]), ("MONTANT", "type", [1, 2]), ("NUM", "missing", None)]
+    assert violations[0]["message"] == failed["length_errors"][0]
+
+    json_path = store.export_json(run_id, str(tmp_path / "export" / "test_results.json"))
+    with open(json_path, encoding="utf-8") as f:
+        assert [r["status"] for r in json.load(f)] == ["Failed", "Failed", "Passed"]
+
+
+def test_classification_results_keep_legacy_format(store):
+    run_id = store.start_run(CLASSIFICATION)
+    result = {"filename": "bad.csv", "status": "Failed", "reason": "Filename does not match the pattern.",
+              "failed_part": "Flux name"}
+    store.add_classification(run_id, result, os.path.join("data", "NO_MATCH", "bad.csv"), ent="NO_ENT")
+    assert store.run_results(run_id) == [result]
+
+
+def test_file_location():
+    assert file_location(os.path.join("data", "Q_FILES", "ENT3", "f.csv")) == ("ENT3", "Q")
+    assert file_location("f.csv") == (None, None)
+
+
+def test_query_files_filters_sorts_and_pages(store):
+    run_id = store.start_run(VALIDATION)
+    for i in range(25):
+        store.add_validation(run_id, {
+            "file_path": os.path.join("data", "Q_FILES" if i % 2 else "M_FILES", f"ENT{i % 3}", f"f{i:02d}.csv"),
+            "flux_name": "FLUX_A" if i < 20 else "FLUX_B", "status": "Failed" if i % 5 else "Passed",
+            "reason": "Colonnes manquantes 100%" if i % 5 == 1 else ("Erreurs -> Type" if i % 5 else None),
+        })
+    store.finish_run(run_id)
+
+    rows, total = store.query_files(run_id, {"status": ["Failed"], "period": "Q"}, page_size=4)
+    assert total == 10 and len(rows) == 4
+    assert all(row["status"] == "Failed" and row["period"] == "Q" for row in rows)
+
+    rows, total = store.query_files(run_id, {"status": "Failed"}, reason="100%", sort_by=[("filename", True)])
+    assert total == 5
+    assert [row["filename"] for row in rows] == ["f21.csv", "f16.csv", "f11.csv", "f06.csv", "f01.csv"]
+
+    rows, total = store.query_files(run_id, page=2, page_size=10)
+    assert (len(rows), total) == (5, 25)
+    assert store.distinct_values(run_id, "flux") == ["FLUX_A", "FLUX_B"]
+    assert store.status_counts(run_id) == {"Failed": 20, "Passed": 5}
+    with pytest.raises(ValueError):
+        store.query_files(run_id, {"reason; DROP TABLE files": "x"})
+
+
+def test_finish_run_stores_a_summary(store):
+    run_id = store.start_run(VALIDATION)
+    reasons = [None, "Colonnes manquantes pour FLUX -> ['A']", "Erreurs -> Longueur: A (Attendu max: 1, Trouvé: 2), Type: ",
+               "Erreurs -> Longueur: , Type: B : Attendu 'Entier'", "Erreur lors de la lecture -> boom"]
+    for i, reason in enumerate(reasons):
+        store.add_validation(run_id, {"file_path": os.path.join("data", "Q_FILES", "ENT1", f"f{i}.csv"), "flux_name": "FLUX",
+                                      "status": "Failed" if reason else "Passed", "reason": reason})
+    summary = store.finish_run(run_id)
+
+    assert summary["total"] == 5
+    assert summary["status"] == {"Passed": 1, "Failed": 4}
+    assert summary["ent"] == {"ENT1": {"Passed": 1, "Failed": 4}}
+    assert summary["category"] == {"missing_columns": 1, "length": 1, "type": 1, "read_error": 1}
+    assert store.run_summaries(VALIDATION) == [summary]
+    assert store.run_summaries(CLASSIFICATION) == []
+
+
+def test_failure_report_is_buffered_and_rendered_from_records(tmp_path):
+    from failure_report import FailureReport, failure_record, REPORT_JSONL, REPORT_FILE
+
+    failed = {"file_path": "data/Q_FILES/ENT1/a.csv", "flux_name": "FLUX", "status": "Failed", "reason": "Colonnes",
+              "missing_columns": ["COL_A"]}
+    report_dir = tmp_path / "report"
+    with FailureReport(str(report_dir)) as report:
+        report.add(failure_record(failed, "ENT1"))
+        report.add(failure_record(dict(failed, file_path="data/Q_FILES/ENT1/b.csv"), "ENT1"))
+        # Rien n'est écrit avant le vidage de fin de passage
+        assert not report_dir.exists()
+
+    records = [json.loads(line) for line in (report_dir / REPORT_JSONL).read_text(encoding="utf-8").splitlines()]
+    assert [(r["file_path"], r["ent"], r["missing_columns"]) for r in records] == [
+        ("data/Q_FILES/ENT1/a.csv", "ENT1", ["COL_A"]), ("data/Q_FILES/ENT1/b.csv", "ENT1", ["COL_A"])]
+    assert (report_dir / REPORT_FILE).read_text(encoding="utf-8") == (
+        "❌ data/Q_FILES/ENT1/a.csv\nRaison : Colonnes\n\n❌ data/Q_FILES/ENT1/b.csv\nRaison : Colonnes\n\n")
+
+    # Seuil de taille : vidé en cours de passage ; en ajout, les passages se cumulent
+    with FailureReport(str(report_dir), append=True, flush_bytes=1) as report:
+        report.add(failure_record(failed))
+        assert len((report_dir / REPORT_JSONL).read_text(encoding="utf-8").splitlines()) == 3
+
+    # Un passage sans échec remplace le rapport (le dossier et son contenu restent)
+    (report_dir / "a.csv").write_text("x")
+    FailureReport(str(report_dir)).close()
+    assert (report_dir / REPORT_JSONL).read_text() == "" and (report_dir / "a.csv").exists()
@@ -0,0 +1,82 @@
+import os
+import pytest
+import sharding
+from sharding import partition
+
+
+def test_partition_by_ent_and_by_size():
+    sizes = {"ENT-1_a.csv": 10, "ENT-1_b.csv": 5, "ENT-2_a.csv": 40, "junk.txt": 1}
+    assert partition(sizes) == [("ENT2", ["ENT-2_a.csv"], 40), ("ENT1", ["ENT-1_a.csv", "ENT-1_b.csv"], 15),
+                                ("NO_ENT", ["junk.txt"], 1)]
+    balanced = partition({f"f{i}": size for i, size in enumerate([9, 8, 7, 3, 2, 1])}, by="size", shards=2)
+    assert [total for _, _, total in balanced] == [15, 15]
+
+
+def test_work_queue_leases_and_merges(spec, drop, tmp_path, monkeypatch):
+    for ent in (1, 2):
+        (drop / f"ENT-{ent}_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240101.csv").write_text(
+            "NUM_CONTRAT;DATE_EFFET;MONTANT\nC1;20240101;12\nC2;20240102;13\n")
+    (drop / "ENT-2_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_20240201.csv").write_text("NUM_CONTRAT\nC1\n")
+    queue_db = str(tmp_path / "queue.sqlite")
+    monkeypatch.chdir(tmp_path)
+
+    job_id = sharding.coordinate(spec, str(drop), queue_db)
+    with sharding.WorkQueue(queue_db, lease_seconds=60) as queue:
+        first = queue.claim("a")
+        second = queue.claim("b")
+        assert queue.claim("c") is None
+        assert (first["label"], second["label"]) == ("ENT2", "ENT1")
+
+        # Bail expiré : le shard est repris et l'ancien détenteur ne peut plus le terminer
+        queue.connection.execute("UPDATE shards SET lease_expires = 0 WHERE id = ?", (second["id"],))
+        retaken = queue.claim("c")
+        assert retaken["id"] == second["id"] and not queue.renew(second)
+        for shard in (first, retaken):
+            assert queue.complete(shard, sharding.process_shard(queue, shard, spec))
+        assert not queue.complete(second, {"files": [], "failed_files": []})
+        assert queue.status(job_id) == {"done": 2}
+
+    merged = sharding.merge(job_id, queue_db, str(tmp_path / "results.sqlite"))
+    assert merged["reporting_date"] == "20240101"
+    assert merged["summaries"]["classification"]["status"] == {"Passed": 2, "Failed": 1}
+    assert merged["summaries"]["validation"]["total"] == 2
+    assert not os.listdir(drop)
+
+
+def test_released_shard_keeps_files_moved_by_the_interrupted_attempt(spec, drop, tmp_path, monkeypatch):
+    for day in ("01", "02"):
+        (drop / f"ENT-1_OCIANE_RC2_1_CONTRATCOLLECTIF_STOCK_Q_202401{day}.csv").write_text(
+            "NUM_CONTRAT;DATE_EFFET;MONTANT\nC1;20240101;12\nC2;20240102;13\n")
+    queue_db = str(tmp_path / "queue.sqlite")
+    monkeypatch.chdir(tmp_path)
+
+    job_id = sharding.coordinate(spec, str(drop), queue_db)
+    with sharding.WorkQueue(queue_db, lease_seconds=60) as queue:
+        shard = queue.claim("a")
+        real_record_file = queue.record_file
+
+        def stop_after_first_move(shard, entry):
+            real_record_file(shard, entry)
+            raise RuntimeError("worker arrêté")
+
+        monkeypatch.setattr(queue, "record_file", stop_after_first_move)
+        with pytest.raises(RuntimeError):
+            sharding.process_shard(queue, shard, spec)
+        assert len(os.listdir(drop)) == 1
+        monkeypatch.setattr(queue, "record_file", real_record_file)
+
+        # Bail expiré sans tentative restante : status() le compte en échec sans rien modifier
+        queue.connection.execute("UPDATE shards SET lease_expires = 0, attempts = ? WHERE id = ?",
+                                 (sharding.MAX_ATTEMPTS, shard["id"]))
+        changes = queue.connection.total_changes
+        assert queue.status(job_id) == {"failed": 1}
+        assert queue.connection.total_changes == changes
+        queue.connection.execute("UPDATE shards SET attempts = 1 WHERE id = ?", (shard["id"],))
+
+        retaken = queue.claim("b")
+        result = sharding.process_shard(queue, retaken, spec)
+        assert sorted(entry["filename"][-12:] for entry in result["files"]) == ["20240101.csv", "20240102.csv"]
+        assert queue.complete(retaken, result)
+
+    merged = sharding.merge(job_id, queue_db, str(tmp_path / "results.sqlite"))
+    assert merged["summaries"]["classification"]["total"] == 2
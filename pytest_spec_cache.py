@@ -0,0 +1,72 @@
+import os
+import time
+import pytest
+import spec_cache
+from spec_cache import load_spec, spec_cache_path
+
+
+@pytest.fixture(autouse=True)
+def clear_loaded_specs():
+    spec_cache._loaded_specs.clear()
+    yield
+    spec_cache._loaded_specs.clear()
+
+
+def test_load_spec_compiles_workbook(spec_workbook, tmp_path):
+    spec = load_spec(spec_workbook, cache_dir=str(tmp_path / "cache"))
+
+    assert spec["mandatory_columns_by_flux"]["CONTRATSCOLLECTIFS"] == ["NUM_CONTRAT", "DATE_EFFET"]
+    assert spec["headers_types_by_flux"]["REFERENTIEL_GROUPES"] == [
+        ["CODE_GROUPE", "Alphanumérique", 5],
+        ["LIBELLE", "Alphanumérique", 30],
+    ]
+    assert "CONTRATCOLLECTIF_STOCK" in spec["renamed_flux_sheets"]
+    assert spec["notice_names"] == ["CONTRATCOLLECTIF_STOCK", "REFERENTIEL_GROUPE"]
+    assert os.path.exists(spec_cache_path(spec_workbook, str(tmp_path / "cache")))
+
+
+def test_load_spec_reuses_disk_cache(spec_workbook, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = load_spec(spec_workbook, cache_dir=cache_dir)
+    spec_cache._loaded_specs.clear()
+
+    def fail_compile(excel_path):
+        raise AssertionError("le cahier des charges ne doit pas être relu")
+
+    monkeypatch.setattr(spec_cache, "compile_spec", fail_compile)
+    assert load_spec(spec_workbook, cache_dir=cache_dir) == first
+
+    # Fichier touché sans changement de contenu : l'empreinte sha256 évite la recompilation
+    os.utime(spec_workbook, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert load_spec(spec_workbook, cache_dir=cache_dir)["notice_names"] == first["notice_names"]
+
+
+def test_load_spec_recompiles_on_change(spec_workbook, tmp_path):
+    from conftest import write_spec_workbook
+
+    cache_dir = str(tmp_path / "cache")
+    load_spec(spec_workbook, cache_dir=cache_dir)
+    write_spec_workbook(spec_workbook, {"NEW_FLUX": [("COL", "Oui", "Numérique", 3)]})
+
+    spec = load_spec(spec_workbook, cache_dir=cache_dir)
+    assert spec["mandatory_columns_by_flux"] == {"NEW_FLUX": ["COL"]}
+
+
+def test_load_spec_missing_workbook(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_spec(str(tmp_path / "absent.xlsx"), cache_dir=str(tmp_path / "cache"))
+
+
+def test_spec_registry_swaps_in_background(spec_workbook, tmp_path):
+    from conftest import write_spec_workbook
+    from spec_registry import SpecRegistry
+
+    registry = SpecRegistry(spec_workbook, cache_dir=str(tmp_path / "cache"), check_interval=0)
+    old_spec = registry.get()
+    write_spec_workbook(spec_workbook, {"NEW_FLUX": [("COL", "Oui", "Numérique", 3)]})
+
+    # La requête en cours reçoit encore l'ancienne spec, le rechargement se fait en arrière-plan
+    assert registry.get() is old_spec
+    registry._reload_thread.join()
+    assert registry.get()["mandatory_columns_by_flux"] == {"NEW_FLUX": ["COL"]}
+    assert "CONTRATSCOLLECTIFS" in old_spec["mandatory_columns_by_flux"]
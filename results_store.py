@@ -0,0 +1,318 @@
+import os
+import re
+import json
+import sqlite3
+from datetime import datetime
+
+# 🔹 Base des résultats (hors de data/, que classify_files parcourt)
+RESULTS_DB_PATH = "test_results.sqlite"
+
+# Nature des passages enregistrés
+CLASSIFICATION = "classification"
+VALIDATION = "validation"
+
+# Nombre de fichiers insérés entre deux commits pendant un passage
+COMMIT_EVERY = 500
+
+# Colonnes de ``files`` utilisables comme filtre exact (indexées) et comme tri
+FILTER_COLUMNS = ("ent", "flux", "period", "status")
+SORT_COLUMNS = ("file_path", "filename", "ent", "flux", "period", "status", "reason", "failed_part", "rows")
+
+# Dimensions comptées dans le résumé d'un passage (valeur absente -> "N/A")
+SUMMARY_DIMENSIONS = ("ent", "flux", "period")
+
+# Raisons d'échec -> catégorie normalisée (les raisons brutes contiennent noms de fichiers, valeurs, dates...)
+REASON_CATEGORIES = [
+    (re.compile(r"^Filename does not match"), "filename_pattern"),
+    (re.compile(r"^Unknown flux"), "unknown_flux"),
+    (re.compile(r"^Different date"), "date_mismatch"),
+    (re.compile(r"^Erreur lors de la lecture"), "read_error"),
+    (re.compile(r"^Colonnes manquantes"), "missing_columns"),
+]
+CONTENT_ERRORS_PATTERN = re.compile(r"^Erreurs -> Longueur: (.*), Type: (.*)$", re.DOTALL)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    spec_sha256 TEXT
+);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    file_path TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    ent TEXT,
+    flux TEXT,
+    period TEXT,
+    status TEXT NOT NULL,
+    reason TEXT,
+    failed_part TEXT,
+    rows INTEGER,
+    cached INTEGER NOT NULL DEFAULT 0,
+    category TEXT
+);
+CREATE TABLE IF NOT EXISTS violations (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    column_name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    message TEXT,
+    sample_rows TEXT
+);
+CREATE TABLE IF NOT EXISTS run_summaries (
+    run_id INTEGER PRIMARY KEY REFERENCES runs(id),
+    kind TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    failed INTEGER NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_kind ON runs(kind, id);
+CREATE INDEX IF NOT EXISTS idx_files_run ON files(run_id);
+CREATE INDEX IF NOT EXISTS idx_files_ent ON files(run_id, ent);
+CREATE INDEX IF NOT EXISTS idx_files_flux ON files(run_id, flux);
+CREATE INDEX IF NOT EXISTS idx_files_period ON files(run_id, period);
+CREATE INDEX IF NOT EXISTS idx_files_status ON files(run_id, status);
+CREATE INDEX IF NOT EXISTS idx_violations_file ON violations(file_id);
+CREATE INDEX IF NOT EXISTS idx_run_summaries_kind ON run_summaries(kind, run_id);
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def failure_category(status, reason):
+    """Catégorie normalisée d'un échec (None pour un fichier qui n'a pas échoué)."""
+    if status != "Failed":
+        return None
+    reason = reason or ""
+    for pattern, category in REASON_CATEGORIES:
+        if pattern.match(reason):
+            return category
+    match = CONTENT_ERRORS_PATTERN.match(reason)
+    if match:
+        length_errors, type_errors = (group.strip() for group in match.groups())
+        if length_errors and type_errors:
+            return "length_and_type"
+        return "length" if length_errors else "type"
+    return "other"
+
+
+def file_location(file_path):
+    """Retourne (ENT, période) d'un fichier classé : ``data/<Q|M>_FILES/<ENT>/fichier.csv``."""
+    ent_dir = os.path.dirname(file_path)
+    period_dir = os.path.basename(os.path.dirname(ent_dir))
+    period = period_dir[0] if period_dir in ("Q_FILES", "M_FILES") else None
+    return os.path.basename(ent_dir) or None, period
+
+
+class ResultsStore:
+    """
+    Résultats des classements et validations, écrits au fil de l'eau dans SQLite.
+
+    Chaque passage (``start_run`` ... ``finish_run``) est une ligne de ``runs`` ; chaque
+    fichier traité une ligne de ``files`` ; chaque colonne fautive une ligne de ``violations``.
+    """
+
+    def __init__(self, path=RESULTS_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(files)")}
+        if "category" not in columns:
+            # Base créée avant l'ajout des catégories d'échec
+            self.connection.execute("ALTER TABLE files ADD COLUMN category TEXT")
+        self._pending = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # 🔹 Écriture
+
+    def start_run(self, kind, spec_sha256=None):
+        cursor = self.connection.execute(
+            "INSERT INTO runs (kind, started_at, spec_sha256) VALUES (?, ?, ?)", (kind, _now(), spec_sha256)
+        )
+        self.connection.commit()
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, metrics=None, profile=None):
+        """
+        Clôt un passage et enregistre son résumé (voir ``summarize_run``), qui est retourné.
+        ``metrics`` (instantané d'un registre de metrics.py) et ``profile`` (résumé d'un
+        profilage, voir profiling.RunProfile) y sont ajoutés s'ils sont fournis.
+        """
+        finished_at = _now()
+        self.connection.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (finished_at, run_id))
+        summary = self.summarize_run(run_id)
+        if metrics:
+            summary["metrics"] = metrics
+        if profile:
+            summary["profile"] = profile
+        self.connection.execute(
+            "INSERT OR REPLACE INTO run_summaries (run_id, kind, finished_at, total, failed, summary) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, summary["kind"], finished_at, summary["total"], summary["status"].get("Failed", 0),
+             json.dumps(summary, ensure_ascii=False)),
+        )
+        self.connection.commit()
+        self._pending = 0
+        return summary
+
+    def summarize_run(self, run_id):
+        """
+        Résumé compact d'un passage : nombre de fichiers par statut, par ENT/flux/période
+        (et statut), et par catégorie d'échec normalisée.
+        """
+        run = self.connection.execute("SELECT kind, started_at, finished_at FROM runs WHERE id = ?", (run_id,)).fetchone()
+        summary = dict(run_id=run_id, kind=run["kind"], started_at=run["started_at"], finished_at=run["finished_at"])
+        summary["status"] = self.status_counts(run_id)
+        summary["total"] = sum(summary["status"].values())
+        for dimension in SUMMARY_DIMENSIONS:
+            counts = {}
+            rows = self.connection.execute(
+                f"SELECT {dimension}, status, COUNT(*) FROM files WHERE run_id = ? GROUP BY {dimension}, status", (run_id,)
+            )
+            for value, status, count in rows:
+                counts.setdefault(value if value is not None else "N/A", {})[status] = count
+            summary[dimension] = counts
+        rows = self.connection.execute(
+            "SELECT category, COUNT(*) FROM files WHERE run_id = ? AND category IS NOT NULL GROUP BY category", (run_id,)
+        )
+        summary["category"] = dict(rows.fetchall())
+        return summary
+
+    def _insert_file(self, run_id, file_path, status, reason=None, ent=None, flux=None, period=None,
+                     failed_part=None, rows=None, cached=False):
+        cursor = self.connection.execute(
+            "INSERT INTO files (run_id, file_path, filename, ent, flux, period, status, reason, failed_part, rows, cached,"
+            " category) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, file_path, os.path.basename(file_path), ent, flux, period, status, reason or None,
+             failed_part or None, rows, int(bool(cached)), failure_category(status, reason)),
+        )
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self.connection.commit()
+            self._pending = 0
+        return cursor.lastrowid
+
+    def add_classification(self, run_id, result, file_path, ent=None, flux=None, period=None):
+        """Enregistre le résultat de classify_files pour un fichier (dict filename/status/reason/failed_part)."""
+        return self._insert_file(run_id, file_path, result["status"], result["reason"], ent=ent, flux=flux,
+                                 period=period, failed_part=result.get("failed_part"))
+
+    def add_validation(self, run_id, result):
+        """Enregistre le résultat de validate_csv pour un fichier, avec ses colonnes fautives."""
+        ent, period = file_location(result["file_path"])
+        file_id = self._insert_file(run_id, result["file_path"], result["status"], result["reason"], ent=ent,
+                                    flux=result["flux_name"], period=period, rows=result.get("rows"),
+                                    cached=result.get("cached", False))
+
+        violations = [(file_id, column, "missing", None, None) for column in result.get("missing_columns", [])]
+        messages = result.get("length_errors", []) + result.get("type_errors", [])
+        for column, rows_by_kind in result.get("violation_rows", {}).items():
+            for kind, separator in (("length", " ("), ("type", " :")):
+                if rows_by_kind[kind]:
+                    message = next((m for m in messages if m.startswith(column + separator)), None)
+                    violations.append((file_id, column, kind, message, json.dumps(rows_by_kind[kind])))
+        if violations:
+            self.connection.executemany(
+                "INSERT INTO violations (file_id, column_name, kind, message, sample_rows) VALUES (?, ?, ?, ?, ?)",
+                violations,
+            )
+        return file_id
+
+    # 🔹 Lecture
+
+    def latest_run_id(self, kind):
+        row = self.connection.execute("SELECT MAX(id) FROM runs WHERE kind = ?", (kind,)).fetchone()
+        return row[0]
+
+    def run_results(self, run_id):
+        """Résultats d'un passage au format des anciens rapports JSON."""
+        if run_id is None:
+            return []
+        run = self.connection.execute("SELECT kind FROM runs WHERE id = ?", (run_id,)).fetchone()
+        files = self.connection.execute(
+            "SELECT file_path, filename, status, reason, failed_part FROM files WHERE run_id = ? ORDER BY id", (run_id,)
+        ).fetchall()
+        if run["kind"] == CLASSIFICATION:
+            return [{"filename": f["filename"], "status": f["status"], "reason": f["reason"] or "",
+                     "failed_part": f["failed_part"] or ""} for f in files]
+        return [{"file_path": f["file_path"], "status": "Failed" if f["status"] == "Failed" else "Passed",
+                 "reason": f["reason"] if f["status"] == "Failed" else None} for f in files]
+
+    def query_files(self, run_id, filters=None, reason=None, sort_by=(), page=0, page_size=10):
+        """
+        Page de fichiers d'un passage, filtrée et triée par SQLite.
+
+        Args:
+            filters (dict): colonne de FILTER_COLUMNS -> valeur ou liste de valeurs acceptées.
+            reason (str): sous-chaîne recherchée dans la raison de l'échec.
+            sort_by (list): couples (colonne de SORT_COLUMNS, décroissant).
+
+        Returns:
+            tuple: (lignes de la page sous forme de dicts, nombre total de lignes filtrées)
+        """
+        where, params = ["run_id = ?"], [run_id]
+        for column, values in (filters or {}).items():
+            if column not in FILTER_COLUMNS:
+                raise ValueError(f"Filtre inconnu : {column}")
+            values = [values] if isinstance(values, str) else list(values or [])
+            if values:
+                where.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params += values
+        if reason:
+            escaped = reason.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("reason LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        where = " AND ".join(where)
+
+        order = [f"{column} {'DESC' if descending else 'ASC'}" for column, descending in sort_by if column in SORT_COLUMNS]
+        order = ", ".join(order + ["id"])
+
+        total = self.connection.execute(f"SELECT COUNT(*) FROM files WHERE {where}", params).fetchone()[0]
+        rows = self.connection.execute(
+            f"SELECT * FROM files WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?", params + [page_size, page * page_size]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def distinct_values(self, run_id, column):
+        """Valeurs prises par une colonne filtrable dans un passage (pour les listes déroulantes)."""
+        if column not in FILTER_COLUMNS:
+            raise ValueError(f"Filtre inconnu : {column}")
+        rows = self.connection.execute(
+            f"SELECT DISTINCT {column} FROM files WHERE run_id = ? AND {column} IS NOT NULL ORDER BY {column}", (run_id,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def status_counts(self, run_id):
+        rows = self.connection.execute("SELECT status, COUNT(*) FROM files WHERE run_id = ? GROUP BY status", (run_id,))
+        return dict(rows.fetchall())
+
+    def run_summaries(self, kind, limit=50):
+        """Résumés des ``limit`` derniers passages d'un type, du plus ancien au plus récent."""
+        rows = self.connection.execute(
+            "SELECT summary FROM run_summaries WHERE kind = ? ORDER BY run_id DESC LIMIT ?", (kind, limit)
+        ).fetchall()
+        return [json.loads(row["summary"]) for row in reversed(rows)]
+
+    def export_json(self, run_id, json_path):
+        """Export optionnel d'un passage au format JSON historique (lu par les anciens outils)."""
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        with open(json_path, "w", encoding="utf-8") as json_file:
+            json.dump(self.run_results(run_id), json_file, indent=4, ensure_ascii=False)
+        return json_path
@@ -0,0 +1,402 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import logging
+import argparse
+import multiprocessing
+from spec_registry import get_spec
+from classification import TEST_DIR, Q_DIR, M_DIR, NO_MATCH_DIR, list_drop, ent_folder, plan_classification
+from pipeline import REPORT_DIR, process_files, record_entries
+from results_store import ResultsStore, RESULTS_DB_PATH
+
+# 🔹 File de travail partagée (sur le système de fichiers commun aux nœuds)
+QUEUE_DB_PATH = "work_queue.sqlite"
+
+# Un shard dont le bail n'est pas renouvelé dans ce délai est repris par un autre worker
+LEASE_SECONDS = 300
+MAX_ATTEMPTS = 3
+POLL_INTERVAL = 2.0
+
+# Partitionnement : un shard par ENT, ou ``shards`` lots de tailles équilibrées
+BY_ENT, BY_SIZE = "ent", "size"
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    source_dir TEXT NOT NULL,
+    spec_sha256 TEXT NOT NULL,
+    reporting_date TEXT,
+    merged_at REAL
+);
+CREATE TABLE IF NOT EXISTS shards (
+    id INTEGER PRIMARY KEY,
+    job_id INTEGER NOT NULL REFERENCES jobs(id),
+    label TEXT NOT NULL,
+    filenames TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS shard_files (
+    shard_id INTEGER NOT NULL REFERENCES shards(id),
+    filename TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    PRIMARY KEY (shard_id, filename)
+);
+CREATE INDEX IF NOT EXISTS shards_job_status ON shards (job_id, status);
+"""
+
+
+def partition(sizes, by=BY_ENT, shards=None):
+    """
+    Répartit les fichiers {nom: taille} en lots.
+
+    ``by="ent"`` : un lot par dossier ENT (ENT1 ... ENT100, NO_ENT).
+    ``by="size"`` : ``shards`` lots de tailles proches (le plus gros fichier restant va
+    au lot le moins chargé).
+
+    Returns:
+        list: [(libellé, [noms triés], octets)], du lot le plus lourd au plus léger.
+    """
+    groups = {}
+    if by == BY_ENT:
+        for name, size in sizes.items():
+            label = ent_folder(name)
+            names, total = groups.get(label, ([], 0))
+            groups[label] = (names + [name], total + size)
+    elif by == BY_SIZE:
+        count = max(1, min(shards or os.cpu_count() or 1, len(sizes)))
+        bins = [([], 0) for _ in range(count)]
+        for name in sorted(sizes, key=lambda name: (-sizes[name], name)):
+            index = min(range(count), key=lambda i: (bins[i][1], i))
+            bins[index] = (bins[index][0] + [name], bins[index][1] + sizes[name])
+        groups = {f"shard-{i + 1}": group for i, group in enumerate(bins) if group[0]}
+    else:
+        raise ValueError(f"Partitionnement inconnu : {by!r} (attendu : {BY_ENT}, {BY_SIZE})")
+    return sorted(((label, sorted(names), total) for label, (names, total) in groups.items()),
+                  key=lambda shard: (-shard[2], shard[0]))
+
+
+class WorkQueue:
+    """
+    File de shards dans une base SQLite partagée, sans courtier externe.
+
+    Un worker réclame un shard avec un bail (``lease_seconds``) qu'il renouvelle pendant
+    le traitement ; un bail expiré rend le shard à nouveau disponible. Chaque réclamation
+    reçoit un jeton : seul le détenteur du bail courant peut terminer le shard.
+    L'issue de chaque fichier est enregistrée dès son déplacement (``shard_files``) : une
+    tentative reprise après interruption retrouve les fichiers déjà traités.
+    """
+
+    def __init__(self, path=QUEUE_DB_PATH, lease_seconds=LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        # Pas de WAL : la mémoire partagée qu'il exige ne traverse pas un système de fichiers réseau
+        self.connection.execute("PRAGMA journal_mode=DELETE")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # 🔹 Coordinateur
+
+    def submit(self, source_dir, spec_sha256, shards, reporting_date=None):
+        """Enregistre un traitement et ses shards [(libellé, noms, octets)] ; retourne l'identifiant du traitement."""
+        with self.connection:
+            job_id = self.connection.execute(
+                "INSERT INTO jobs (created_at, source_dir, spec_sha256, reporting_date) VALUES (?, ?, ?, ?)",
+                (time.time(), source_dir, spec_sha256, reporting_date),
+            ).lastrowid
+            self.connection.executemany(
+                "INSERT INTO shards (job_id, label, filenames, bytes, status) VALUES (?, ?, ?, ?, ?)",
+                [(job_id, label, json.dumps(names), size, PENDING) for label, names, size in shards],
+            )
+        return job_id
+
+    def job(self, job_id):
+        row = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def status(self, job_id):
+        """
+        Nombre de shards par statut pour un traitement (lecture seule). Un bail expiré sans
+        tentative restante compte déjà comme un échec ; claim() l'enregistre comme tel.
+        """
+        rows = self.connection.execute(
+            "SELECT CASE WHEN status = ? AND lease_expires < ? AND attempts >= ? THEN ? ELSE status END AS status,"
+            " COUNT(*) AS count FROM shards WHERE job_id = ? GROUP BY 1",
+            (LEASED, time.time(), MAX_ATTEMPTS, FAILED, job_id),
+        )
+        return {row["status"]: row["count"] for row in rows}
+
+    def results(self, job_id):
+        """Shards d'un traitement, avec le résultat décodé des shards terminés."""
+        rows = self.connection.execute("SELECT * FROM shards WHERE job_id = ? ORDER BY id", (job_id,)).fetchall()
+        return [dict(row, filenames=json.loads(row["filenames"]), result=json.loads(row["result"]) if row["result"] else None)
+                for row in rows]
+
+    def mark_merged(self, job_id):
+        self.connection.execute("UPDATE jobs SET merged_at = ? WHERE id = ?", (time.time(), job_id))
+
+    # 🔹 Worker
+
+    def claim(self, worker):
+        """Réclame le plus lourd des shards disponibles (ou au bail expiré) ; retourne le shard ou None."""
+        now = time.time()
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Bail expiré sans tentative restante (worker arrêté en cours de traitement) : échec définitif
+            self.connection.execute(
+                "UPDATE shards SET status = ?, error = COALESCE(error, 'Bail expiré') WHERE status = ?"
+                " AND lease_expires < ? AND attempts >= ?",
+                (FAILED, LEASED, now, MAX_ATTEMPTS),
+            )
+            row = self.connection.execute(
+                "SELECT shards.*, jobs.source_dir, jobs.spec_sha256, jobs.reporting_date FROM shards"
+                " JOIN jobs ON jobs.id = shards.job_id"
+                " WHERE (status = ? OR (status = ? AND lease_expires < ?)) AND attempts < ?"
+                " ORDER BY shards.job_id, bytes DESC, shards.id LIMIT 1",
+                (PENDING, LEASED, now, MAX_ATTEMPTS),
+            ).fetchone()
+            if row is None:
+                self.connection.execute("COMMIT")
+                return None
+            token = uuid.uuid4().hex
+            self.connection.execute(
+                "UPDATE shards SET status = ?, worker = ?, lease_token = ?, lease_expires = ?, attempts = attempts + 1"
+                " WHERE id = ?",
+                (LEASED, worker, token, now + self.lease_seconds, row["id"]),
+            )
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        return dict(row, filenames=json.loads(row["filenames"]), lease_token=token)
+
+    def renew(self, shard):
+        """Prolonge le bail ; False si le shard a été repris par un autre worker."""
+        cursor = self.connection.execute(
+            "UPDATE shards SET lease_expires = ? WHERE id = ? AND lease_token = ? AND status = ?",
+            (time.time() + self.lease_seconds, shard["id"], shard["lease_token"], LEASED),
+        )
+        return cursor.rowcount == 1
+
+    def record_file(self, shard, entry):
+        """
+        Enregistre l'issue d'un fichier déplacé (entrée de process_files) puis prolonge le
+        bail ; False si le shard a été repris par un autre worker. L'issue est gardée même
+        dans ce cas : le fichier a bel et bien quitté le dépôt.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO shard_files (shard_id, filename, entry) VALUES (?, ?, ?)",
+            (shard["id"], entry["filename"], json.dumps(entry, ensure_ascii=False)),
+        )
+        return self.renew(shard)
+
+    def recorded_files(self, shard):
+        """Entrées des fichiers déjà déplacés pour ce shard, toutes tentatives confondues."""
+        rows = self.connection.execute("SELECT entry FROM shard_files WHERE shard_id = ? ORDER BY rowid", (shard["id"],))
+        return [json.loads(row["entry"]) for row in rows]
+
+    def complete(self, shard, result):
+        cursor = self.connection.execute(
+            "UPDATE shards SET status = ?, result = ?, lease_expires = NULL, error = NULL"
+            " WHERE id = ? AND lease_token = ?",
+            (DONE, json.dumps(result, ensure_ascii=False), shard["id"], shard["lease_token"]),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, shard, error):
+        """Rend le shard (ou le marque en échec après MAX_ATTEMPTS tentatives)."""
+        self.connection.execute(
+            "UPDATE shards SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, error = ?, lease_expires = NULL"
+            " WHERE id = ? AND lease_token = ?",
+            (MAX_ATTEMPTS, FAILED, PENDING, error, shard["id"], shard["lease_token"]),
+        )
+
+
+def coordinate(spec, source_dir=TEST_DIR, queue_db=QUEUE_DB_PATH, by=BY_ENT, shards=None):
+    """
+    Partitionne le dépôt courant et le met en file ; retourne l'identifiant du traitement.
+
+    La date de reporting est fixée ici pour tout le dépôt, comme pour un classement sur
+    un seul nœud : chaque shard est classé par rapport à cette même date.
+    """
+    filenames = list_drop(source_dir)
+    sizes = {name: os.path.getsize(os.path.join(source_dir, name)) for name in filenames}
+    reporting_date = plan_classification(filenames, spec["renamed_flux_sheets"], spec["notice_names"])["reporting_date"]
+    with WorkQueue(queue_db) as queue:
+        job_id = queue.submit(source_dir, spec["fingerprint"]["sha256"], partition(sizes, by, shards), reporting_date)
+    logging.info("🧩 Traitement %d : %d fichier(s) en file (date de reporting %s).", job_id, len(filenames), reporting_date)
+    return job_id
+
+
+def process_shard(queue, shard, spec, **options):
+    """
+    Traite un shard réclamé avec le pipeline en un passage ; le store est alimenté à la fusion.
+
+    Le bail est renouvelé pendant la validation et après chaque déplacement. Le résultat
+    reprend tous les fichiers du shard, y compris ceux déplacés par une tentative interrompue.
+    """
+    if spec["fingerprint"]["sha256"] != shard["spec_sha256"]:
+        raise RuntimeError(f"Cahier des charges différent de celui du coordinateur ({shard['spec_sha256'][:12]}).")
+    # Les fichiers déjà déplacés lors d'une tentative interrompue ne sont plus dans le dépôt
+    filenames = [name for name in shard["filenames"] if os.path.exists(os.path.join(shard["source_dir"], name))]
+
+    def lease_lost():
+        return RuntimeError(f"Bail du shard {shard['id']} perdu.")
+
+    def progress(done, total):
+        if not queue.renew(shard):
+            raise lease_lost()
+
+    def on_moved(entry):
+        if not queue.record_file(shard, entry):
+            raise lease_lost()
+
+    process_files(filenames, spec, shard["source_dir"], results_db=None, progress=progress,
+                  reporting_date=shard["reporting_date"], on_moved=on_moved, **options)
+    entries = queue.recorded_files(shard)
+    failed_files = [(entry["destination"], entry["validation"]["reason"]) for entry in entries
+                    if entry.get("validation") and entry["validation"]["status"] == "Failed"]
+    return {"files": entries, "failed_files": failed_files}
+
+
+def run_worker(queue_db=QUEUE_DB_PATH, worker=None, once=False, poll_interval=POLL_INTERVAL, lease_seconds=LEASE_SECONDS,
+               **options):
+    """Réclame et traite des shards jusqu'à épuisement de la file (``once``) ou indéfiniment."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    with WorkQueue(queue_db, lease_seconds) as queue:
+        while True:
+            shard = queue.claim(worker)
+            if shard is None:
+                if once:
+                    return processed
+                time.sleep(poll_interval)
+                continue
+
+            logging.info("🔧 %s : shard %s (%d fichier(s))", worker, shard["label"], len(shard["filenames"]))
+            try:
+                result = process_shard(queue, shard, get_spec(), **options)
+            except Exception as e:
+                logging.exception("❌ Shard %s en échec", shard["label"])
+                queue.fail(shard, str(e))
+                continue
+            if not queue.complete(shard, result):
+                logging.warning("⚠️ Shard %s repris par un autre worker : résultat ignoré.", shard["label"])
+            processed += 1
+
+
+def merge(job_id, queue_db=QUEUE_DB_PATH, results_db=RESULTS_DB_PATH):
+    """
+    Fusionne les shards terminés d'un traitement en un passage de classement et un passage
+    de validation du store ; retourne les résumés (voir pipeline.record_entries).
+    """
+    with WorkQueue(queue_db) as queue:
+        job = queue.job(job_id)
+        shards = queue.results(job_id)
+        unfinished = [shard["label"] for shard in shards if shard["status"] != DONE]
+        if unfinished:
+            raise RuntimeError(f"Shards non terminés : {', '.join(unfinished)}")
+
+        entries = sorted((entry for shard in shards for entry in shard["result"]["files"]),
+                         key=lambda entry: entry["filename"])
+        with ResultsStore(results_db) as store:
+            runs = record_entries(store, job["spec_sha256"], entries)
+        queue.mark_merged(job_id)
+
+    failed_files = [tuple(failure) for shard in shards for failure in shard["result"]["failed_files"]]
+    logging.info("🧮 Traitement %d fusionné : %d fichier(s), %d shard(s).", job_id, len(entries), len(shards))
+    return dict(runs, reporting_date=job["reporting_date"], failed_files=failed_files)
+
+
+def wait_for(job_id, queue_db=QUEUE_DB_PATH, poll_interval=POLL_INTERVAL):
+    """Attend que tous les shards soient terminés ou en échec définitif ; retourne les comptes par statut."""
+    with WorkQueue(queue_db) as queue:
+        while True:
+            counts = queue.status(job_id)
+            if not counts.get(PENDING) and not counts.get(LEASED):
+                return counts
+            time.sleep(poll_interval)
+
+
+def _worker_process(queue_db, once, options):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(processName)s - %(message)s")
+    run_worker(queue_db, once=once, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traitement réparti du dépôt par ENT : coordinateur et workers.")
+    parser.add_argument("--queue-db", default=QUEUE_DB_PATH, help="File de travail SQLite partagée entre les nœuds.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Partitionner le dépôt et mettre les shards en file.")
+    submit.add_argument("--source-dir", default=TEST_DIR)
+    submit.add_argument("--by", choices=(BY_ENT, BY_SIZE), default=BY_ENT)
+    submit.add_argument("--shards", type=int, help="Nombre de lots pour --by size (défaut : nombre de cœurs).")
+    submit.add_argument("--wait", action="store_true", help="Attendre les workers puis fusionner les résultats.")
+    submit.add_argument("--results-db", default=RESULTS_DB_PATH)
+
+    worker = commands.add_parser("worker", help="Réclamer et traiter des shards.")
+    worker.add_argument("--processes", type=int, default=1, help="Workers lancés sur ce nœud.")
+    worker.add_argument("--once", action="store_true", help="S'arrêter quand la file est vide.")
+    worker.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+
+    merge_command = commands.add_parser("merge", help="Fusionner les shards terminés dans le store des résultats.")
+    merge_command.add_argument("job_id", type=int)
+    merge_command.add_argument("--results-db", default=RESULTS_DB_PATH)
+
+    status = commands.add_parser("status", help="Shards par statut.")
+    status.add_argument("job_id", type=int)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.command == "submit":
+        for directory in (Q_DIR, M_DIR, NO_MATCH_DIR, REPORT_DIR):
+            os.makedirs(directory, exist_ok=True)
+        job_id = coordinate(get_spec(), args.source_dir, args.queue_db, args.by, args.shards)
+        print(job_id)
+        if args.wait:
+            counts = wait_for(job_id, args.queue_db)
+            if counts.get(FAILED):
+                raise SystemExit(f"{counts[FAILED]} shard(s) en échec : voir 'status {job_id}'.")
+            print(json.dumps(merge(job_id, args.queue_db, args.results_db)["summaries"], ensure_ascii=False, indent=2))
+    elif args.command == "worker":
+        options = {"lease_seconds": args.lease_seconds}
+        processes = [multiprocessing.Process(target=_worker_process, args=(args.queue_db, args.once, options),
+                                             name=f"worker-{i + 1}") for i in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    elif args.command == "merge":
+        print(json.dumps(merge(args.job_id, args.queue_db, args.results_db)["summaries"], ensure_ascii=False, indent=2))
+    else:
+        with WorkQueue(args.queue_db) as queue:
+            print(json.dumps(queue.status(args.job_id), indent=2))
+
+
+if __name__ == "__main__":
+    main()
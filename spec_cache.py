@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+import logging
+
+# 🔹 Cahier des charges et emplacement du cache compilé
+EXCEL_PATH = "Cahier des charges - Reporting Flux Standard - V25.1.0.xlsx"
+SPEC_CACHE_DIR = ".spec_cache"
+SPEC_FORMAT_VERSION = 2
+
+# Specs déjà chargées dans ce processus, indexées par chemin du cache
+_loaded_specs = {}
+
+
+def file_fingerprint(path, with_hash=True):
+    """Retourne l'empreinte (taille, mtime, sha256) d'un fichier."""
+    stat = os.stat(path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if with_hash:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        fingerprint["sha256"] = sha256.hexdigest()
+    return fingerprint
+
+
+def _json_safe(value):
+    """Convertit une cellule Excel (NaN, types NumPy) en valeur sérialisable en JSON."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def compile_spec_from_sheets(sheets):
+    """Compile les feuilles du cahier des charges en un dictionnaire sérialisable."""
+    from mapping import (
+        extract_flux_sheet_names,
+        extract_mandatory_columns,
+        extract_headers_and_types,
+        flux_mapping,
+        reverse_flux_mapping,
+    )
+    from Notice_ext import extract_notice_names
+
+    flux_sheets = extract_flux_sheet_names(sheets)
+
+    mandatory_columns_by_flux = {}
+    headers_types_by_flux = {}
+    for sheet_name, df in sheets.items():
+        flux = sheet_name.strip().upper()
+        if len(df.columns) >= 4:
+            mandatory_columns_by_flux[flux] = extract_mandatory_columns(df)
+        if len(df.columns) >= 7:
+            headers_types_by_flux[flux] = [
+                [_json_safe(header), _json_safe(data_type), _json_safe(length)]
+                for header, data_type, length in extract_headers_and_types(df)
+            ]
+
+    notice_names = []
+    if "Notice" in sheets:
+        try:
+            notice_names = extract_notice_names(sheets["Notice"])
+        except ValueError as e:
+            logging.warning("⚠️ Feuille 'Notice' ignorée : %s", e)
+
+    return {
+        "flux_sheets": flux_sheets,
+        "renamed_flux_sheets": sorted({flux_mapping.get(flux, flux) for flux in flux_sheets}),
+        "org_flux_sheets": sorted({reverse_flux_mapping.get(flux, flux) for flux in flux_sheets}),
+        "flux_mapping": {flux: flux_mapping[flux] for flux in flux_sheets if flux in flux_mapping},
+        "mandatory_columns_by_flux": mandatory_columns_by_flux,
+        "headers_types_by_flux": headers_types_by_flux,
+        "notice_names": sorted(set(notice_names)),
+    }
+
+
+def compile_spec(excel_path=EXCEL_PATH):
+    """Lit le fichier Excel (toutes les feuilles) et retourne la spec compilée."""
+    import pandas as pd
+
+    logging.info("📘 Compilation du cahier des charges : %s", excel_path)
+    sheets = pd.read_excel(excel_path, sheet_name=None)
+    return compile_spec_from_sheets(sheets)
+
+
+def spec_cache_path(excel_path=EXCEL_PATH, cache_dir=SPEC_CACHE_DIR):
+    """Retourne le chemin du fichier cache associé au cahier des charges."""
+    name = os.path.splitext(os.path.basename(excel_path))[0]
+    return os.path.join(cache_dir, f"{name}.json")
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if spec.get("version") != SPEC_FORMAT_VERSION:
+        return None
+    return spec
+
+
+def _write_cache(cache_path, spec):
+    """Écrit le cache de façon atomique (fichier temporaire puis renommage)."""
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def load_spec(excel_path=EXCEL_PATH, cache_dir=SPEC_CACHE_DIR):
+    """
+    Retourne la spec compilée du cahier des charges.
+
+    Le fichier Excel n'est relu que si son empreinte (taille, mtime puis sha256)
+    ne correspond plus à celle du cache disque.
+
+    Raises:
+        FileNotFoundError: si le cahier des charges est introuvable.
+    """
+    cache_path = spec_cache_path(excel_path, cache_dir)
+    stat_fingerprint = file_fingerprint(excel_path, with_hash=False)
+
+    spec = _loaded_specs.get(cache_path)
+    if spec is None:
+        spec = _read_cache(cache_path)
+
+    if spec is not None:
+        cached = spec["fingerprint"]
+        if all(cached[key] == stat_fingerprint[key] for key in ("size", "mtime_ns")):
+            _loaded_specs[cache_path] = spec
+            return spec
+
+    fingerprint = file_fingerprint(excel_path)
+    if spec is not None and spec["fingerprint"]["sha256"] == fingerprint["sha256"]:
+        # Contenu identique (fichier touché ou recopié) : on met seulement l'empreinte à jour
+        spec = dict(spec, fingerprint=fingerprint)
+    else:
+        spec = compile_spec(excel_path)
+        spec.update(version=SPEC_FORMAT_VERSION, source=excel_path, fingerprint=fingerprint)
+
+    _write_cache(cache_path, spec)
+    _loaded_specs[cache_path] = spec
+    return spec
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    compiled = load_spec()
+    print(f"✅ Spec compilée : {spec_cache_path()} ({len(compiled['flux_sheets'])} feuilles)")
@@ -0,0 +1,86 @@
+import os
+import time
+import logging
+import threading
+from spec_cache import EXCEL_PATH, SPEC_CACHE_DIR, load_spec
+
+# 🔹 Intervalle minimal entre deux vérifications du fichier Excel (en secondes)
+CHECK_INTERVAL = 5.0
+
+
+class SpecRegistry:
+    """
+    Spec compilée partagée par tout le processus, rechargée à chaud.
+
+    ``get()`` retourne toujours la spec courante sans attendre : si le cahier des charges
+    a changé (taille/mtime), une nouvelle version est compilée dans un thread de fond puis
+    remplace l'ancienne d'un seul coup. Les validations en cours gardent leur référence.
+    """
+
+    def __init__(self, excel_path=EXCEL_PATH, cache_dir=SPEC_CACHE_DIR, check_interval=CHECK_INTERVAL):
+        self.excel_path = excel_path
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self._spec = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._reload_thread = None
+
+    def get(self):
+        """Retourne la spec courante (premier chargement bloquant, ensuite jamais)."""
+        spec = self._spec
+        if spec is None:
+            with self._lock:
+                if self._spec is None:
+                    self._spec = load_spec(self.excel_path, self.cache_dir)
+                    self._last_check = time.monotonic()
+                return self._spec
+
+        self._check_for_update(spec)
+        return spec
+
+    def _check_for_update(self, spec):
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+
+        try:
+            stat = os.stat(self.excel_path)
+        except OSError:
+            # Fichier momentanément absent (copie en cours) : on garde la version courante
+            return
+
+        fingerprint = spec["fingerprint"]
+        if stat.st_size == fingerprint["size"] and stat.st_mtime_ns == fingerprint["mtime_ns"]:
+            return
+        self.reload(wait=False)
+
+    def reload(self, wait=True):
+        """Recompile la spec en arrière-plan (``wait=True`` attend la fin du rechargement)."""
+        with self._lock:
+            if self._reload_thread is None or not self._reload_thread.is_alive():
+                self._reload_thread = threading.Thread(target=self._reload, name="spec-reload", daemon=True)
+                self._reload_thread.start()
+            thread = self._reload_thread
+        if wait:
+            thread.join()
+
+    def _reload(self):
+        try:
+            spec = load_spec(self.excel_path, self.cache_dir)
+        except Exception as e:
+            logging.error("❌ Rechargement du cahier des charges impossible : %s", e)
+            return
+        if spec is not self._spec:
+            self._spec = spec
+            logging.info("🔄 Cahier des charges rechargé (sha256 %s)", spec["fingerprint"]["sha256"][:12])
+
+
+# Registre du processus, initialisé au premier appel de get_spec()
+registry = SpecRegistry()
+
+
+def get_spec():
+    """Retourne la spec compilée courante du registre du processus."""
+    return registry.get()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Valeurs considérées comme vides dans les colonnes numériques
+NULL_PLACEHOLDERS = ['nan', 'NaN', 'None', '-', 'NULL']
+
+# Nombres décimaux à virgule ou à point (ex. "12", "-3,50", ".5") et entiers signés
+NUMERIC_PATTERN = r'[+-]?(?:\d+(?:[.,]\d*)?|[.,]\d+)'
+INTEGER_PATTERN = r'[+-]?\d+'
+
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+# Chaque contrôle reçoit une Series de chaînes déjà nettoyées (sans NaN, espaces retirés)
+# et retourne (valide, index des lignes fautives).
+
+def _verdict(values, invalid_mask):
+    invalid_mask = np.asarray(invalid_mask, dtype=bool)
+    return not invalid_mask.any(), values.index[invalid_mask]
+
+
+def _fullmatch(values, pattern):
+    matches = values.str.fullmatch(pattern)
+    return matches.fillna(False).to_numpy(dtype=bool)
+
+
+def check_numeric(values):
+    """Numérique : nombre décimal (virgule ou point), les valeurs vides usuelles étant tolérées."""
+    return _verdict(values, ~(_fullmatch(values, NUMERIC_PATTERN) | values.isin(NULL_PLACEHOLDERS).to_numpy()))
+
+
+def check_integer(values):
+    """Entier signé, les valeurs vides usuelles étant tolérées."""
+    return _verdict(values, ~(_fullmatch(values, INTEGER_PATTERN) | values.isin(NULL_PLACEHOLDERS).to_numpy()))
+
+
+def check_date_aaaammjj(values):
+    """Date aaaammjj : 8 chiffres formant une date réelle du calendrier (années bissextiles comprises)."""
+    strings = values.to_numpy(dtype="U8") if len(values) else np.empty(0, dtype="U8")
+    lengths = values.str.len().to_numpy()
+
+    # Tampon UCS-4 contigu : une ligne de 8 points de code par valeur
+    digits = strings.view(np.uint32).reshape(len(strings), 8).astype(np.int64) - ord("0")
+    all_digits = ((digits >= 0) & (digits <= 9)).all(axis=1) & (lengths == 8)
+    digits = np.where(all_digits[:, None], digits, 0)
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = DAYS_IN_MONTH[np.clip(month, 0, 12)] + ((month == 2) & leap)
+    valid = all_digits & (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+    return _verdict(values, ~valid)
+
+
+def check_length(values, max_length):
+    """Longueur maximale ; retourne aussi la longueur la plus grande rencontrée."""
+    lengths = values.str.len().to_numpy(dtype=np.int64)
+    max_found = int(lengths.max()) if len(lengths) else 0
+    if max_length is None:
+        return True, values.index[:0], max_found
+    valid, invalid_rows = _verdict(values, lengths > max_length)
+    return valid, invalid_rows, max_found
+
+
+# Contrôle de type par nature de colonne (voir validation_plan.TYPE_KINDS)
+TYPE_KERNELS = {
+    "numeric": check_numeric,
+    "integer": check_integer,
+    "date": check_date_aaaammjj,
+}
+
+
+def clean_values(values):
+    """Retire les cellules vides et les espaces autour des valeurs d'une colonne."""
+    values = values.dropna()
+    if values.dtype != object and not isinstance(values.dtype, pd.StringDtype):
+        values = values.astype(str)
+    return values.str.strip()
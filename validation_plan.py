@@ -0,0 +1,67 @@
+import math
+from collections import namedtuple
+
+# 🔹 Règle de contrôle d'une colonne, avec sa longueur maximale et son type déjà résolus
+# (``nullable`` : colonne facultative ; information du cahier des charges, sans contrôle des cellules vides)
+ColumnRule = namedtuple("ColumnRule", ["header", "expected_type", "kind", "max_length", "nullable"])
+
+# 🔹 Plan de validation d'un flux : colonnes obligatoires + règles dans l'ordre du cahier des charges
+ValidationPlan = namedtuple("ValidationPlan", ["flux_name", "mandatory_columns", "rules"])
+
+# Types du cahier des charges -> contrôle de type appliqué à la colonne
+TYPE_KINDS = {
+    "Numérique": "numeric",
+    "Entier": "integer",
+    "Date aaaammjj": "date",
+    "Alphanumérique": "text",
+}
+
+
+def get_max_allowed_length(expected_length):
+    """Retourne la longueur maximale autorisée (les dates aaaammjj acceptent 10 caractères)."""
+    if isinstance(expected_length, (int, float)) and not math.isnan(expected_length):
+        expected_length = int(expected_length)
+        return 10 if expected_length == 8 else expected_length
+    return None
+
+
+# Plans déjà compilés, pour la spec courante uniquement (sha256 -> {flux: plan})
+_plans = {}
+
+
+def compile_plan(flux_name, mandatory_columns, headers_types):
+    """Compile les colonnes obligatoires et entêtes/types/longueurs d'un flux en plan immuable."""
+    mandatory_columns = tuple(mandatory_columns)
+    rules = tuple(
+        ColumnRule(
+            header=header,
+            expected_type=expected_type,
+            kind=TYPE_KINDS.get(expected_type.strip() if isinstance(expected_type, str) else expected_type, "text"),
+            max_length=get_max_allowed_length(expected_length),
+            nullable=header not in mandatory_columns,
+        )
+        for header, expected_type, expected_length in headers_types
+    )
+    return ValidationPlan(flux_name, mandatory_columns, rules)
+
+
+def get_plan(spec, flux_name):
+    """
+    Retourne le plan de validation du flux pour cette spec, compilé une seule fois.
+
+    Returns:
+        ValidationPlan | None: None si le flux n'est pas décrit dans le cahier des charges.
+    """
+    fingerprint = spec["fingerprint"]["sha256"]
+    plans = _plans.get(fingerprint)
+    if plans is None:
+        plans = {}
+        _plans.clear()
+        _plans[fingerprint] = plans
+
+    if flux_name not in plans:
+        mandatory_columns = spec["mandatory_columns_by_flux"].get(flux_name)
+        plans[flux_name] = None if mandatory_columns is None else compile_plan(
+            flux_name, mandatory_columns, spec["headers_types_by_flux"].get(flux_name, [])
+        )
+    return plans[flux_name]